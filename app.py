@@ -1,15 +1,35 @@
 from flask import Flask, render_template, Response, request, redirect, url_for, session, flash, jsonify
 from ultralytics import YOLO
 import cv2, numpy as np, os, time, traceback
-import os, jwt, time
-from utils.detector import ObjectDetector
+import os, jwt, time, atexit, base64, json, math, gc
+from utils.detector import ObjectDetector, resolve_model
+from utils.jpeg import decode_frame
+from utils.batcher import BatchingDetector
+from utils.worker_pool import ProcessPoolDetector, InferenceUnavailable
+from utils.capture import CapturePool
+from utils.motion import SceneGate
+from utils.tracking import BoxTracker
+from utils.admission import FrameMailbox, Share
+from utils.stream import BOUNDARY as STREAM_BOUNDARY
+from utils.db_writer import WriteBehindQueue
+from utils.aggregator import WindowAggregator
+from utils.cache import TTLCache
+from utils.keyring import KeyManager
+from utils.metrics import MetricsRegistry, StageTimer
+from utils.trace import TraceWriter
+from utils.procmem import memory_info, format_mb
+from utils import rollup
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta, timezone
 from cryptography.fernet import Fernet
 from functools import wraps
+from types import SimpleNamespace
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
 from dotenv import load_dotenv
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from flask_sock import Sock
 
 # ======================
 # CONFIGURASI AWAL
@@ -37,6 +57,9 @@ from flask_migrate import Migrate
 
 db = SQLAlchemy(app)
 migrate = Migrate(app, db)
+# WebSocket (/ws/detect); ping menjaga koneksi tetap hidup di belakang proxy
+app.config["SOCK_SERVER_OPTIONS"] = {"ping_interval": 25, "max_message_size": Config.WS_MAX_MESSAGE_BYTES}
+sock = Sock(app)
 
 # Timezone WIB (jika butuh)
 WIB = timezone(timedelta(hours=7))
@@ -60,7 +83,6 @@ fernet = Fernet(Config.ENCRYPTION_KEY.encode())
 
 # GLOBALS
 SAVE_TO_DB = True
-last_saved_time = 0
 
 # ======================
 # MODELS
@@ -94,11 +116,14 @@ class Gudang(db.Model):
     nama_gudang = db.Column(db.String(120), nullable=False)
     lokasi = db.Column(db.String(120), nullable=False)
     kapasitas = db.Column(db.Integer, nullable=False)
+    # bagian kapasitas inferensi gudang ini relatif terhadap gudang lain
+    bobot = db.Column(db.Float, nullable=False, default=1.0, server_default="1")
 
     id_user = db.Column(
         db.Integer,
         db.ForeignKey("users.id_user", ondelete="CASCADE"),
-        nullable=False
+        nullable=False,
+        index=True
     )
 
     cctvs = db.relationship(
@@ -112,7 +137,7 @@ class Gudang(db.Model):
 class Karung(db.Model):
     __tablename__ = "karung"
     id_karung = db.Column(db.Integer, primary_key=True)
-    nama_karung = db.Column(db.String(120), nullable=False)
+    nama_karung = db.Column(db.String(120), nullable=False, unique=True, index=True)
 
     deteksi = db.relationship("Deteksi", backref="karung", lazy=True)
 
@@ -122,11 +147,16 @@ class CCTV(db.Model):
     id_cctv = db.Column(db.Integer, primary_key=True)
     nama_cctv = db.Column(db.String(120), nullable=False)
     ip_address = db.Column(db.String(100), nullable=True)
+    # bobot relatif terhadap CCTV lain di gudang yang sama (mis. dock muat > gudang belakang)
+    bobot = db.Column(db.Float, nullable=False, default=1.0, server_default="1")
+    # laju minimum (frame/detik) yang didahulukan sebelum pembagian berbobot; 0 = tanpa jaminan
+    min_fps = db.Column(db.Float, nullable=False, default=0.0, server_default="0")
 
     id_gudang = db.Column(
         db.Integer,
         db.ForeignKey("gudang.id_gudang", ondelete="CASCADE"),
-        nullable=False
+        nullable=False,
+        index=True
     )
 
     deteksi = db.relationship(
@@ -137,14 +167,38 @@ class CCTV(db.Model):
     )
 
 
+class KunciData(db.Model):
+    """DEK (data encryption key) terbungkus master key, dipakai banyak baris deteksi"""
+    __tablename__ = "kunci_data"
+    id_kunci = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(50), nullable=False)
+    encrypted_dek = db.Column(db.LargeBinary, nullable=False)
+    dibuat = db.Column(db.DateTime, default=lambda: datetime.now(WIB))
+
+
 class Deteksi(db.Model):
     __tablename__ = "deteksi"
+    __table_args__ = (
+        # dashboard & keyset pagination: ORDER BY waktu DESC, id_deteksi DESC
+        db.Index("ix_deteksi_waktu_id_deteksi", "waktu", "id_deteksi"),
+        # riwayat per CCTV dalam rentang waktu
+        db.Index("ix_deteksi_id_cctv_waktu", "id_cctv", "waktu"),
+        # satu baris ringkasan per CCTV per jendela agregasi (NULL = baris manual)
+        db.Index("ux_deteksi_id_cctv_jendela", "id_cctv", "jendela", unique=True),
+    )
     id_deteksi = db.Column(db.Integer, primary_key=True)
     waktu = db.Column(db.DateTime, default=lambda: datetime.now(WIB))
     total_karung = db.Column(db.Integer, nullable=False)
     data_encrypted = db.Column(db.LargeBinary, nullable=True)
     encrypted_dek = db.Column(db.LargeBinary, nullable=True)
 
+    # ringkasan satu jendela agregasi (total_karung = count terakhir)
+    jumlah_sampel = db.Column(db.Integer, nullable=True)
+    min_karung = db.Column(db.Integer, nullable=True)
+    max_karung = db.Column(db.Integer, nullable=True)
+    rata_karung = db.Column(db.Float, nullable=True)
+    jendela = db.Column(db.DateTime, nullable=True)
+
     id_cctv = db.Column(
         db.Integer,
         db.ForeignKey("cctv.id_cctv", ondelete="CASCADE"),
@@ -157,6 +211,370 @@ class Deteksi(db.Model):
         nullable=True
     )
 
+    # baris baru: DEK disimpan sekali di kunci_data (encrypted_dek hanya untuk baris lama)
+    id_kunci = db.Column(
+        db.Integer,
+        db.ForeignKey("kunci_data.id_kunci"),
+        nullable=True
+    )
+
+
+
+class RekapMixin:
+    """Kolom bersama tabel rekap deteksi (lihat utils/rollup.py)"""
+    id_rekap = db.Column(db.Integer, primary_key=True)
+    periode = db.Column(db.DateTime, nullable=False)
+    id_cctv = db.Column(db.Integer, nullable=False)
+    id_gudang = db.Column(db.Integer, nullable=True, index=True)
+    id_karung = db.Column(db.Integer, nullable=False, default=0)   # 0 = tanpa karung
+    jumlah_sampel = db.Column(db.Integer, nullable=False, default=0)
+    jumlah_total = db.Column(db.BigInteger, nullable=False, default=0)
+    min_karung = db.Column(db.Integer, nullable=True)
+    max_karung = db.Column(db.Integer, nullable=True)
+    total_terakhir = db.Column(db.Integer, nullable=True)
+    waktu_terakhir = db.Column(db.DateTime, nullable=True)
+
+
+class RekapJam(RekapMixin, db.Model):
+    __tablename__ = "rekap_deteksi_jam"
+    __table_args__ = (
+        db.UniqueConstraint("periode", "id_cctv", "id_karung", name="uq_rekap_deteksi_jam"),
+    )
+
+
+class RekapHarian(RekapMixin, db.Model):
+    __tablename__ = "rekap_deteksi_harian"
+    __table_args__ = (
+        db.UniqueConstraint("periode", "id_cctv", "id_karung", name="uq_rekap_deteksi_harian"),
+    )
+
+
+# ======================
+# CACHE METADATA (user, CCTV, karung)
+# ======================
+# Snapshot read-only (bukan objek ORM) supaya aman dipakai lintas request/thread.
+# Ditulis ulang otomatis lewat event ORM di proses ini; perubahan dari proses lain
+# (mis. create_user.py) terlihat setelah TTL habis.
+user_cache = TTLCache(maxsize=Config.METADATA_CACHE_SIZE, ttl=Config.METADATA_CACHE_TTL,
+                      negative_ttl=Config.METADATA_NEGATIVE_TTL)
+cctv_cache = TTLCache(maxsize=Config.METADATA_CACHE_SIZE, ttl=Config.METADATA_CACHE_TTL,
+                      negative_ttl=Config.METADATA_NEGATIVE_TTL)
+karung_cache = TTLCache(maxsize=Config.METADATA_CACHE_SIZE, ttl=Config.METADATA_CACHE_TTL,
+                        negative_ttl=Config.METADATA_NEGATIVE_TTL)
+
+
+def get_user(id_user):
+    """Snapshot User + gudang-nya dari cache; None bila user tidak ada"""
+    def load():
+        user = db.session.get(User, id_user)
+        if user is None:
+            return None
+        return SimpleNamespace(
+            id_user=user.id_user,
+            username=user.username,
+            role=user.role,
+            status=user.status,
+            last_login=user.last_login,
+            gudang=[
+                SimpleNamespace(
+                    id_gudang=g.id_gudang,
+                    nama_gudang=g.nama_gudang,
+                    lokasi=g.lokasi,
+                    kapasitas=g.kapasitas,
+                    id_user=g.id_user
+                )
+                for g in user.gudang
+            ]
+        )
+    return user_cache.get_or_load(id_user, load)
+
+
+def get_cctv(id_cctv):
+    """Snapshot CCTV (termasuk pemilik gudang) dari cache; None bila tidak ada"""
+    def load():
+        cctv = db.session.get(CCTV, id_cctv)
+        if cctv is None:
+            return None
+        return SimpleNamespace(
+            id_cctv=cctv.id_cctv,
+            nama_cctv=cctv.nama_cctv,
+            ip_address=cctv.ip_address,
+            id_gudang=cctv.id_gudang,
+            id_user=cctv.gudang.id_user,
+            bobot=cctv.bobot,
+            min_fps=cctv.min_fps,
+            bobot_gudang=cctv.gudang.bobot
+        )
+    return cctv_cache.get_or_load(id_cctv, load)
+
+
+def get_karung_id(nama_karung):
+    """id_karung berdasarkan nama; dibuat bila belum ada"""
+    def load():
+        karung = Karung.query.filter_by(nama_karung=nama_karung).first()
+        if not karung:
+            try:
+                karung = Karung(nama_karung=nama_karung)
+                db.session.add(karung)
+                db.session.commit()
+            except IntegrityError:
+                # nama_karung unik: thread/proses lain baru saja membuatnya
+                db.session.rollback()
+                karung = Karung.query.filter_by(nama_karung=nama_karung).first()
+        return karung.id_karung
+    return karung_cache.get_or_load(nama_karung, load)
+
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target):
+    user_cache.invalidate(target.id_user)
+
+
+@event.listens_for(Gudang, "after_insert")
+@event.listens_for(Gudang, "after_update")
+@event.listens_for(Gudang, "after_delete")
+def _invalidate_gudang(mapper, connection, target):
+    user_cache.invalidate(target.id_user)
+    # snapshot CCTV menyimpan pemilik gudang
+    cctv_cache.clear()
+
+
+@event.listens_for(CCTV, "after_insert")
+@event.listens_for(CCTV, "after_update")
+@event.listens_for(CCTV, "after_delete")
+def _invalidate_cctv(mapper, connection, target):
+    cctv_cache.invalidate(target.id_cctv)
+
+
+@event.listens_for(Karung, "after_update")
+@event.listens_for(Karung, "after_delete")
+def _invalidate_karung(mapper, connection, target):
+    karung_cache.clear()
+
+
+# ======================
+# KEY MANAGEMENT (envelope encryption)
+# ======================
+def save_data_key(scope, encrypted_dek):
+    with app.app_context():
+        kunci = KunciData(scope=scope, encrypted_dek=encrypted_dek)
+        db.session.add(kunci)
+        db.session.commit()
+        return kunci.id_kunci
+
+
+def load_data_key(id_kunci):
+    with app.app_context():
+        kunci = db.session.get(KunciData, id_kunci)
+        return kunci.encrypted_dek if kunci else None
+
+
+keyring = KeyManager(
+    ENCRYPTION_KEY,
+    save_data_key,
+    load_data_key,
+    rotate_seconds=Config.DEK_ROTATE_SECONDS,
+    rotate_rows=Config.DEK_ROTATE_ROWS
+)
+
+
+def key_scope(cctv):
+    """Satu DEK aktif per CCTV atau per gudang (Config.DEK_SCOPE)"""
+    if Config.DEK_SCOPE == "gudang":
+        return f"gudang:{cctv.id_gudang}"
+    return f"cctv:{cctv.id_cctv}"
+
+
+def decrypt_deteksi(d):
+    """Dekripsi data_encrypted satu baris deteksi (format baru maupun lama)"""
+    if not d.data_encrypted:
+        return "{}"
+    try:
+        if d.id_kunci:
+            return keyring.decrypt(d.id_kunci, d.data_encrypted).decode()
+        if d.encrypted_dek:
+            return keyring.decrypt_wrapped(d.encrypted_dek, d.data_encrypted).decode()
+        return fernet.decrypt(d.data_encrypted).decode()
+    except Exception:
+        return "{}"
+
+
+# ======================
+# METRIK (Prometheus /metrics + Server-Timing)
+# ======================
+# Per proses; dengan beberapa worker gunicorn setiap worker punya angkanya sendiri
+metrics = MetricsRegistry()
+stage_seconds = metrics.histogram(
+    "deteksi_stage_seconds", "Durasi tiap tahap pipeline deteksi", ("stage", "id_cctv"))
+db_flush_seconds = metrics.histogram(
+    "deteksi_db_flush_seconds", "Durasi bulk insert + upsert rekap satu batch write-behind")
+frames_total = metrics.counter(
+    "deteksi_frames_total", "Frame yang diproses /detect_api", ("id_cctv", "mode"))
+saves_total = metrics.counter(
+    "deteksi_saves_total", "Baris deteksi yang masuk antrian penyimpanan", ("id_cctv",))
+drops_total = metrics.counter(
+    "deteksi_drops_total", "Baris/frame yang dibuang", ("reason",))
+errors_total = metrics.counter(
+    "deteksi_errors_total", "Error per tahap", ("stage",))
+metrics.callback(
+    "deteksi_write_queue_depth", "Isi antrian write-behind", lambda: deteksi_writer.stats()["queue_depth"])
+metrics.callback(
+    "deteksi_open_windows", "Jendela agregasi yang masih terbuka", lambda: count_aggregator.stats()["open_windows"])
+
+
+# Trace JSONL per frame (sampel + semua frame lambat), dianalisis dengan `python -m utils.trace`
+frame_tracer = TraceWriter(
+    Config.TRACE_DIR,
+    sample_rate=Config.TRACE_SAMPLE_RATE,
+    slow_ms=Config.TRACE_SLOW_MS,
+    max_queue=Config.TRACE_QUEUE_SIZE,
+    logger=app.logger
+)
+metrics.callback(
+    "deteksi_trace_dropped", "Record trace yang dibuang karena antrian penuh",
+    lambda: frame_tracer.dropped, metric_type="counter")
+
+
+def cctv_label(id_cctv):
+    """Label id_cctv hanya untuk CCTV yang terdaftar (jumlah series tetap terbatas)"""
+    try:
+        return str(id_cctv) if get_cctv(int(id_cctv)) else "unknown"
+    except (TypeError, ValueError):
+        return "unknown"
+
+
+def by_cctv_label(values):
+    """{(id_cctv,): angka} -> dijumlah per cctv_label, untuk metrik callback"""
+    labelled = {}
+    for (id_cctv,), value in values.items():
+        label = (cctv_label(id_cctv),)
+        labelled[label] = labelled.get(label, 0) + value
+    return labelled
+
+
+# ======================
+# WRITE-BEHIND DETEKSI
+# ======================
+def gudang_of_cctv(id_cctv):
+    cctv = get_cctv(id_cctv)
+    return cctv.id_gudang if cctv else None
+
+
+def merge_window_row(row):
+    """
+    Tulis satu baris ringkasan; bila (id_cctv, jendela) sudah ada, ringkasan
+    parsial digabung ke baris itu (sampel dijumlah, min/max, rata tertimbang,
+    count terakhir dari yang lebih akhir). Mengembalikan baris untuk rekap:
+    untuk gabungan hanya selisihnya, supaya rekap tetap satu sampel per jendela.
+    """
+    query = (db.select(Deteksi.id_deteksi, Deteksi.waktu, Deteksi.total_karung, Deteksi.id_karung,
+                       Deteksi.jumlah_sampel, Deteksi.min_karung, Deteksi.max_karung, Deteksi.rata_karung)
+             .where(Deteksi.id_cctv == row["id_cctv"], Deteksi.jendela == row["jendela"])
+             .with_for_update())
+    lama = db.session.execute(query).first()
+    if lama is None:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(db.insert(Deteksi), [row])
+            return row
+        except IntegrityError:
+            lama = db.session.execute(query).one()
+
+    n_lama, n_baru = lama.jumlah_sampel or 0, row["jumlah_sampel"] or 0
+    n = n_lama + n_baru
+    gabung = {
+        "jumlah_sampel": n,
+        "min_karung": min(v for v in (lama.min_karung, row["min_karung"]) if v is not None),
+        "max_karung": max(v for v in (lama.max_karung, row["max_karung"]) if v is not None),
+        "rata_karung": round(((lama.rata_karung or 0) * n_lama + (row["rata_karung"] or 0) * n_baru) / n, 2)
+                       if n else row["rata_karung"],
+    }
+    waktu = row["waktu"].astimezone(WIB).replace(tzinfo=None)
+    if waktu >= lama.waktu:
+        gabung.update({key: row[key] for key in
+                       ("waktu", "total_karung", "data_encrypted", "encrypted_dek", "id_kunci")})
+    else:
+        gabung.update({"waktu": lama.waktu, "total_karung": lama.total_karung})
+    db.session.execute(db.update(Deteksi).where(Deteksi.id_deteksi == lama.id_deteksi).values(**gabung))
+
+    return {
+        "waktu": gabung["waktu"],
+        "id_cctv": row["id_cctv"],
+        "id_karung": lama.id_karung,
+        "total_karung": gabung["total_karung"],
+        "min_karung": gabung["min_karung"],
+        "max_karung": gabung["max_karung"],
+        "rekap_sampel": 0,
+        "rekap_total": gabung["total_karung"] - lama.total_karung,
+    }
+
+
+def flush_deteksi(rows):
+    """
+    Bulk insert baris deteksi dari antrian write-behind, sekaligus update
+    rekap per jam/hari dalam transaksi yang sama (satu commit per batch)
+    """
+    with app.app_context():
+        start = time.perf_counter()
+        try:
+            manual = [r for r in rows if r.get("jendela") is None]
+            ringkasan = [r for r in rows if r.get("jendela") is not None]
+            if manual:
+                db.session.execute(db.insert(Deteksi), manual)
+            rekap_rows = list(manual)
+            if ringkasan:
+                try:
+                    with db.session.begin_nested():
+                        db.session.execute(db.insert(Deteksi), ringkasan)
+                    rekap_rows += ringkasan
+                except IntegrityError:
+                    # jendela yang sama sudah ditulis (worker lain / sebelum restart)
+                    rekap_rows += [merge_window_row(r) for r in ringkasan]
+            rollup.apply_rows(db.session, rekap_rows, gudang_of_cctv, RekapJam, RekapHarian, tz=WIB)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            errors_total.inc("db_flush")
+            raise
+        db_flush_seconds.observe(time.perf_counter() - start)
+
+
+deteksi_writer = WriteBehindQueue(
+    flush_deteksi,
+    max_queue=Config.DB_WRITE_QUEUE_SIZE,
+    batch_size=Config.DB_WRITE_BATCH_SIZE,
+    flush_interval=Config.DB_WRITE_FLUSH_INTERVAL,
+    logger=app.logger,
+    on_drop=lambda n: drops_total.inc("db_error", amount=n)
+)
+
+
+def save_window_summary(summary):
+    """Satu baris deteksi per CCTV per jendela agregasi"""
+    with app.app_context():
+        save_detection_counts(summary.id_cctv, summary.last_counts, summary=summary)
+
+
+# ======================
+# AGREGASI PER CCTV
+# ======================
+count_aggregator = WindowAggregator(
+    save_window_summary,
+    window_seconds=Config.AGGREGATION_WINDOW_SECONDS,
+    logger=app.logger
+)
+
+
+def shutdown_pipeline():
+    """Tutup jendela agregasi yang masih terbuka lalu tulis sisa antrian ke DB"""
+    count_aggregator.flush_all()
+    deteksi_writer.drain()
+    frame_tracer.close()
+
+
+atexit.register(shutdown_pipeline)
 
 
 # ======================
@@ -170,7 +588,11 @@ def role_required(role):
             if "user_id" not in session:
                 flash("Silakan login terlebih dahulu", "warning")
                 return redirect(url_for("login"))
-            user = User.query.get(session["user_id"])
+            user = get_user(session["user_id"])
+            if user is None:
+                session.pop("user_id", None)
+                flash("Silakan login terlebih dahulu", "warning")
+                return redirect(url_for("login"))
             if user.role != role:
                 flash("Anda tidak memiliki izin untuk mengakses halaman ini", "danger")
                 return redirect(url_for("home"))
@@ -181,7 +603,151 @@ def role_required(role):
 # ======================
 # DETECTOR YOLO
 # ======================
-detector = ObjectDetector("models/best.pt")
+MODEL_PATH = resolve_model("models/best.pt", Config.DETECTOR_BACKEND, Config.DETECTOR_IMGSZ)
+
+if Config.INFERENCE_WORKERS > 0:
+    # Inferensi di proses worker terpisah; proses web tidak memuat model
+    detector = ProcessPoolDetector(
+        MODEL_PATH,
+        workers=Config.INFERENCE_WORKERS,
+        torch_threads=Config.INFERENCE_TORCH_THREADS,
+        slots_per_worker=Config.INFERENCE_SLOTS_PER_WORKER,
+        slot_bytes=Config.INFERENCE_SLOT_BYTES,
+        batch_size=Config.INFERENCE_BATCH_SIZE,
+        timeout=Config.INFERENCE_TIMEOUT,
+        start_timeout=Config.INFERENCE_START_TIMEOUT
+    )
+else:
+    detector = ObjectDetector(MODEL_PATH)
+
+    # Gabungkan frame dari banyak request ke satu panggilan YOLO batch
+    if Config.INFERENCE_BATCH_SIZE > 1:
+        detector = BatchingDetector(
+            detector,
+            max_batch=Config.INFERENCE_BATCH_SIZE,
+            max_wait_ms=Config.INFERENCE_BATCH_WAIT_MS
+        )
+
+# ======================
+# GERBANG PERUBAHAN ADEGAN + TRACKING
+# ======================
+def new_scene_gate():
+    return SceneGate(
+        threshold=Config.SCENE_CHANGE_THRESHOLD,
+        pixel_delta=Config.SCENE_PIXEL_DELTA,
+        max_age=Config.SCENE_MAX_AGE
+    )
+
+
+def new_box_tracker():
+    return BoxTracker(every_n=Config.TRACK_EVERY_N, min_tracked=Config.TRACK_MIN_TRACKED)
+
+
+# /detect_api dan capture server-side punya sumber frame berbeda => gerbang terpisah
+scene_gate = new_scene_gate()
+capture_gate = new_scene_gate()
+box_tracker = new_box_tracker()
+capture_tracker = new_box_tracker()
+metrics.callback(
+    "deteksi_inference_skipped", "Frame yang memakai hasil cache karena adegan tidak berubah",
+    lambda: by_cctv_label(scene_gate.skips_per_key()), metric_type="counter", labelnames=("id_cctv",))
+
+# ======================
+# ADMISSION CONTROL /detect_api, /ws/detect & capture pool
+# ======================
+# satu frame menunggu per CCTV (frame baru menggantikan), batas inferensi bersamaan,
+# frame basi dibuang; selebihnya dijawab "busy" + Retry-After.
+# Slot dibagi adil antar gudang lalu antar CCTV sesuai kolom bobot/min_fps.
+frame_mailbox = FrameMailbox(
+    max_inflight=Config.ADMISSION_MAX_INFLIGHT,
+    deadline=Config.ADMISSION_DEADLINE_MS / 1000.0,
+    max_waiting=Config.ADMISSION_MAX_WAITING,
+    rate_window=Config.SCHEDULER_RATE_WINDOW
+)
+metrics.callback(
+    "deteksi_mailbox_waiting", "Frame yang menunggu slot inferensi", lambda: frame_mailbox.stats()["waiting"])
+metrics.callback(
+    "deteksi_mailbox_inflight", "Frame yang sedang diproses", lambda: frame_mailbox.stats()["inflight"])
+metrics.callback(
+    "deteksi_achieved_fps", "Frame/detik yang diproses per CCTV (jendela SCHEDULER_RATE_WINDOW)",
+    lambda: achieved_rates(), labelnames=("id_cctv",))
+
+
+def cctv_share(id_cctv):
+    """Bagian kapasitas CCTV; CCTV tak terdaftar berbagi satu grup dengan bobot default"""
+    cctv = get_cctv(id_cctv)
+    if cctv is None:
+        return Share()
+    return Share(cctv.id_gudang, cctv.bobot_gudang, cctv.bobot, cctv.min_fps)
+
+
+def achieved_rates():
+    return by_cctv_label({(id_cctv,): achieved for id_cctv, (achieved, _) in frame_mailbox.rates().items()})
+
+
+def admit_frame(id_cctv):
+    """Tunggu giliran di mailbox CCTV; ticket.admitted False => frame dibuang"""
+    ticket = frame_mailbox.acquire(id_cctv, cctv_share(id_cctv))
+    if ticket.admitted:
+        stage_seconds.observe(ticket.waited, "queue", cctv_label(id_cctv))
+    else:
+        drops_total.inc(ticket.status)
+    return ticket
+
+
+def busy_payload(ticket):
+    retry = frame_mailbox.retry_after()
+    return {"error": "busy", "reason": ticket.status, "retry_after_ms": int(retry * 1000)}, retry
+
+
+def unavailable_payload(error):
+    retry = max(1.0, frame_mailbox.retry_after())
+    return {"error": "busy", "reason": "inference_unavailable", "detail": str(error),
+            "retry_after_ms": int(retry * 1000)}, retry
+
+
+def busy_response(payload, retry):
+    response = jsonify(payload)
+    response.status_code = 503
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry)))
+    return response
+
+
+# ======================
+# CAPTURE CCTV (server-side)
+# ======================
+def capture_share(id_cctv):
+    """cctv_share untuk thread CameraWorker (di luar request, butuh app context)"""
+    with app.app_context():
+        return cctv_share(id_cctv)
+
+
+def on_capture_result(id_cctv, frame, detections):
+    """Callback CapturePool: simpan hasil kamera IP tanpa lewat browser"""
+    if SAVE_TO_DB:
+        count_aggregator.add(id_cctv, detections.counts)
+
+
+capture_pool = CapturePool(
+    detector,
+    on_result=on_capture_result,
+    url_template=Config.CCTV_URL_TEMPLATE,
+    backoff_max=Config.CAPTURE_BACKOFF_MAX,
+    jpeg_quality=Config.STREAM_JPEG_QUALITY,
+    scene_gate=capture_gate,
+    tracker=capture_tracker,
+    # kamera IP berbagi kapasitas inferensi lewat penjadwal yang sama dengan browser
+    mailbox=frame_mailbox,
+    share_of=capture_share
+)
+
+
+def start_capture_pool():
+    """Buka reader untuk semua CCTV yang punya ip_address"""
+    with app.app_context():
+        cctvs = CCTV.query.filter(CCTV.ip_address.isnot(None)).all()
+        capture_pool.sync({c.id_cctv: c.ip_address for c in cctvs})
+    app.logger.info(f"[CAPTURE] {len(capture_pool.stats())} kamera aktif")
 
 # ======================
 # ROUTES
@@ -191,7 +757,7 @@ detector = ObjectDetector("models/best.pt")
 def home():
     user = None
     if "user_id" in session:
-        user = User.query.get(session["user_id"])
+        user = get_user(session["user_id"])
     return render_template("home.html", user=user)
 
 
@@ -201,7 +767,7 @@ def monitor():
     if "user_id" not in session:
         flash("Silakan login untuk mengakses halaman ini", "warning")
         return redirect(url_for("login"))
-    user = User.query.get(session["user_id"])
+    user = get_user(session["user_id"])
     return render_template("monitor.html", user=user)
 
 
@@ -213,7 +779,7 @@ def detect():
         return redirect(url_for("login"))
 
     cam_id = request.args.get("cam_id", "0")
-    user = User.query.get(session["user_id"])
+    user = get_user(session["user_id"])
     return render_template("detect.html", user=user, cam_id=cam_id)
 
 @app.route("/dashboard")
@@ -222,24 +788,9 @@ def dashboard():
         flash("Silakan login dulu", "warning")
         return redirect(url_for("login"))
 
-    user = User.query.get(session["user_id"])
-    deteksi_data = Deteksi.query.order_by(Deteksi.waktu.desc()).all()
+    user = get_user(session["user_id"])
 
-    # 🔐 Dekripsi data deteksi (tetap sama)
-    decrypted_records = []
-    for d in deteksi_data:
-        try:
-            decrypted = fernet.decrypt(d.data_encrypted).decode() if d.data_encrypted else "{}"
-        except Exception:
-            decrypted = "{}"
-        decrypted_records.append({
-            "id_deteksi": d.id_deteksi,
-            "waktu": d.waktu,
-            "id_cctv": d.id_cctv,
-            "id_karung": d.id_karung,
-            "total_karung": d.total_karung,
-            "data_terdekripsi": decrypted
-        })
+    # 🔐 Tabel deteksi dimuat bertahap lewat /api/deteksi (keyset pagination)
 
     # 🌐 URL Metabase Dashboard
     BASE_METABASE_URL_ADMIN = "http://localhost:3000/public/dashboard/b78035aa-565a-4e82-88a1-a150e2c8fc25"
@@ -250,7 +801,7 @@ def dashboard():
         iframe_url = BASE_METABASE_URL_ADMIN
     else:
         # Ambil gudang berdasarkan user
-        gudang = Gudang.query.filter_by(id_user=user.id_user).first()
+        gudang = user.gudang[0] if user.gudang else None
         if not gudang:
             flash("Gudang tidak ditemukan untuk user ini", "danger")
             return redirect(url_for("home"))
@@ -263,11 +814,128 @@ def dashboard():
     return render_template(
         "dashboard.html",
         user=user,
-        deteksi=decrypted_records,
         iframe_url=iframe_url
     )
 
 
+def encode_cursor(waktu, id_deteksi):
+    raw = f"{waktu.isoformat()}|{id_deteksi}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    waktu, id_deteksi = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    return datetime.fromisoformat(waktu), int(id_deteksi)
+
+
+@app.route("/api/deteksi")
+def api_deteksi():
+    """
+    Daftar deteksi terbaru dengan keyset pagination pada (waktu, id_deteksi).
+    Query string: limit, cursor, id_cctv, id_gudang, dari, sampai (ISO 8601).
+    Operator hanya melihat deteksi dari gudang miliknya.
+    """
+    if "user_id" not in session:
+        return jsonify({"error": "Unauthorized"}), 403
+    user = get_user(session["user_id"])
+    if user is None:
+        return jsonify({"error": "Unauthorized"}), 403
+
+    try:
+        limit = min(max(int(request.args.get("limit", 50)), 1), 200)
+        cursor = request.args.get("cursor")
+        id_cctv = request.args.get("id_cctv", type=int)
+        id_gudang = request.args.get("id_gudang", type=int)
+        dari = request.args.get("dari")
+        sampai = request.args.get("sampai")
+
+        query = Deteksi.query.join(CCTV, CCTV.id_cctv == Deteksi.id_cctv)
+
+        if user.role != "admin":
+            query = query.filter(CCTV.id_gudang.in_([g.id_gudang for g in user.gudang]))
+        if id_cctv:
+            query = query.filter(Deteksi.id_cctv == id_cctv)
+        if id_gudang:
+            query = query.filter(CCTV.id_gudang == id_gudang)
+        if dari:
+            query = query.filter(Deteksi.waktu >= datetime.fromisoformat(dari))
+        if sampai:
+            query = query.filter(Deteksi.waktu < datetime.fromisoformat(sampai))
+        if cursor:
+            waktu, id_deteksi = decode_cursor(cursor)
+            query = query.filter(db.or_(
+                Deteksi.waktu < waktu,
+                db.and_(Deteksi.waktu == waktu, Deteksi.id_deteksi < id_deteksi)
+            ))
+    except (ValueError, TypeError):
+        return jsonify({"error": "Parameter tidak valid"}), 400
+
+    rows = (query.order_by(Deteksi.waktu.desc(), Deteksi.id_deteksi.desc())
+                 .limit(limit + 1)
+                 .all())
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    # dekripsi hanya untuk baris di halaman ini
+    data = [{
+        "id_deteksi": d.id_deteksi,
+        "waktu": d.waktu.isoformat() if d.waktu else None,
+        "id_cctv": d.id_cctv,
+        "id_karung": d.id_karung,
+        "total_karung": d.total_karung,
+        "jumlah_sampel": d.jumlah_sampel,
+        "min_karung": d.min_karung,
+        "max_karung": d.max_karung,
+        "rata_karung": d.rata_karung,
+        "data_terdekripsi": decrypt_deteksi(d)
+    } for d in rows]
+
+    next_cursor = encode_cursor(rows[-1].waktu, rows[-1].id_deteksi) if has_more and rows else None
+    return jsonify({"data": data, "next_cursor": next_cursor})
+
+
+
+@app.route("/api/rekap")
+def api_rekap():
+    """
+    Rekap deteksi per jam/hari dari tabel rekap (bukan scan tabel deteksi).
+    Query string: periode (jam|hari), id_cctv, id_gudang, dari, sampai (ISO 8601).
+    """
+    if "user_id" not in session:
+        return jsonify({"error": "Unauthorized"}), 403
+    user = get_user(session["user_id"])
+    if user is None:
+        return jsonify({"error": "Unauthorized"}), 403
+
+    model = RekapHarian if request.args.get("periode", "jam") == "hari" else RekapJam
+    try:
+        query = model.query
+        if user.role != "admin":
+            query = query.filter(model.id_gudang.in_([g.id_gudang for g in user.gudang]))
+        if request.args.get("id_cctv"):
+            query = query.filter(model.id_cctv == int(request.args["id_cctv"]))
+        if request.args.get("id_gudang"):
+            query = query.filter(model.id_gudang == int(request.args["id_gudang"]))
+        if request.args.get("dari"):
+            query = query.filter(model.periode >= datetime.fromisoformat(request.args["dari"]))
+        if request.args.get("sampai"):
+            query = query.filter(model.periode < datetime.fromisoformat(request.args["sampai"]))
+    except ValueError:
+        return jsonify({"error": "Parameter tidak valid"}), 400
+
+    rows = query.order_by(model.periode.desc()).limit(5000).all()
+    return jsonify([{
+        "periode": r.periode.isoformat(),
+        "id_cctv": r.id_cctv,
+        "id_gudang": r.id_gudang,
+        "id_karung": r.id_karung or None,
+        "jumlah_sampel": r.jumlah_sampel,
+        "rata_karung": round(r.jumlah_total / r.jumlah_sampel, 2) if r.jumlah_sampel else None,
+        "min_karung": r.min_karung,
+        "max_karung": r.max_karung,
+        "total_terakhir": r.total_terakhir
+    } for r in rows])
+
 
 @app.route("/about")
 def about():
@@ -278,7 +946,7 @@ def profile():
     if "user_id" not in session:
         flash("Silakan login dulu", "warning")
         return redirect(url_for("login"))
-    user = User.query.get(session["user_id"])
+    user = get_user(session["user_id"])
     return render_template("profile.html", user=user)
 
 
@@ -328,7 +996,7 @@ def register_cctv():
     if "user_id" not in session:
         return jsonify({"error": "Unauthorized"}), 403
 
-    user = User.query.get(session["user_id"])
+    user = get_user(session["user_id"])
     data = request.json
     nama_cctv = data.get("nama_cctv")
     id_gudang = data.get("id_gudang")
@@ -339,7 +1007,7 @@ def register_cctv():
 
     # jika operator, pastikan id_gudang milik user tersebut
     if user.role == "operator":
-        gudang_operator = Gudang.query.filter_by(id_user=user.id_user).first()
+        gudang_operator = user.gudang[0] if user.gudang else None
         if not gudang_operator or gudang_operator.id_gudang != int(id_gudang):
             return jsonify({"error": "Anda tidak memiliki izin menambah CCTV di gudang ini"}), 403
 
@@ -352,35 +1020,175 @@ def register_cctv():
     db.session.add(new_cctv)
     db.session.commit()
 
+    if Config.CAPTURE_ENABLED and ip_address:
+        capture_pool.add(new_cctv.id_cctv, ip_address)
+
     return jsonify({"status": "created", "id_cctv": new_cctv.id_cctv})
 
 
+def parse_count(value):
+    """Bilangan bulat >= 0 dari JSON (int atau string angka); ValueError bila tidak"""
+    if isinstance(value, bool) or isinstance(value, float) and not value.is_integer():
+        raise ValueError(value)
+    count = int(value)
+    if count < 0:
+        raise ValueError(value)
+    return count
+
+
 @app.route("/save_detection", methods=["POST"])
 def save_detection():
     if "user_id" not in session:
         return jsonify({"error": "Unauthorized"}), 403
 
-    data = request.json
+    data = request.get_json(silent=True) or {}
     id_cctv = data.get("id_cctv")
     total_karung = data.get("total_karung")
     hasil_deteksi = data.get("hasil_deteksi", {})
 
-    if not id_cctv or not total_karung:
+    if not id_cctv or total_karung in (None, ""):
         return jsonify({"error": "Incomplete data"}), 400
+    # baris rusak di antrian akan menggagalkan bulk insert satu batch
+    try:
+        id_cctv = int(id_cctv)
+        total_karung = parse_count(total_karung)
+    except (TypeError, ValueError):
+        return jsonify({"error": "id_cctv dan total_karung harus bilangan bulat >= 0"}), 400
 
-    encrypted_data = fernet.encrypt(str(hasil_deteksi).encode())
+    cctv = get_cctv(id_cctv)
+    if not cctv:
+        return jsonify({"error": "CCTV tidak ditemukan"}), 404
 
-    deteksi = Deteksi(
-        waktu=datetime.now(WIB),
-        id_cctv=id_cctv,
-        id_karung=None,
+    id_kunci, encrypted_data = keyring.encrypt(key_scope(cctv), str(hasil_deteksi).encode())
+
+    queued = deteksi_writer.put(new_deteksi_row(
+        id_cctv=cctv.id_cctv,
         total_karung=total_karung,
-        data_encrypted=encrypted_data
+        data_encrypted=encrypted_data,
+        id_kunci=id_kunci
+    ))
+    if not queued:
+        drops_total.inc("queue_full")
+        return jsonify({"error": "Antrian penyimpanan penuh, coba lagi"}), 503
+
+    saves_total.inc(cctv.id_cctv)
+    return jsonify({"status": "queued"}), 202
+
+
+@app.route("/stream/<int:id_cctv>")
+def stream(id_cctv):
+    """MJPEG hasil deteksi satu CCTV; inferensi + encode sekali untuk semua viewer"""
+    if "user_id" not in session:
+        return jsonify({"error": "Unauthorized"}), 403
+
+    user = get_user(session["user_id"])
+    cctv = get_cctv(id_cctv)
+    if not cctv:
+        return jsonify({"error": "CCTV tidak ditemukan"}), 404
+    if user.role == "operator" and cctv.id_user != user.id_user:
+        return jsonify({"error": "Anda tidak memiliki izin melihat CCTV ini"}), 403
+
+    pair = capture_pool.get(id_cctv)
+    if pair is None and Config.CAPTURE_ENABLED and cctv.ip_address:
+        # buka kamera saat viewer pertama datang
+        capture_pool.add(id_cctv, cctv.ip_address)
+        pair = capture_pool.get(id_cctv)
+    if pair is None:
+        return jsonify({"error": "CCTV tidak punya stream server-side"}), 404
+
+    reader, worker = pair
+    return Response(
+        worker.broadcaster.stream(),
+        mimetype=f"multipart/x-mixed-replace; boundary={STREAM_BOUNDARY}"
     )
-    db.session.add(deteksi)
+
+
+@app.route("/db_writer/status")
+@role_required("admin")
+def db_writer_status():
+    return jsonify({"writer": deteksi_writer.stats(), "aggregator": count_aggregator.stats()})
+
+
+@app.route("/cache/status")
+@role_required("admin")
+def cache_status():
+    return jsonify({
+        "keyring": keyring.stats(),
+        "user": user_cache.stats(),
+        "cctv": cctv_cache.stats(),
+        "karung": karung_cache.stats()
+    })
+
+
+@app.route("/scene_gate/status")
+@role_required("admin")
+def scene_gate_status():
+    return jsonify({
+        "mailbox": frame_mailbox.stats(),
+        "detect_api": {"gate": scene_gate.stats(), "tracker": box_tracker.stats()},
+        "capture": {"gate": capture_gate.stats(), "tracker": capture_tracker.stats()}
+    })
+
+
+@app.route("/scheduler/status")
+@role_required("admin")
+def scheduler_status():
+    """Laju tercapai vs laju datang per CCTV/gudang beserta bobotnya"""
+    return jsonify(frame_mailbox.stats())
+
+
+@app.route("/scheduler/cctv/<int:id_cctv>", methods=["POST"])
+@role_required("admin")
+def scheduler_set_cctv(id_cctv):
+    cctv = db.session.get(CCTV, id_cctv)
+    if cctv is None:
+        return jsonify({"error": "CCTV tidak ditemukan"}), 404
+    data = request.get_json(silent=True) or {}
+    try:
+        if "bobot" in data:
+            cctv.bobot = parse_weight(data["bobot"])
+        if "min_fps" in data:
+            cctv.min_fps = max(0.0, float(data["min_fps"]))
+    except (TypeError, ValueError):
+        return jsonify({"error": "bobot harus > 0 dan min_fps >= 0"}), 400
+    db.session.commit()
+    return jsonify({"id_cctv": cctv.id_cctv, "bobot": cctv.bobot, "min_fps": cctv.min_fps})
+
+
+@app.route("/scheduler/gudang/<int:id_gudang>", methods=["POST"])
+@role_required("admin")
+def scheduler_set_gudang(id_gudang):
+    gudang = db.session.get(Gudang, id_gudang)
+    if gudang is None:
+        return jsonify({"error": "Gudang tidak ditemukan"}), 404
+    data = request.get_json(silent=True) or {}
+    try:
+        gudang.bobot = parse_weight(data.get("bobot"))
+    except (TypeError, ValueError):
+        return jsonify({"error": "bobot harus > 0"}), 400
     db.session.commit()
+    return jsonify({"id_gudang": gudang.id_gudang, "bobot": gudang.bobot})
+
+
+def parse_weight(value):
+    weight = float(value)
+    if not weight > 0:
+        raise ValueError(value)
+    return weight
+
+
+@app.route("/capture/status")
+@role_required("admin")
+def capture_status():
+    return jsonify(capture_pool.stats())
+
 
-    return jsonify({"status": "ok", "id_deteksi": deteksi.id_deteksi})
+@app.route("/metrics")
+def metrics_endpoint():
+    """Prometheus text format; bila METRICS_TOKEN diisi, wajib header Authorization: Bearer"""
+    if Config.METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {Config.METRICS_TOKEN}":
+        return jsonify({"error": "Unauthorized"}), 401
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
 
 @app.route("/toggle_db", methods=["POST"])
@@ -391,70 +1199,222 @@ def toggle_db():
     return jsonify({"status": "ok", "save_to_db": SAVE_TO_DB})
 
 
+def new_deteksi_row(**kolom):
+    """Dict satu baris deteksi; semua kolom selalu ada supaya bisa di-bulk insert"""
+    row = {
+        "waktu": datetime.now(WIB),
+        "id_cctv": None,
+        "id_karung": None,
+        "total_karung": 0,
+        "data_encrypted": None,
+        "encrypted_dek": None,
+        "id_kunci": None,
+        "jumlah_sampel": None,
+        "min_karung": None,
+        "max_karung": None,
+        "rata_karung": None,
+        "jendela": None
+    }
+    row.update(kolom)
+    return row
+
+
+def save_detection_counts(id_cctv, counts, summary=None):
+    """
+    Simpan satu hasil deteksi (counts dict) ke tabel deteksi, butuh app context.
+    summary (WindowSummary) mengisi kolom ringkasan jendela agregasi.
+    """
+    cctv = get_cctv(id_cctv)
+    if not cctv:
+        return False
+
+    total_count = sum(counts.values())
+    object_name = list(counts.keys())[0] if counts else "none"
+
+    # cek atau buat karung (lewat cache)
+    id_karung = get_karung_id(object_name)
+
+    # ============================
+    # Envelope Encryption
+    # ============================
+    # DEK aktif per CCTV/gudang (sudah terbuka di cache) => satu operasi Fernet per baris
+    start = time.perf_counter()
+    id_kunci, encrypted_data = keyring.encrypt(key_scope(cctv), str(counts).encode())
+    stage_seconds.observe(time.perf_counter() - start, "encrypt", id_cctv)
+
+    # ============================
+    # Simpan ke DB
+    # ============================
+    row = new_deteksi_row(
+        id_cctv=id_cctv,
+        id_karung=id_karung,
+        total_karung=total_count,
+        data_encrypted=encrypted_data,
+        id_kunci=id_kunci
+    )
+    if summary is not None:
+        row.update({
+            "waktu": datetime.fromtimestamp(summary.end, WIB),
+            "jumlah_sampel": summary.samples,
+            "min_karung": summary.min_count,
+            "max_karung": summary.max_count,
+            "rata_karung": round(summary.mean_count, 2),
+            "jendela": datetime.fromtimestamp(summary.start, WIB)
+        })
+
+    # ditulis bulk oleh thread write-behind, request tidak menunggu commit
+    if not deteksi_writer.put(row):
+        drops_total.inc("queue_full")
+        return False
+    saves_total.inc(id_cctv)
+    return True
+
+
+def wants_geometry():
+    """
+    Tentukan mode respons /detect_api.
+    form field `format=json` atau header `Accept: application/json`
+    => kirim geometri box (JSON), bukan JPEG hasil anotasi.
+    """
+    fmt = (request.form.get("format") or "").lower()
+    if fmt:
+        return fmt == "json"
+    best = request.accept_mimetypes.best_match(["image/jpeg", "application/json"])
+    return best == "application/json"
+
+
+@app.route("/detect_api/config")
+def detect_api_config():
+    """Ukuran input model + kualitas JPEG yang disarankan untuk upload dari browser"""
+    return jsonify({
+        "imgsz": Config.DETECTOR_IMGSZ,
+        "max_side": Config.DETECTOR_IMGSZ,
+        "jpeg_quality": Config.UPLOAD_JPEG_QUALITY,
+    })
+
+
+def process_frame(file, id_cctv, geometry_only, saved, transport="http"):
+    """
+    decode -> gerbang/tracking/inferensi -> agregasi -> encode untuk satu frame.
+    Dipakai POST /detect_api dan WebSocket /ws/detect.
+    Return SimpleNamespace (body = JSON str atau JPEG bytes), None bila frame tidak bisa di-decode.
+    """
+    label = cctv_label(id_cctv)
+    frames_total.inc(label, "json" if geometry_only else "jpeg")
+    timer = StageTimer(stage_seconds, label)
+    try:
+        with timer.stage("decode"):
+            # mode JSON: upload besar langsung di-decode di resolusi 1/2..1/8 (YOLO toh
+            # mengecilkannya, box dikembalikan ke ukuran asli). Mode JPEG menggambar box
+            # di frame, jadi di-decode penuh supaya respons tetap seukuran upload.
+            target_side = Config.DECODE_TARGET_SIDE if geometry_only else None
+            frame, upload_size = decode_frame(file, target_side)
+        if frame is None:
+            errors_total.inc("decode")
+            return None
+
+        # adegan statis => pakai ulang box terakhir CCTV ini tanpa memanggil YOLO
+        detections = None
+        if scene_gate.enabled:
+            with timer.stage("gate"):
+                detections, thumb = scene_gate.check(id_cctv, frame)
+        # mode deteksi setiap N frame: di antaranya box digeser dengan optical flow
+        if detections is None and box_tracker.enabled:
+            with timer.stage("track"):
+                detections = box_tracker.propagate(id_cctv, frame)
+            source = "tracked"
+        else:
+            source = "cached"
+        inferred = detections is None
+        if inferred:
+            with timer.stage("infer"):
+                detections = detector.predict(frame)
+            if scene_gate.enabled:
+                scene_gate.update(id_cctv, thumb, frame.shape, detections)
+            if box_tracker.enabled:
+                box_tracker.reset(id_cctv, frame, detections)
+            source = "run"
+        counts = detections.counts
+        total_count = sum(counts.values())
+
+        # semua frame masuk agregasi; DB hanya menerima ringkasan per jendela per CCTV
+        if saved:
+            with timer.stage("aggregate"):
+                count_aggregator.add(id_cctv, counts)
+
+        if geometry_only:
+            # box dikembalikan ke koordinat upload asli supaya pas dengan snapshot di browser
+            with timer.stage("encode"):
+                body = json.dumps(detections.rescale(upload_size).to_dict())
+        else:
+            with timer.stage("annotate"):
+                annotated_frame = detector.annotate(frame, detections)
+            # Encode annotated frame sebagai JPEG
+            with timer.stage("encode"):
+                ok, buffer = cv2.imencode(".jpg", annotated_frame)
+                body = buffer.tobytes()
+    except Exception:
+        errors_total.inc(timer.current or "request")
+        raise
+
+    if frame_tracer.enabled:
+        width, height = upload_size
+        frame_tracer.record({
+            "ts": round(time.time(), 3),
+            "id_cctv": id_cctv,
+            "width": width,
+            "height": height,
+            "decoded_width": frame.shape[1],
+            "decoded_height": frame.shape[0],
+            "bytes": len(file),
+            "boxes": len(detections),
+            "inferred": inferred,
+            "source": source,
+            "mode": "json" if geometry_only else "jpeg",
+            "transport": transport,
+            "stages": timer.stages_ms(),
+            "total_ms": round(timer.total_ms(), 3),
+            "saved": bool(saved),
+        })
+    return SimpleNamespace(body=body, count=total_count, source=source, timer=timer)
+
+
 @app.route("/detect_api", methods=["POST"])
 def detect_api():
-    global last_saved_time
     try:
         if "frame" not in request.files:
             return jsonify({"error": "No frame uploaded"}), 400
 
-        file = request.files["frame"].read()
-        npimg = np.frombuffer(file, np.uint8)
-        frame = cv2.imdecode(npimg, cv2.IMREAD_COLOR)
-
         id_cctv = request.form.get("id_cctv")
         if not id_cctv:
             return jsonify({"error": "id_cctv not provided"}), 400
         id_cctv = int(id_cctv)
 
-        annotated_frame, counts = detector.detect(frame)
-        total_count = sum(counts.values())
-        object_name = list(counts.keys())[0] if counts else "none"
-        current_time = time.time()
-
-        if SAVE_TO_DB and "user_id" in session and current_time - last_saved_time >= 10:
-            cctv = CCTV.query.get(id_cctv)
-            if cctv:
-                # cek atau buat karung
-                karung = Karung.query.filter_by(nama_karung=object_name).first()
-                if not karung:
-                    karung = Karung(nama_karung=object_name)
-                    db.session.add(karung)
-                    db.session.commit()
-
-                # ============================
-                # Envelope Encryption
-                # ============================
-                # 1. Generate DEK (data encryption key) per deteksi
-                dek = Fernet.generate_key()
-                f_dek = Fernet(dek)
-
-                # 2. Encrypt data (counts dict)
-                encrypted_data = f_dek.encrypt(str(counts).encode())
-
-                # 3. Encrypt DEK dengan master key
-                f_master = Fernet(ENCRYPTION_KEY)
-                encrypted_dek = f_master.encrypt(dek)
-
-                # ============================
-                # Simpan ke DB
-                # ============================
-                new_deteksi = Deteksi(
-                    waktu=datetime.now(WIB),
-                    id_cctv=id_cctv,
-                    id_karung=karung.id_karung,
-                    total_karung=total_count,
-                    data_encrypted=encrypted_data,
-                    encrypted_dek=encrypted_dek
-                )
-                db.session.add(new_deteksi)
-                db.session.commit()
-                last_saved_time = current_time
+        # Mode geometri: lewati anotasi + JPEG, kirim box saja
+        geometry_only = wants_geometry()
+        saved = SAVE_TO_DB and "user_id" in session
+        file = request.files["frame"].read()
 
-        # Encode annotated frame sebagai JPEG
-        ok, buffer = cv2.imencode(".jpg", annotated_frame)
-        response = Response(buffer.tobytes(), mimetype="image/jpeg")
-        response.headers["X-Count"] = str(total_count)
+        ticket = admit_frame(id_cctv)
+        if not ticket.admitted:
+            return busy_response(*busy_payload(ticket))
+        start = time.perf_counter()
+        try:
+            result = process_frame(file, id_cctv, geometry_only, saved)
+        except InferenceUnavailable as e:
+            # worker inferensi mati / macet: sama seperti server penuh
+            drops_total.inc("inference_unavailable")
+            return busy_response(*unavailable_payload(e))
+        finally:
+            frame_mailbox.release(ticket, time.perf_counter() - start)
+        if result is None:
+            return jsonify({"error": "Frame tidak bisa di-decode"}), 400
+
+        mimetype = "application/json" if geometry_only else "image/jpeg"
+        response = Response(result.body, mimetype=mimetype)
+        response.headers["X-Count"] = str(result.count)
+        response.headers["X-Inference"] = result.source
+        response.headers["Server-Timing"] = result.timer.server_timing()
         return response
 
     except Exception as e:
@@ -462,8 +1422,189 @@ def detect_api():
         return jsonify({"error": str(e)}), 500
 
 
+@sock.route("/ws/detect")
+def detect_ws(ws):
+    """
+    Kanal WebSocket per halaman kamera (pengganti POST per frame).
+
+    client -> {"type": "hello", "id_cctv": 3, "format": "json"|"jpeg"}   (teks, boleh diulang)
+    server -> {"type": "ready", ...}
+    client -> frame JPEG (biner), hanya satu yang boleh menunggu hasil
+    server -> {"type": "result", "seq", "count", "source", "timing", "result"}  (teks)
+              + JPEG anotasi (biner) bila format "jpeg"
+    server -> {"type": "error", "seq", "error"} juga dihitung sebagai ack
+    server -> {"type": "busy", "seq", "retry_after_ms"} frame dibuang (server penuh);
+              ack, tapi client menunggu retry_after_ms sebelum frame berikutnya
+
+    Client baru boleh mengirim frame berikutnya setelah menerima ack
+    (result/error), jadi frame tidak pernah menumpuk di server.
+    """
+    if "user_id" not in session:
+        ws.send(json.dumps({"type": "error", "error": "Unauthorized"}))
+        return
+
+    id_cctv, geometry_only, seq = None, True, 0
+    while True:
+        message = ws.receive()
+        if isinstance(message, str):
+            try:
+                data = json.loads(message)
+                if not isinstance(data, dict):
+                    raise ValueError(message)
+            except ValueError:
+                ws.send(json.dumps({"type": "error", "error": "Pesan tidak valid"}))
+                continue
+            if data.get("type") == "hello":
+                try:
+                    id_cctv = int(data["id_cctv"]) if data.get("id_cctv") else None
+                except (TypeError, ValueError):
+                    id_cctv = None
+                    ws.send(json.dumps({"type": "error", "error": "id_cctv tidak valid"}))
+                    continue
+                geometry_only = (data.get("format") or "json").lower() == "json"
+                ws.send(json.dumps({
+                    "type": "ready",
+                    "id_cctv": id_cctv,
+                    "max_side": Config.DETECTOR_IMGSZ,
+                    "jpeg_quality": Config.UPLOAD_JPEG_QUALITY,
+                }))
+            continue
+
+        seq += 1
+        if id_cctv is None:
+            ws.send(json.dumps({"type": "error", "seq": seq, "error": "id_cctv not provided"}))
+            continue
+        ticket = admit_frame(id_cctv)
+        if not ticket.admitted:
+            payload, _ = busy_payload(ticket)
+            ws.send(json.dumps({"type": "busy", "seq": seq, **payload}))
+            continue
+        start = time.perf_counter()
+        try:
+            saved = SAVE_TO_DB and "user_id" in session
+            result = process_frame(message, id_cctv, geometry_only, saved, transport="ws")
+        except InferenceUnavailable as e:
+            drops_total.inc("inference_unavailable")
+            payload, _ = unavailable_payload(e)
+            ws.send(json.dumps({"type": "busy", "seq": seq, **payload}))
+            continue
+        except Exception as e:
+            traceback.print_exc()
+            ws.send(json.dumps({"type": "error", "seq": seq, "error": str(e)}))
+            continue
+        finally:
+            frame_mailbox.release(ticket, time.perf_counter() - start)
+        if result is None:
+            ws.send(json.dumps({"type": "error", "seq": seq, "error": "Frame tidak bisa di-decode"}))
+            continue
+
+        header = {
+            "type": "result",
+            "seq": seq,
+            "count": result.count,
+            "source": result.source,
+            "timing": result.timer.stages_ms(),
+        }
+        if geometry_only:
+            # body sudah berupa JSON, cukup disisipkan tanpa encode ulang
+            ws.send(json.dumps(header)[:-1] + ', "result": ' + result.body + "}")
+        else:
+            ws.send(json.dumps(header))
+            ws.send(result.body)
+
+
+# ======================
+# PRODUCTION SERVING (gunicorn, lihat gunicorn.conf.py)
+# ======================
+# preload_app: app + model dimuat & dipanaskan sekali di master, lalu worker
+# di-fork dan berbagi halaman weights secara copy-on-write
+serving = {"role": "dev", "startup_seconds": None, "forked_at": None}
+_capture_lock = None
+
+
+def warmup_detector(runs=2):
+    """Inferensi frame kosong supaya lazy init torch/ultralytics terjadi sebelum request pertama"""
+    inner = getattr(detector, "detector", detector)   # lewati thread BatchingDetector
+    if not isinstance(inner, ObjectDetector):
+        return 0.0   # ProcessPoolDetector: model ada di proses inferensi, bukan di web worker
+    frame = np.zeros((Config.DETECTOR_IMGSZ, Config.DETECTOR_IMGSZ, 3), dtype=np.uint8)
+    start = time.perf_counter()
+    for _ in range(max(1, runs)):
+        inner.predict(frame)
+    return time.perf_counter() - start
+
+
+def prepare_fork():
+    """Dipanggil sekali di master sebelum fork worker pertama; kembalikan baris laporan"""
+    import torch
+    # thread pool OpenMP yang sudah aktif tidak aman di-fork: panaskan dengan 1 thread
+    torch.set_num_threads(1)
+    seconds = warmup_detector()
+    # koneksi DB milik master tidak boleh dipakai bersama oleh worker
+    with app.app_context():
+        db.engine.dispose()
+    # objek hasil import/load dipindah ke generasi permanen: GC worker tidak
+    # menyentuh refcount/header-nya, jadi halaman tetap dibagi
+    gc.collect()
+    gc.freeze()
+    serving["role"] = "master"
+    mem = memory_info()
+    return (f"[SERVE] master pid={os.getpid()} warmup {seconds:.2f}s "
+            f"rss={format_mb(mem.get('rss'))}MB, {gc.get_freeze_count()} objek dibekukan")
+
+
+def after_fork(torch_threads, forked_at):
+    """Dipanggil di worker setelah fork; forked_at = perf_counter() sebelum app diimport"""
+    serving["role"] = "worker"
+    serving["forked_at"] = forked_at
+    # pool koneksi warisan master dibuang tanpa menutup socket milik proses lain
+    with app.app_context():
+        db.engine.dispose(close=False)
+    if isinstance(getattr(detector, "detector", detector), ObjectDetector):
+        import torch
+        torch.set_num_threads(max(1, torch_threads))
+
+
+def worker_ready(preloaded):
+    """Worker siap menerima request: catat waktu startup + memori, kembalikan baris laporan"""
+    if not preloaded:
+        warmup_detector()
+    serving["startup_seconds"] = time.perf_counter() - serving["forked_at"]
+    # kamera IP cukup dibuka oleh satu worker; worker pengganti mengambil alih lock
+    if Config.CAPTURE_ENABLED and acquire_capture_lock():
+        start_capture_pool()
+    mem = memory_info()
+    return (f"[SERVE] worker pid={os.getpid()} siap dalam {serving['startup_seconds']:.2f}s "
+            f"rss={format_mb(mem.get('rss'))}MB pss={format_mb(mem.get('pss'))}MB "
+            f"private={format_mb(mem.get('private'))}MB shared={format_mb(mem.get('shared'))}MB")
+
+
+def acquire_capture_lock():
+    global _capture_lock
+    import fcntl
+    handle = open(Config.CAPTURE_LOCK_FILE, "a")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return False
+    _capture_lock = handle   # lock dilepas otomatis saat proses berhenti
+    return True
+
+
+metrics.callback(
+    "deteksi_process_memory_bytes", "Memori proses ini (rss, pss, private, shared)",
+    lambda: {(kind,): value for kind, value in memory_info().items()}, labelnames=("kind",))
+metrics.callback(
+    "deteksi_worker_startup_seconds", "Waktu dari fork sampai worker siap",
+    lambda: serving["startup_seconds"] if serving["startup_seconds"] is not None else {})
+
+
 # ======================
 # RUN SERVER
 # ======================
 if __name__ == "__main__":
+    # reloader debug menjalankan 2 proses; thread capture cukup di proses anak
+    if Config.CAPTURE_ENABLED and os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_capture_pool()
     app.run(debug=True)
@@ -0,0 +1,144 @@
+"""
+Parity + latency antar backend detector (torch / onnx / openvino).
+
+Frame diambil dari video rekaman, lalu setiap backend dibandingkan dengan
+torch sebagai acuan:
+  - counts per kelas harus sama
+  - setiap box harus punya pasangan (kelas sama) dengan selisih koordinat
+    <= --box-tol piksel dan selisih conf <= --conf-tol
+
+Script keluar dengan kode 1 bila ada backend yang tidak lolos parity atau
+tidak bisa dijalankan (mis. paket onnxruntime/openvino tidak terpasang).
+
+    python benchmarks/bench_backends.py --video runs/detect/predict/0.avi \\
+        --backends torch onnx openvino --frames 100 --report backend_report.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.detector import ObjectDetector, resolve_model
+
+
+def read_frames(video, limit):
+    cap = cv2.VideoCapture(video)
+    frames = []
+    while len(frames) < limit:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        sys.exit(f"Tidak ada frame yang bisa dibaca dari {video}")
+    return frames
+
+
+def boxes_match(ref, other, box_tol, conf_tol):
+    """Cocokkan box secara greedy per kelas; True bila semua box punya pasangan"""
+    if len(ref) != len(other):
+        return False
+    used = np.zeros(len(other), dtype=bool)
+    for box, conf, cls in zip(ref.xyxy, ref.confs, ref.class_ids):
+        candidates = np.where((other.class_ids == cls) & ~used)[0]
+        if candidates.size == 0:
+            return False
+        diff = np.abs(other.xyxy[candidates] - box).max(axis=1)
+        best = candidates[np.argmin(diff)]
+        if diff.min() > box_tol or abs(other.confs[best] - conf) > conf_tol:
+            return False
+        used[best] = True
+    return True
+
+
+def run_backend(model_path, backend, frames, warmup, imgsz):
+    path = resolve_model(model_path, backend, imgsz)
+    detector = ObjectDetector(path)
+    for frame in frames[:warmup]:
+        detector.predict(frame.copy())
+
+    results, latencies = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        results.append(detector.predict(frame.copy()))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return path, results, np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="models/best.pt")
+    parser.add_argument("--video", default="runs/detect/predict/0.avi")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "openvino"])
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--box-tol", type=float, default=3.0)
+    parser.add_argument("--conf-tol", type=float, default=0.05)
+    parser.add_argument("--report", help="simpan laporan JSON ke file ini")
+    args = parser.parse_args()
+
+    frames = read_frames(args.video, args.frames)
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+
+    reference = None
+    report = {"video": args.video, "frames": len(frames), "backends": {}}
+    failed = False
+    skipped = []
+
+    print(f"{'backend':<10} {'p50 ms':>8} {'p95 ms':>8} {'fps':>7} {'counts beda':>12} {'box beda':>9}")
+    for backend in backends:
+        try:
+            path, results, latencies = run_backend(args.model, backend, frames, args.warmup, args.imgsz)
+        except Exception as e:
+            print(f"{backend:<10} dilewati: {e}")
+            report["backends"][backend] = {"error": str(e)}
+            skipped.append(backend)
+            if backend == "torch":
+                # tanpa acuan torch parity backend lain tidak bisa dicek
+                break
+            continue
+
+        if reference is None:
+            reference = results
+        count_diff = sum(1 for r, o in zip(reference, results) if dict(r.counts) != dict(o.counts))
+        box_diff = sum(1 for r, o in zip(reference, results)
+                       if not boxes_match(r, o, args.box_tol, args.conf_tol))
+        failed = failed or count_diff > 0 or box_diff > 0
+
+        p50, p95 = np.percentile(latencies, [50, 95])
+        fps = 1000.0 / latencies.mean()
+        print(f"{backend:<10} {p50:>8.1f} {p95:>8.1f} {fps:>7.1f} {count_diff:>12} {box_diff:>9}")
+        report["backends"][backend] = {
+            "model_path": path,
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "mean_ms": round(float(latencies.mean()), 3),
+            "fps": round(float(fps), 2),
+            "frames_counts_mismatch": count_diff,
+            "frames_boxes_mismatch": box_diff,
+        }
+
+    report["skipped"] = skipped
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Laporan disimpan ke {args.report}")
+
+    if skipped:
+        print(f"❌ Backend tidak bisa dijalankan: {', '.join(skipped)}")
+    if failed:
+        print("❌ Parity gagal: ada backend yang hasilnya berbeda dari torch")
+    if skipped or failed:
+        sys.exit(1)
+    print("✅ Semua backend cocok dengan torch")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark post-processing ObjectDetector: loop per box (versi lama) vs
+jalur yang dipakai sekarang: Detections dari array NumPy (_to_detections)
+lalu Annotator.
+
+Box dibuat sintetis (tanpa inferensi) supaya jumlah box bisa diatur,
+lalu hasil kedua versi dibandingkan (counts + piksel frame harus sama).
+
+    python benchmarks/bench_postprocess.py --boxes 10 50 100 300 --repeat 50
+"""
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import torch
+from ultralytics.engine.results import Boxes
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.detector import ObjectDetector
+
+
+def legacy_process_result(detector, frame, result):
+    """Salinan implementasi lama (per box .cpu().numpy() / .item())"""
+    stable_counts = defaultdict(int)
+    for box in result.boxes:
+        xyxy = box.xyxy.cpu().numpy().squeeze().astype(int)
+        xmin, ymin, xmax, ymax = xyxy
+        conf = box.conf.item()
+        class_id = int(box.cls.item())
+        class_name = detector.labels[class_id]
+
+        if conf >= detector.conf_thresh:
+            color = detector.bbox_colors[class_id % len(detector.bbox_colors)]
+            cv2.rectangle(frame, (xmin, ymin), (xmax, ymax), color, 2)
+
+            label = f"{class_name}: {conf:.2f}"
+            (label_w, label_h), baseline = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+            cv2.rectangle(frame, (xmin, ymin - label_h - 10),
+                          (xmin + label_w, ymin), color, cv2.FILLED)
+            cv2.putText(frame, label, (xmin, ymin - 5),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0,0,0), 1)
+
+            stable_counts[class_name] += 1
+    return frame, stable_counts
+
+
+def synthetic_result(n_boxes, n_classes, width=1280, height=720, seed=0):
+    rng = np.random.default_rng(seed)
+    x1 = rng.uniform(0, width - 40, n_boxes)
+    y1 = rng.uniform(20, height - 40, n_boxes)
+    x2 = x1 + rng.uniform(10, 40, n_boxes)
+    y2 = y1 + rng.uniform(10, 40, n_boxes)
+    conf = rng.uniform(0.3, 1.0, n_boxes)
+    cls = rng.integers(0, n_classes, n_boxes)
+    data = np.stack([x1, y1, x2, y2, conf, cls], axis=1).astype(np.float32)
+    # urutkan berdasarkan conf seperti keluaran NMS YOLO
+    data = data[np.argsort(-data[:, 4])]
+    return SimpleNamespace(boxes=Boxes(torch.from_numpy(data), (height, width)), orig_shape=(height, width))
+
+
+def current_process_result(detector, frame, result):
+    """Jalur predict() + annotate() saat ini"""
+    detections = detector._to_detections(result)
+    return detector.annotate(frame, detections), detections.counts
+
+
+def time_it(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="models/best.pt")
+    parser.add_argument("--boxes", type=int, nargs="+", default=[10, 50, 100, 200, 400])
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    detector = ObjectDetector(args.model)
+    base = np.zeros((720, 1280, 3), dtype=np.uint8)
+
+    print(f"{'boxes':>6} {'lama (ms)':>10} {'vektor (ms)':>12} {'speedup':>8}")
+    for n in args.boxes:
+        result = synthetic_result(n, len(detector.labels))
+
+        frame_old, counts_old = legacy_process_result(detector, base.copy(), result)
+        frame_new, counts_new = current_process_result(detector, base.copy(), result)
+        if dict(counts_old) != dict(counts_new) or not np.array_equal(frame_old, frame_new):
+            print(f"❌ Hasil berbeda untuk {n} box")
+            sys.exit(1)
+
+        t_old = time_it(lambda: legacy_process_result(detector, base.copy(), result), args.repeat)
+        t_new = time_it(lambda: current_process_result(detector, base.copy(), result), args.repeat)
+        print(f"{n:>6} {t_old:>10.3f} {t_new:>12.3f} {t_old / t_new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Bandingkan serving gunicorn dengan dan tanpa preload model.
+
+Untuk tiap mode, gunicorn dijalankan dengan gunicorn.conf.py, ditunggu sampai
+semua worker melapor siap ("[SERVE] worker ..."), lalu memori master + worker
+dibaca dari /proc/<pid>/smaps_rollup. Dilaporkan:
+  - waktu dari start sampai semua worker siap, dan waktu startup per worker
+  - RSS, PSS, private (USS) & shared per worker
+  - total PSS semua proses = memori yang benar-benar terpakai
+
+Dengan preload, weights ada di halaman bersama: RSS per worker tetap besar
+tetapi PSS/private turun, dan worker siap tanpa memuat model.
+
+    python benchmarks/bench_preload.py --workers 4
+    python benchmarks/bench_preload.py --workers 2 --modes preload --json
+"""
+import argparse
+import json
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from utils.procmem import memory_info, children_of, format_mb
+
+READY = re.compile(r"\[SERVE\] worker pid=(\d+) siap dalam ([\d.]+)s")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def run_mode(preload, workers, timeout):
+    env = dict(os.environ,
+               WEB_PRELOAD="true" if preload else "false",
+               WEB_WORKERS=str(workers),
+               WEB_BIND=f"127.0.0.1:{free_port()}",
+               CAPTURE_ENABLED="false")
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+        cwd=ROOT, env=env, stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, text=True
+    )
+
+    ready, lines = {}, []
+    done = threading.Event()
+
+    def read_log():
+        for line in proc.stderr:
+            lines.append(line.rstrip())
+            match = READY.search(line)
+            if match:
+                ready[int(match.group(1))] = float(match.group(2))
+                if len(ready) >= workers:
+                    done.set()
+        done.set()
+
+    threading.Thread(target=read_log, daemon=True).start()
+    try:
+        if not done.wait(timeout) or len(ready) < workers:
+            tail = "\n".join(lines[-20:])
+            raise RuntimeError(f"gunicorn tidak siap dalam {timeout}s ({len(ready)}/{workers} worker)\n{tail}")
+        all_ready = time.perf_counter() - start
+
+        master = memory_info(proc.pid)
+        rows = []
+        for pid in children_of(proc.pid):
+            if pid in ready:
+                rows.append({"pid": pid, "startup_s": ready[pid], **memory_info(pid)})
+        total_pss = master.get("pss", 0) + sum(r.get("pss", 0) for r in rows)
+        return {
+            "mode": "preload" if preload else "tanpa preload",
+            "all_ready_s": round(all_ready, 2),
+            "master": master,
+            "workers": rows,
+            "total_pss": total_pss,
+        }
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def print_result(result):
+    print(f"\n{result['mode']}: semua worker siap dalam {result['all_ready_s']:.2f}s")
+    print(f"  {'proses':<16} {'startup':>8} {'rss':>9} {'pss':>9} {'private':>9} {'shared':>9}  (MB)")
+    master = result["master"]
+    print(f"  {'master':<16} {'':>8} {format_mb(master.get('rss')):>9} {format_mb(master.get('pss')):>9} "
+          f"{format_mb(master.get('private')):>9} {format_mb(master.get('shared')):>9}")
+    for row in result["workers"]:
+        print(f"  {'worker ' + str(row['pid']):<16} {row['startup_s']:>7.2f}s {format_mb(row.get('rss')):>9} "
+              f"{format_mb(row.get('pss')):>9} {format_mb(row.get('private')):>9} {format_mb(row.get('shared')):>9}")
+    print(f"  total PSS: {format_mb(result['total_pss'])} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memori & waktu startup worker gunicorn, preload vs tanpa preload")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--modes", nargs="+", choices=("preload", "nopreload"), default=["preload", "nopreload"])
+    parser.add_argument("--timeout", type=float, default=300, help="batas tunggu worker siap (detik)")
+    parser.add_argument("--json", dest="as_json", action="store_true", help="cetak hasil sebagai JSON")
+    args = parser.parse_args()
+
+    results = [run_mode(mode == "preload", args.workers, args.timeout) for mode in args.modes]
+    if args.as_json:
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        print_result(result)
+
+
+if __name__ == "__main__":
+    main()
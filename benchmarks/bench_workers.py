@@ -0,0 +1,135 @@
+"""
+Skala throughput ProcessPoolDetector terhadap jumlah worker (core).
+
+Untuk setiap jumlah worker, pool dijalankan dengan torch_threads=1 lalu
+sejumlah thread klien (default 2 per worker) mengirim frame terus-menerus
+selama --seconds detik. Dilaporkan per jumlah worker:
+  - frame/detik dan speedup terhadap 1 worker
+  - efisiensi = speedup / jumlah worker (1.0 = skala linear)
+  - latensi p50/p95 per frame (submit sampai hasil)
+
+Frame diambil dari video bila ada, selain itu frame sintetis acak.
+
+    python benchmarks/bench_workers.py --workers 1 2 4 8
+    python benchmarks/bench_workers.py --workers 1 2 --seconds 5 --json
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from utils.procmem import cpu_count
+from utils.worker_pool import ProcessPoolDetector
+
+
+def load_frames(video, limit, size):
+    frames = []
+    if video and os.path.exists(video):
+        cap = cv2.VideoCapture(video)
+        while len(frames) < limit:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frames.append(frame)
+        cap.release()
+    if not frames:
+        rng = np.random.default_rng(0)
+        width, height = size
+        frames = [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(limit)]
+    return frames
+
+
+def run(model, workers, clients, frames, seconds, warmup):
+    pool = ProcessPoolDetector(model, workers=workers, torch_threads=1)
+    try:
+        for frame in frames[:warmup * workers]:
+            pool.predict(frame)
+
+        latencies = []
+        lock = threading.Lock()
+        stop_at = time.perf_counter() + seconds
+
+        def client(offset):
+            local = []
+            i = offset
+            while time.perf_counter() < stop_at:
+                start = time.perf_counter()
+                pool.predict(frames[i % len(frames)])
+                local.append((time.perf_counter() - start) * 1000)
+                i += 1
+            with lock:
+                latencies.extend(local)
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        pool.stop()
+
+    latencies = np.array(latencies)
+    return {
+        "workers": workers,
+        "clients": clients,
+        "frames": int(latencies.size),
+        "fps": round(latencies.size / elapsed, 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 1),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="models/best.pt")
+    parser.add_argument("--video", default="runs/detect/predict/0.avi")
+    parser.add_argument("--workers", nargs="+", type=int, default=None,
+                        help="jumlah worker yang diuji (default 1, 2, 4, ... sampai jumlah core)")
+    parser.add_argument("--clients-per-worker", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--warmup", type=int, default=3, help="frame pemanasan per worker")
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--size", type=int, nargs=2, default=(1280, 720), metavar=("W", "H"),
+                        help="ukuran frame sintetis bila video tidak ada")
+    parser.add_argument("--json", dest="as_json", action="store_true", help="cetak hasil sebagai JSON")
+    args = parser.parse_args()
+
+    cores = cpu_count()
+    counts = args.workers
+    if not counts:
+        counts, n = [], 1
+        while n <= cores:
+            counts.append(n)
+            n *= 2
+    frames = load_frames(args.video, args.frames, args.size)
+
+    results = []
+    for workers in counts:
+        results.append(run(args.model, workers, workers * args.clients_per_worker,
+                           frames, args.seconds, args.warmup))
+    base = results[0]["fps"] / results[0]["workers"]
+    for row in results:
+        row["speedup"] = round(row["fps"] / results[0]["fps"], 2)
+        row["efisiensi"] = round(row["fps"] / (base * row["workers"]), 2) if base else 0.0
+
+    if args.as_json:
+        print(json.dumps({"cores": cores, "results": results}, indent=2))
+        return
+    print(f"core tersedia: {cores}")
+    print(f"{'worker':>6} {'klien':>6} {'frame':>7} {'fps':>8} {'speedup':>8} {'efisiensi':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for row in results:
+        print(f"{row['workers']:>6} {row['clients']:>6} {row['frames']:>7} {row['fps']:>8.2f} "
+              f"{row['speedup']:>7.2f}x {row['efisiensi']:>9.2f} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
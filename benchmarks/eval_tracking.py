@@ -0,0 +1,156 @@
+"""
+Evaluasi mode deteksi-setiap-N-frame + optical flow dibanding deteksi di setiap frame.
+
+Acuan: detector.predict() di setiap frame video. Untuk setiap N, frame kunci
+memakai hasil acuan yang sama (deterministik, jadi biaya CPU-nya diambil dari
+pengukuran acuan) dan frame di antaranya memakai BoxTracker. Dilaporkan:
+  - akurasi count: MAE total count, persentase frame dengan count sama persis
+  - recall box (IoU >= --iou) terhadap box acuan
+  - biaya: waktu CPU proses & wall-clock per frame, fraksi frame yang dideteksi
+
+    python benchmarks/eval_tracking.py --video runs/detect/predict/0.avi --every 2 3 5 10
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.detector import ObjectDetector, resolve_model
+from utils.tracking import BoxTracker
+
+
+def iou_matrix(a, b):
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)))
+    a = a[:, None, :].astype(np.float64)
+    b = b[None, :, :].astype(np.float64)
+    w = (np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0])).clip(0)
+    h = (np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1])).clip(0)
+    inter = w * h
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-9)
+
+
+def box_recall(ref, other, threshold):
+    """Fraksi box acuan yang punya pasangan (kelas sama, IoU >= threshold)"""
+    if len(ref) == 0:
+        return None
+    iou = iou_matrix(ref.xyxy, other.xyxy)
+    same = ref.class_ids[:, None] == other.class_ids[None, :]
+    return float(((iou >= threshold) & same).any(axis=1).mean())
+
+
+def run_reference(detector, frames, warmup):
+    for frame in frames[:warmup]:
+        detector.predict(frame)
+    results, cpu, wall = [], [], []
+    for frame in frames:
+        c0, w0 = time.process_time(), time.perf_counter()
+        results.append(detector.predict(frame))
+        cpu.append(time.process_time() - c0)
+        wall.append(time.perf_counter() - w0)
+    return results, np.array(cpu), np.array(wall)
+
+
+def run_tracked(every_n, frames, reference, ref_cpu, ref_wall, min_tracked):
+    tracker = BoxTracker(every_n=every_n, min_tracked=min_tracked)
+    results, cpu, wall, detected = [], [], [], 0
+    for i, frame in enumerate(frames):
+        c0, w0 = time.process_time(), time.perf_counter()
+        detections = tracker.propagate("video", frame)
+        if detections is None:
+            # frame kunci: hasil + biaya inferensi diambil dari acuan
+            detections = reference[i]
+            tracker.reset("video", frame, detections)
+            detected += 1
+            cpu.append(time.process_time() - c0 + ref_cpu[i])
+            wall.append(time.perf_counter() - w0 + ref_wall[i])
+        else:
+            cpu.append(time.process_time() - c0)
+            wall.append(time.perf_counter() - w0)
+        results.append(detections)
+    return results, np.array(cpu), np.array(wall), detected, tracker.stats()
+
+
+def accuracy(reference, results, iou):
+    ref_counts = np.array([sum(r.counts.values()) for r in reference])
+    counts = np.array([sum(r.counts.values()) for r in results])
+    recalls = [box_recall(r, o, iou) for r, o in zip(reference, results)]
+    recalls = [r for r in recalls if r is not None]
+    return {
+        "count_mae": round(float(np.abs(counts - ref_counts).mean()), 4),
+        "count_exact_pct": round(float((counts == ref_counts).mean() * 100), 2),
+        "box_recall": round(float(np.mean(recalls)), 4) if recalls else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="models/best.pt")
+    parser.add_argument("--backend", default="torch")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--video", default="runs/detect/predict/0.avi")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--every", nargs="+", type=int, default=[2, 3, 5, 10])
+    parser.add_argument("--min-tracked", type=float, default=0.5)
+    parser.add_argument("--iou", type=float, default=0.5)
+    parser.add_argument("--report", help="simpan laporan JSON ke file ini")
+    args = parser.parse_args()
+
+    cap = cv2.VideoCapture(args.video)
+    frames = []
+    while len(frames) < args.frames:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        sys.exit(f"Tidak ada frame yang bisa dibaca dari {args.video}")
+
+    detector = ObjectDetector(resolve_model(args.model, args.backend, args.imgsz))
+    reference, ref_cpu, ref_wall = run_reference(detector, frames, args.warmup)
+
+    report = {"video": args.video, "frames": len(frames), "backend": args.backend, "modes": {}}
+    report["modes"]["every_1"] = {
+        "cpu_ms_per_frame": round(ref_cpu.mean() * 1000, 3),
+        "wall_ms_per_frame": round(ref_wall.mean() * 1000, 3),
+        "detected_frames_pct": 100.0,
+        **accuracy(reference, reference, args.iou),
+    }
+    for n in args.every:
+        results, cpu, wall, detected, stats = run_tracked(
+            n, frames, reference, ref_cpu, ref_wall, args.min_tracked)
+        report["modes"][f"every_{n}"] = {
+            "cpu_ms_per_frame": round(cpu.mean() * 1000, 3),
+            "wall_ms_per_frame": round(wall.mean() * 1000, 3),
+            "detected_frames_pct": round(detected / len(frames) * 100, 2),
+            "detect_lost": stats["detect_lost"],
+            **accuracy(reference, results, args.iou),
+        }
+
+    base_cpu = report["modes"]["every_1"]["cpu_ms_per_frame"]
+    print(f"{len(frames)} frame dari {args.video}")
+    print(f"{'mode':<10} {'cpu ms':>8} {'wall ms':>8} {'hemat':>7} {'deteksi%':>9} "
+          f"{'MAE':>6} {'exact%':>7} {'recall':>7}")
+    for name, m in report["modes"].items():
+        saving = base_cpu / m["cpu_ms_per_frame"] if m["cpu_ms_per_frame"] else float("inf")
+        recall = "-" if m["box_recall"] is None else f"{m['box_recall']:.3f}"
+        print(f"{name:<10} {m['cpu_ms_per_frame']:>8.2f} {m['wall_ms_per_frame']:>8.2f} {saving:>6.1f}x "
+              f"{m['detected_frames_pct']:>9.1f} {m['count_mae']:>6.2f} {m['count_exact_pct']:>7.1f} {recall:>7}")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Laporan disimpan ke {args.report}")
+
+
+if __name__ == "__main__":
+    main()
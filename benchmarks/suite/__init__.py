@@ -0,0 +1,24 @@
+"""
+Benchmark suite detector, jalur request /detect_api, dan penulisan deteksi.
+
+    python -m benchmarks.suite --output hasil.json
+    python -m benchmarks.suite --output hasil.json --baseline benchmarks/baseline.json
+    python -m benchmarks.suite --save-baseline benchmarks/baseline.json
+
+Grup yang diukur:
+  stages      decode -> detect (predict) -> annotate -> imencode, per resolusi
+              dan kepadatan box, dengan frame sintetis
+  request     /detect_api end-to-end lewat Flask test client (jpeg & json)
+  persistence throughput insert Deteksi ke SQLite (per baris vs bulk write-behind)
+
+Semua berjalan offline dan hanya CPU: database SQLite sementara, model lokal
+models/best.pt, tanpa kamera dan tanpa jaringan.
+
+benchmarks/baseline.json adalah baseline referensi; mesin (cpu, cpu_count),
+backend, versi torch dan sidik model tercatat di "meta". Angka hanya
+sebanding di mesin & model yang sama: bila meta berbeda, perbandingan
+mencetak peringatan. Untuk CI, buat ulang baseline di runner-nya dengan
+--save-baseline lalu commit file itu. Di VM bersama (CPU dibagi tenant lain)
+selisih antar run dengan kode yang sama bisa 20-40%: pakai runner khusus,
+atau longgarkan --threshold/--p95-threshold.
+"""
@@ -0,0 +1,143 @@
+import argparse
+import hashlib
+import json
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+from cryptography.fernet import Fernet
+
+
+def prepare_env(db_path, backend):
+    """Harus sebelum import app/torch: CPU saja, SQLite sementara, tanpa jaringan"""
+    os.environ["CUDA_VISIBLE_DEVICES"] = ""
+    os.environ["YOLO_OFFLINE"] = "1"
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["DETECTOR_BACKEND"] = backend
+    # detector langsung di proses ini, tanpa menunggu micro-batch
+    os.environ["INFERENCE_WORKERS"] = "0"
+    os.environ["INFERENCE_BATCH_SIZE"] = "1"
+    os.environ["CAPTURE_ENABLED"] = "false"
+    # frame yang sama dikirim berulang: tanpa ini yang terukur cache gerbang adegan/tracking,
+    # bukan inferensi
+    os.environ["SCENE_CHANGE_THRESHOLD"] = "0"
+    os.environ["TRACK_EVERY_N"] = "1"
+    # kunci sementara: database benchmark dibuang, jangan tulis kunci baru ke .env
+    os.environ.setdefault("ENCRYPTION_KEY", Fernet.generate_key().decode())
+
+
+def cpu_model():
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or None
+
+
+def file_sha256(path):
+    """Sidik model (12 hex pertama) supaya baseline dari model lain terdeteksi"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()[:12]
+
+
+def versions():
+    info = {"python": platform.python_version(), "platform": platform.platform(),
+            "cpu": cpu_model(), "cpu_count": os.cpu_count()}
+    for module in ("numpy", "cv2", "torch", "ultralytics", "flask", "sqlalchemy"):
+        try:
+            info[module] = __import__(module).__version__
+        except Exception:
+            info[module] = None
+    return info
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite",
+                                     description="Benchmark detector, /detect_api dan penulisan deteksi")
+    parser.add_argument("--groups", nargs="+", default=["stages", "request", "persistence"],
+                        choices=["stages", "request", "persistence"])
+    parser.add_argument("--resolutions", nargs="+", default=["480p", "720p", "1080p"])
+    parser.add_argument("--densities", nargs="+", type=int, default=[0, 10, 50])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--backend", default="torch", help="torch | onnx | openvino")
+    parser.add_argument("--output", help="simpan hasil JSON ke file ini")
+    parser.add_argument("--baseline", help="bandingkan dengan hasil JSON ini")
+    parser.add_argument("--save-baseline", help="simpan hasil sebagai baseline baru")
+    parser.add_argument("--threshold", type=float, default=0.20, help="regresi relatif p50/mean/throughput")
+    parser.add_argument("--p95-threshold", type=float, default=0.35)
+    parser.add_argument("--min-delta-ms", type=float, default=0.5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_suite_")
+    prepare_env(os.path.join(workdir, "bench.db"), args.backend)
+    sys.path.insert(0, os.getcwd())
+
+    import app as app_module
+    from benchmarks.suite import baseline as baseline_mod
+    from benchmarks.suite.synthetic import RESOLUTIONS
+    from benchmarks.suite.stages import bench_stages
+    from benchmarks.suite.request_path import bench_detect_api, seed_cctv
+    from benchmarks.suite.persistence import bench_inserts
+
+    resolutions = {name: RESOLUTIONS[name] for name in args.resolutions}
+    with app_module.app.app_context():
+        app_module.db.create_all()
+
+    results = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "meta": {**versions(), "backend": args.backend, "model": app_module.MODEL_PATH,
+                 "model_sha256": file_sha256(app_module.MODEL_PATH), "repeat": args.repeat},
+        "metrics": {},
+    }
+    metrics = results["metrics"]
+
+    if "stages" in args.groups:
+        print("== stages: decode -> detect -> annotate -> imencode ==")
+        metrics.update(bench_stages(app_module.detector, resolutions, args.densities,
+                                    args.repeat, args.warmup))
+    if "request" in args.groups:
+        print("== request: /detect_api via Flask test client ==")
+        metrics.update(bench_detect_api(app_module, resolutions, repeat=args.repeat, warmup=args.warmup))
+    if "persistence" in args.groups:
+        print("== persistence: insert Deteksi ke SQLite ==")
+        _, id_cctv = seed_cctv(app_module)
+        metrics.update(bench_inserts(app_module, id_cctv))
+
+    # pastikan thread agregasi/write-behind selesai sebelum file DB dibuang
+    app_module.shutdown_pipeline()
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(results, f, indent=2)
+            print(f"Hasil disimpan ke {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            reference = json.load(f)
+        print(f"== dibandingkan dengan {args.baseline} ({reference.get('created')}) ==")
+        for key, old, new in baseline_mod.meta_mismatches(results, reference):
+            print(f"⚠️  {key} berbeda dari baseline: {old!r} -> {new!r}; "
+                  f"buat baseline di mesin ini dengan --save-baseline")
+        rows = baseline_mod.compare(results, reference, args.threshold, args.p95_threshold, args.min_delta_ms)
+        regressions = baseline_mod.report(rows)
+        if regressions:
+            print(f"❌ {len(regressions)} regresi melewati threshold")
+            sys.exit(1)
+        print("✅ Tidak ada regresi")
+
+
+if __name__ == "__main__":
+    main()
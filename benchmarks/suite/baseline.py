@@ -0,0 +1,50 @@
+"""
+Bandingkan hasil benchmark dengan baseline.
+
+Metrik *_ms: regresi bila naik lebih dari threshold (relatif) dan lebih dari
+min_delta_ms (absolut, supaya tahap sub-milidetik tidak berisik).
+Metrik rows_per_s: regresi bila turun lebih dari threshold.
+"""
+# angka hanya sebanding bila mesin, backend & model sama dengan baseline
+COMPARABLE_META = ("cpu", "cpu_count", "backend", "model_sha256", "torch")
+
+LOWER_IS_BETTER = ("p50_ms", "mean_ms", "p95_ms")
+HIGHER_IS_BETTER = ("rows_per_s",)
+
+
+def compare(results, baseline, threshold=0.20, p95_threshold=0.35, min_delta_ms=0.5):
+    """Return list dict {metric, field, baseline, current, change, regression}"""
+    rows = []
+    current, reference = results["metrics"], baseline["metrics"]
+    for name in sorted(set(current) & set(reference)):
+        for field in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            old, new = reference[name].get(field), current[name].get(field)
+            if old is None or new is None or old <= 0:
+                continue
+            change = (new - old) / old
+            if field in HIGHER_IS_BETTER:
+                regression = -change > threshold
+            else:
+                limit = p95_threshold if field == "p95_ms" else threshold
+                regression = change > limit and (new - old) > min_delta_ms
+            rows.append({"metric": name, "field": field, "baseline": old, "current": new,
+                         "change": round(change, 4), "regression": regression})
+    return rows
+
+
+def meta_mismatches(results, baseline):
+    """Return list (key, baseline, current) untuk meta yang berbeda"""
+    current, reference = results.get("meta", {}), baseline.get("meta", {})
+    return [(key, reference.get(key), current.get(key)) for key in COMPARABLE_META
+            if reference.get(key) != current.get(key)]
+
+
+def report(rows, log=print):
+    regressions = [r for r in rows if r["regression"]]
+    for r in rows:
+        if r["field"] not in ("p50_ms", "rows_per_s") and not r["regression"]:
+            continue
+        mark = "❌" if r["regression"] else "  "
+        log(f"{mark} {r['metric']:<40} {r['field']:<10} {r['baseline']:>10.2f} -> "
+            f"{r['current']:>10.2f} ({r['change'] * 100:+.1f}%)")
+    return regressions
@@ -0,0 +1,56 @@
+import time
+
+from benchmarks.suite.timing import summarize
+
+
+def _rows(app_module, id_cctv, n):
+    m = app_module
+    cctv = m.get_cctv(id_cctv)
+    id_karung = m.get_karung_id("karung")
+    rows = []
+    for i in range(n):
+        counts = {"karung": i % 40}
+        id_kunci, token = m.keyring.encrypt(m.key_scope(cctv), str(counts).encode())
+        rows.append(m.new_deteksi_row(id_cctv=id_cctv, id_karung=id_karung, total_karung=i % 40,
+                                      data_encrypted=token, id_kunci=id_kunci))
+    return rows
+
+
+def bench_inserts(app_module, id_cctv, single_rows=500, bulk_rows=5000, log=print):
+    """
+    Throughput insert Deteksi ke SQLite.
+      insert.single : satu commit per baris (pola sebelum write-behind)
+      insert.bulk   : flush_deteksi per DB_WRITE_BATCH_SIZE baris (+ upsert rekap)
+      insert.prepare: enkripsi + susun dict baris (biaya di jalur request)
+    """
+    m = app_module
+    metrics = {}
+    with m.app.app_context():
+        start = time.perf_counter()
+        rows = _rows(m, id_cctv, bulk_rows)
+        elapsed = time.perf_counter() - start
+        metrics["insert.prepare"] = {"n": bulk_rows, "rows_per_s": round(bulk_rows / elapsed, 1)}
+
+        samples = []
+        for row in rows[:single_rows]:
+            t0 = time.perf_counter()
+            m.db.session.add(m.Deteksi(**row))
+            m.db.session.commit()
+            samples.append((time.perf_counter() - t0) * 1000)
+        metrics["insert.single"] = summarize(samples)
+        metrics["insert.single"]["rows_per_s"] = round(1000 * len(samples) / sum(samples), 1)
+
+        batch_size = m.Config.DB_WRITE_BATCH_SIZE
+        samples = []
+        for i in range(0, bulk_rows, batch_size):
+            batch = rows[i:i + batch_size]
+            t0 = time.perf_counter()
+            m.flush_deteksi(batch)
+            samples.append((time.perf_counter() - t0) * 1000)
+        metrics["insert.bulk"] = summarize(samples)
+        metrics["insert.bulk"]["batch_size"] = batch_size
+        metrics["insert.bulk"]["rows_per_s"] = round(1000 * bulk_rows / sum(samples), 1)
+
+    for name in ("insert.prepare", "insert.single", "insert.bulk"):
+        log(f"  {name:<15} {metrics[name]['rows_per_s']:>10.1f} baris/detik")
+    return metrics
@@ -0,0 +1,65 @@
+import io
+
+import cv2
+
+from benchmarks.suite.synthetic import make_frame
+from benchmarks.suite.timing import time_call
+
+MODES = ("jpeg", "json")
+
+
+def seed_cctv(app_module):
+    """User + gudang + CCTV supaya jalur agregasi/penyimpanan ikut berjalan"""
+    m = app_module
+    with m.app.app_context():
+        cctv = m.CCTV.query.filter_by(nama_cctv="CCTV Bench").first()
+        if cctv:
+            return cctv.gudang.id_user, cctv.id_cctv
+        user = m.User(username="bench", role="admin")
+        user.set_password("bench")
+        m.db.session.add(user)
+        m.db.session.flush()
+        gudang = m.Gudang(nama_gudang="Gudang Bench", lokasi="-", kapasitas=1000, id_user=user.id_user)
+        m.db.session.add(gudang)
+        m.db.session.flush()
+        cctv = m.CCTV(nama_cctv="CCTV Bench", id_gudang=gudang.id_gudang)
+        m.db.session.add(cctv)
+        m.db.session.commit()
+        return user.id_user, cctv.id_cctv
+
+
+def bench_detect_api(app_module, resolutions, n_boxes=10, repeat=20, warmup=3, log=print):
+    """
+    /detect_api end-to-end lewat Flask test client dengan sesi login,
+    termasuk parsing multipart, decode, inferensi, respons, dan agregasi.
+    Metrik: request.detect_api.<mode>.<resolusi>
+    """
+    id_user, id_cctv = seed_cctv(app_module)
+    client = app_module.app.test_client()
+    with client.session_transaction() as sess:
+        sess["user_id"] = id_user
+        sess["role"] = "admin"
+
+    metrics = {}
+    for res_name, (width, height) in resolutions.items():
+        frame, _ = make_frame(width, height, n_boxes, seed=n_boxes)
+        ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        jpeg = jpeg.tobytes()
+
+        for mode in MODES:
+            def post(_):
+                response = client.post("/detect_api", data={
+                    "frame": (io.BytesIO(jpeg), "frame.jpg"),
+                    "id_cctv": str(id_cctv),
+                    "format": mode,
+                }, content_type="multipart/form-data")
+                if response.status_code != 200:
+                    raise RuntimeError(f"/detect_api {response.status_code}: {response.get_data(as_text=True)}")
+                return response
+
+            name = f"request.detect_api.{mode}.{res_name}"
+            metrics[name] = time_call(post, repeat, warmup)
+            metrics[name]["upload_bytes"] = len(jpeg)
+            log(f"  {mode:<5} {res_name:<6} {metrics[name]['p50_ms']:>8.2f} ms p50  "
+                f"{metrics[name]['p95_ms']:>8.2f} ms p95")
+    return metrics
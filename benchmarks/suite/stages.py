@@ -0,0 +1,38 @@
+import cv2
+import numpy as np
+
+from benchmarks.suite.synthetic import RESOLUTIONS, DENSITIES, make_frame, make_detections
+from benchmarks.suite.timing import time_call
+
+
+def bench_stages(detector, resolutions=RESOLUTIONS, densities=DENSITIES, repeat=20, warmup=3, log=print):
+    """
+    Ukur tiap tahap pipeline secara terpisah.
+    Metrik: stage.<tahap>.<resolusi>.b<jumlah box>
+    """
+    metrics = {}
+    for res_name, (width, height) in resolutions.items():
+        for n_boxes in densities:
+            frame, boxes = make_frame(width, height, n_boxes, seed=n_boxes)
+            ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+            jpeg = np.frombuffer(jpeg.tobytes(), np.uint8)
+            detections = make_detections(boxes, (width, height), detector.labels, seed=n_boxes)
+            annotated = detector.annotate(frame.copy(), detections)
+            found = len(detector.predict(frame.copy()))
+
+            suffix = f"{res_name}.b{n_boxes}"
+            metrics[f"stage.decode.{suffix}"] = time_call(
+                lambda _: cv2.imdecode(jpeg, cv2.IMREAD_COLOR), repeat, warmup)
+            metrics[f"stage.detect.{suffix}"] = time_call(
+                detector.predict, repeat, warmup, setup=frame.copy)
+            metrics[f"stage.annotate.{suffix}"] = time_call(
+                lambda f: detector.annotate(f, detections), repeat, warmup, setup=frame.copy)
+            metrics[f"stage.imencode.{suffix}"] = time_call(
+                lambda _: cv2.imencode(".jpg", annotated), repeat, warmup)
+            metrics[f"stage.detect.{suffix}"]["boxes_found"] = found
+
+            log(f"  {suffix:<12} decode {metrics[f'stage.decode.{suffix}']['p50_ms']:>7.2f}  "
+                f"detect {metrics[f'stage.detect.{suffix}']['p50_ms']:>7.2f}  "
+                f"annotate {metrics[f'stage.annotate.{suffix}']['p50_ms']:>6.2f}  "
+                f"imencode {metrics[f'stage.imencode.{suffix}']['p50_ms']:>6.2f} ms (p50)")
+    return metrics
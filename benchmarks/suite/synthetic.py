@@ -0,0 +1,50 @@
+import numpy as np
+
+from utils.detector import Detections, count_classes
+
+RESOLUTIONS = {
+    "480p": (640, 480),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+}
+DENSITIES = (0, 10, 50)
+
+SACK_COLORS = [(150, 190, 210), (120, 160, 180), (180, 200, 215), (90, 130, 160)]
+
+
+def make_boxes(width, height, n_boxes, rng):
+    """n box acak (x1, y1, x2, y2) berukuran seperti karung di frame CCTV"""
+    scale = min(width, height)
+    w = rng.integers(scale // 16, scale // 6, n_boxes)
+    h = (w * rng.uniform(0.5, 0.9, n_boxes)).astype(int)
+    x1 = rng.integers(0, width - w)
+    y1 = rng.integers(0, height - h)
+    return np.stack([x1, y1, x1 + w, y1 + h], axis=1).astype(int)
+
+
+def make_frame(width, height, n_boxes, seed=0):
+    """
+    Frame BGR sintetis: lantai gudang bertekstur + tumpukan karung.
+    Return (frame, boxes) supaya anotasi bisa memakai box yang sama.
+    """
+    rng = np.random.default_rng(seed)
+    frame = np.full((height, width, 3), (70, 75, 80), dtype=np.uint8)
+    noise = rng.integers(-20, 20, (height, width, 1), dtype=np.int16)
+    frame = np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+    boxes = make_boxes(width, height, n_boxes, rng) if n_boxes else np.empty((0, 4), dtype=int)
+    for i, (x1, y1, x2, y2) in enumerate(boxes):
+        frame[y1:y2, x1:x2] = SACK_COLORS[i % len(SACK_COLORS)]
+        # jahitan karung supaya tidak rata sempurna
+        frame[y1:y2:6, x1:x2] = (frame[y1:y2:6, x1:x2] * 0.8).astype(np.uint8)
+    return frame, boxes
+
+
+def make_detections(boxes, size, labels, seed=0):
+    """Detections sintetis dengan jumlah box terkontrol (untuk tahap annotate)"""
+    rng = np.random.default_rng(seed)
+    n = len(boxes)
+    class_ids = np.arange(n, dtype=int) % max(1, len(labels))
+    confs = rng.uniform(0.5, 0.99, n)
+    return Detections(np.asarray(boxes, dtype=int).reshape(-1, 4), confs, class_ids,
+                      count_classes(class_ids, labels), size, labels)
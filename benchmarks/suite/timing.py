@@ -0,0 +1,27 @@
+import time
+
+import numpy as np
+
+
+def summarize(samples_ms):
+    samples = np.asarray(samples_ms, dtype=np.float64)
+    p50, p95 = np.percentile(samples, [50, 95])
+    return {
+        "n": int(samples.size),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "mean_ms": round(float(samples.mean()), 4),
+    }
+
+
+def time_call(fn, repeat, warmup=0, setup=None):
+    """Jalankan fn(arg) `repeat` kali; setup() dipanggil di luar pengukuran"""
+    for _ in range(warmup):
+        fn(setup() if setup else None)
+    samples = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        fn(arg)
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
@@ -13,3 +13,116 @@ class Config:
     FLASK_ENV = os.getenv("FLASK_ENV", "production")
 
     ENCRYPTION_KEY = ensure_encryption_key()
+
+    # Rotasi DEK envelope encryption: per "cctv" atau "gudang",
+    # DEK baru setelah sekian detik atau sekian baris (mana yang lebih dulu)
+    DEK_SCOPE = os.getenv("DEK_SCOPE", "cctv")
+    DEK_ROTATE_SECONDS = float(os.getenv("DEK_ROTATE_SECONDS", "86400"))
+    DEK_ROTATE_ROWS = int(os.getenv("DEK_ROTATE_ROWS", "100000"))
+
+    # Backend model: torch | onnx | openvino
+    # (onnx/openvino diekspor sekali dari best.pt dan di-cache di folder models/)
+    DETECTOR_BACKEND = os.getenv("DETECTOR_BACKEND", "torch")
+    DETECTOR_IMGSZ = int(os.getenv("DETECTOR_IMGSZ", "640"))
+
+    # Micro-batching inference: kumpulkan frame dari banyak kamera
+    # (1 = matikan batching, setiap request memanggil YOLO sendiri)
+    INFERENCE_BATCH_SIZE = int(os.getenv("INFERENCE_BATCH_SIZE", "8"))
+    INFERENCE_BATCH_WAIT_MS = float(os.getenv("INFERENCE_BATCH_WAIT_MS", "15"))
+
+    # Pool proses worker inferensi (0 = inferensi di proses web)
+    INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0"))
+    INFERENCE_TORCH_THREADS = int(os.getenv("INFERENCE_TORCH_THREADS", "1"))
+    INFERENCE_SLOTS_PER_WORKER = int(os.getenv("INFERENCE_SLOTS_PER_WORKER", "4"))
+    # ukuran satu slot shared memory (default cukup untuk frame 1080p BGR)
+    INFERENCE_SLOT_BYTES = int(os.getenv("INFERENCE_SLOT_BYTES", str(1920 * 1080 * 3)))
+    # batas tunggu hasil/slot worker dan batas worker memuat model (detik); lewat => 503
+    INFERENCE_TIMEOUT = float(os.getenv("INFERENCE_TIMEOUT", "30"))
+    INFERENCE_START_TIMEOUT = float(os.getenv("INFERENCE_START_TIMEOUT", "180"))
+
+    # Write-behind: baris deteksi ditulis bulk oleh thread latar belakang
+    DB_WRITE_QUEUE_SIZE = int(os.getenv("DB_WRITE_QUEUE_SIZE", "10000"))
+    DB_WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH_SIZE", "200"))
+    DB_WRITE_FLUSH_INTERVAL = float(os.getenv("DB_WRITE_FLUSH_INTERVAL", "1.0"))
+
+    # Satu baris ringkasan (min/max/mean/last) per CCTV per jendela ini (detik)
+    AGGREGATION_WINDOW_SECONDS = float(os.getenv("AGGREGATION_WINDOW_SECONDS", "10"))
+
+    # Cache metadata (user, CCTV, karung) di memori proses
+    METADATA_CACHE_TTL = float(os.getenv("METADATA_CACHE_TTL", "60"))
+    METADATA_CACHE_SIZE = int(os.getenv("METADATA_CACHE_SIZE", "4096"))
+    # id yang tidak ada (mis. id_cctv asal dari /detect_api) di-cache sebentar supaya tidak query DB tiap frame
+    METADATA_NEGATIVE_TTL = float(os.getenv("METADATA_NEGATIVE_TTL", "5"))
+
+    # Capture server-side untuk CCTV yang punya ip_address
+    CAPTURE_ENABLED = os.getenv("CAPTURE_ENABLED", "false").lower() in ("1", "true", "yes")
+    # dipakai bila ip_address hanya berisi IP/host
+    CCTV_URL_TEMPLATE = os.getenv("CCTV_URL_TEMPLATE", "rtsp://{ip}:554/")
+    CAPTURE_BACKOFF_MAX = float(os.getenv("CAPTURE_BACKOFF_MAX", "30"))
+    # dengan banyak worker gunicorn hanya pemegang lock ini yang membuka kamera
+    CAPTURE_LOCK_FILE = os.getenv("CAPTURE_LOCK_FILE", "/tmp/deteksi-capture.lock")
+    STREAM_JPEG_QUALITY = int(os.getenv("STREAM_JPEG_QUALITY", "80"))
+
+    # Retensi deteksi (retensi.py): baris mentah lebih tua dari RETENTION_RAW_DAYS
+    # diarsipkan ke ARCHIVE_DIR (.npz terkompresi) lalu dihapus per batch;
+    # rekap per jam disimpan RETENTION_HOURLY_DAYS, rekap harian selamanya
+    RETENTION_RAW_DAYS = int(os.getenv("RETENTION_RAW_DAYS", "30"))
+    RETENTION_HOURLY_DAYS = int(os.getenv("RETENTION_HOURLY_DAYS", "365"))
+    RETENTION_DELETE_BATCH = int(os.getenv("RETENTION_DELETE_BATCH", "5000"))
+    RETENTION_INTERVAL_HOURS = float(os.getenv("RETENTION_INTERVAL_HOURS", "24"))
+    ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+
+    # /metrics (Prometheus); kosong = terbuka tanpa token
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+    # Trace JSONL per frame /detect_api (0 = tanpa sampel acak);
+    # frame lebih lambat dari TRACE_SLOW_MS selalu dicatat (0 = matikan)
+    TRACE_DIR = os.getenv("TRACE_DIR", "logs/trace")
+    TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+    TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "1000"))
+    TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "10000"))
+
+    # Upload /detect_api: browser memperkecil frame ke DETECTOR_IMGSZ (lihat
+    # /detect_api/config); di mode JSON upload JPEG yang lebih besar di-decode langsung
+    # di resolusi 1/2..1/8 selama sisi terpanjang tetap >= DECODE_TARGET_SIDE (0 = decode
+    # penuh). Mode JPEG selalu decode penuh: respons seukuran upload
+    UPLOAD_JPEG_QUALITY = float(os.getenv("UPLOAD_JPEG_QUALITY", "0.8"))
+    DECODE_TARGET_SIDE = int(os.getenv("DECODE_TARGET_SIDE", os.getenv("DETECTOR_IMGSZ", "640")))
+
+    # Gerbang perubahan adegan: inferensi dilewati bila < SCENE_CHANGE_THRESHOLD
+    # (fraksi piksel thumbnail yang berubah > SCENE_PIXEL_DELTA level abu-abu)
+    # dibanding frame terakhir yang diinferensi; paksa inferensi setiap
+    # SCENE_MAX_AGE detik. 0 = matikan gerbang
+    SCENE_CHANGE_THRESHOLD = float(os.getenv("SCENE_CHANGE_THRESHOLD", "0.01"))
+    SCENE_PIXEL_DELTA = int(os.getenv("SCENE_PIXEL_DELTA", "15"))
+    SCENE_MAX_AGE = float(os.getenv("SCENE_MAX_AGE", "10"))
+
+    # Deteksi penuh setiap TRACK_EVERY_N frame per CCTV, di antaranya box
+    # digeser dengan optical flow (1 = deteksi setiap frame); deteksi dipaksa
+    # lebih awal bila fraksi titik yang terlacak < TRACK_MIN_TRACKED
+    TRACK_EVERY_N = int(os.getenv("TRACK_EVERY_N", "1"))
+    TRACK_MIN_TRACKED = float(os.getenv("TRACK_MIN_TRACKED", "0.5"))
+
+    # WebSocket /ws/detect: ukuran maksimum satu pesan (frame JPEG)
+    WS_MAX_MESSAGE_BYTES = int(os.getenv("WS_MAX_MESSAGE_BYTES", str(8 * 1024 * 1024)))
+
+    # Admission control /detect_api & /ws/detect: frame yang diproses bersamaan,
+    # batas tunggu frame (ms) sebelum dibuang, dan jumlah CCTV yang boleh menunggu
+    ADMISSION_MAX_INFLIGHT = int(os.getenv("ADMISSION_MAX_INFLIGHT", os.getenv("INFERENCE_BATCH_SIZE", "8")))
+    ADMISSION_DEADLINE_MS = float(os.getenv("ADMISSION_DEADLINE_MS", "1500"))
+    ADMISSION_MAX_WAITING = int(os.getenv("ADMISSION_MAX_WAITING", "64"))
+    # Jendela (detik) untuk laju tercapai per CCTV & pengecekan min_fps; bobot sendiri di tabel cctv/gudang
+    SCHEDULER_RATE_WINDOW = float(os.getenv("SCHEDULER_RATE_WINDOW", "10"))
+
+    # Serving produksi (gunicorn.conf.py): jumlah worker & thread per worker
+    # (gthread; satu koneksi WebSocket memakai satu thread selama terbuka),
+    # preload model di master sebelum fork, dan thread torch per worker
+    # (0 = jumlah core dibagi jumlah worker). Agregasi, scene gate, tracker,
+    # mailbox/admission & cache metadata ada di memori per worker: hanya
+    # WEB_WORKERS=1 yang menjamin state per CCTV & batas admisi global
+    WEB_BIND = os.getenv("WEB_BIND", "0.0.0.0:" + os.getenv("PORT", "5000"))
+    WEB_WORKERS = int(os.getenv("WEB_WORKERS", "1"))
+    WEB_THREADS = int(os.getenv("WEB_THREADS", "16"))
+    WEB_PRELOAD = os.getenv("WEB_PRELOAD", "true").lower() in ("1", "true", "yes")
+    WEB_TORCH_THREADS = int(os.getenv("WEB_TORCH_THREADS", "0"))
+    WEB_TIMEOUT = int(os.getenv("WEB_TIMEOUT", "120"))
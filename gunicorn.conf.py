@@ -0,0 +1,66 @@
+"""
+Konfigurasi gunicorn untuk produksi:
+
+    gunicorn app:app
+
+Dengan WEB_PRELOAD=true (default) app.py + model YOLO dimuat sekali di
+master, dipanaskan, lalu worker di-fork dan berbagi weights copy-on-write.
+Worker memakai gthread karena /ws/detect (flask-sock) memegang satu thread
+selama koneksi WebSocket terbuka.
+
+State per CCTV hidup di memori tiap worker: jendela agregasi, scene gate,
+BoxTracker, frame mailbox + admisi (batas in-flight & fairness) dan cache
+metadata. Hanya WEB_WORKERS=1 (default) yang menjaga jaminan itu; dengan
+lebih dari satu worker frame satu CCTV bisa tersebar ke beberapa worker,
+sehingga gate/tracker terpecah dan batas admisi berlaku per worker. Baris
+ringkasan tetap satu per CCTV per jendela (ringkasan parsial digabung lewat
+unique index deteksi (id_cctv, jendela)). Tambah thread, bukan worker,
+untuk koneksi yang lebih banyak.
+
+Waktu startup & memori tiap worker dicatat di log ("[SERVE] worker ...") dan
+di /metrics; perbandingan preload vs tanpa preload:
+    python benchmarks/bench_preload.py
+"""
+import time
+
+from config import Config
+from utils.procmem import cpu_count
+
+bind = Config.WEB_BIND
+workers = Config.WEB_WORKERS
+worker_class = "gthread"
+threads = Config.WEB_THREADS
+timeout = Config.WEB_TIMEOUT
+preload_app = Config.WEB_PRELOAD
+
+torch_threads = Config.WEB_TORCH_THREADS or max(1, cpu_count() // max(1, workers))
+
+_prepared = False
+
+
+def on_starting(server):
+    if workers > 1:
+        server.log.warning(
+            f"[SERVE] WEB_WORKERS={workers}: state per CCTV (gate, tracker, admisi) "
+            "terpisah per worker; hanya WEB_WORKERS=1 yang menjamin state & batas admisi global"
+        )
+
+
+def pre_fork(server, worker):
+    # dipanggil di master untuk setiap fork (termasuk worker pengganti); persiapan cukup sekali
+    global _prepared
+    if preload_app and not _prepared:
+        import app as web
+        server.log.info(web.prepare_fork())
+        _prepared = True
+
+
+def post_fork(server, worker):
+    forked_at = time.perf_counter()
+    import app as web   # tanpa preload: model dimuat di sini, per worker
+    web.after_fork(torch_threads, forked_at)
+
+
+def post_worker_init(worker):
+    import app as web
+    worker.log.info(web.worker_ready(preload_app))
@@ -0,0 +1,48 @@
+"""create rekap deteksi tables (rollup per jam & per hari)
+
+Revision ID: 7d1e4a9c3b52
+Revises: b1f7e3a5c914
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d1e4a9c3b52'
+down_revision = 'b1f7e3a5c914'
+branch_labels = None
+depends_on = None
+
+
+def _create_rekap_table(name):
+    op.create_table(name,
+    sa.Column('id_rekap', sa.Integer(), nullable=False),
+    sa.Column('periode', sa.DateTime(), nullable=False),
+    sa.Column('id_cctv', sa.Integer(), nullable=False),
+    sa.Column('id_gudang', sa.Integer(), nullable=True),
+    sa.Column('id_karung', sa.Integer(), nullable=False),
+    sa.Column('jumlah_sampel', sa.Integer(), nullable=False),
+    sa.Column('jumlah_total', sa.BigInteger(), nullable=False),
+    sa.Column('min_karung', sa.Integer(), nullable=True),
+    sa.Column('max_karung', sa.Integer(), nullable=True),
+    sa.Column('total_terakhir', sa.Integer(), nullable=True),
+    sa.Column('waktu_terakhir', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id_rekap'),
+    sa.UniqueConstraint('periode', 'id_cctv', 'id_karung', name=f'uq_{name}')
+    )
+    with op.batch_alter_table(name, schema=None) as batch_op:
+        batch_op.create_index(batch_op.f(f'ix_{name}_id_gudang'), ['id_gudang'], unique=False)
+
+
+def upgrade():
+    _create_rekap_table('rekap_deteksi_jam')
+    _create_rekap_table('rekap_deteksi_harian')
+
+
+def downgrade():
+    for name in ('rekap_deteksi_harian', 'rekap_deteksi_jam'):
+        with op.batch_alter_table(name, schema=None) as batch_op:
+            batch_op.drop_index(batch_op.f(f'ix_{name}_id_gudang'))
+        op.drop_table(name)
@@ -0,0 +1,53 @@
+"""add window summary columns to deteksi
+
+Kolom ringkasan satu jendela agregasi per CCTV: jumlah_sampel, min_karung,
+max_karung, rata_karung (total_karung = count terakhir). Tabel deteksi bisa
+belum ada di riwayat migrasi lama (dibuat lewat db.create_all()), jadi tabel
+& kolom dicek dulu lewat inspector; c5a8e2f61d07 menambah kolom yang sama
+bila tabelnya baru dibuat di sana.
+
+Revision ID: a9d4c6e1f802
+Revises: 2c009b762fdb
+Create Date: 2026-10-17 07:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d4c6e1f802'
+down_revision = '2c009b762fdb'
+branch_labels = None
+depends_on = None
+
+
+def _columns():
+    return [
+        sa.Column('jumlah_sampel', sa.Integer(), nullable=True),
+        sa.Column('min_karung', sa.Integer(), nullable=True),
+        sa.Column('max_karung', sa.Integer(), nullable=True),
+        sa.Column('rata_karung', sa.Float(), nullable=True),
+    ]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'deteksi' not in inspector.get_table_names():
+        return
+    existing = {c['name'] for c in inspector.get_columns('deteksi')}
+    with op.batch_alter_table('deteksi', schema=None) as batch_op:
+        for column in _columns():
+            if column.name not in existing:
+                batch_op.add_column(column)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'deteksi' not in inspector.get_table_names():
+        return
+    existing = {c['name'] for c in inspector.get_columns('deteksi')}
+    with op.batch_alter_table('deteksi', schema=None) as batch_op:
+        for column in reversed(_columns()):
+            if column.name in existing:
+                batch_op.drop_column(column.name)
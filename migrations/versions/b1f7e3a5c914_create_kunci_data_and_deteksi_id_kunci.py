@@ -0,0 +1,52 @@
+"""create kunci_data and deteksi.id_kunci
+
+DEK terbungkus master key disimpan sekali per scope di kunci_data; baris
+deteksi baru menunjuk ke sana lewat id_kunci (encrypted_dek hanya untuk
+baris lama). Tabel & kolom dicek dulu lewat inspector, sama seperti
+a9d4c6e1f802.
+
+Revision ID: b1f7e3a5c914
+Revises: a9d4c6e1f802
+Create Date: 2026-10-17 08:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b1f7e3a5c914'
+down_revision = 'a9d4c6e1f802'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    if 'kunci_data' not in tables:
+        op.create_table('kunci_data',
+        sa.Column('id_kunci', sa.Integer(), nullable=False),
+        sa.Column('scope', sa.String(length=50), nullable=False),
+        sa.Column('encrypted_dek', sa.LargeBinary(), nullable=False),
+        sa.Column('dibuat', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id_kunci')
+        )
+    if 'deteksi' not in tables:
+        return
+    existing = {c['name'] for c in inspector.get_columns('deteksi')}
+    if 'id_kunci' not in existing:
+        with op.batch_alter_table('deteksi', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('id_kunci', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key('fk_deteksi_id_kunci', 'kunci_data', ['id_kunci'], ['id_kunci'])
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'deteksi' in inspector.get_table_names():
+        existing = {c['name'] for c in inspector.get_columns('deteksi')}
+        if 'id_kunci' in existing:
+            with op.batch_alter_table('deteksi', schema=None) as batch_op:
+                batch_op.drop_constraint('fk_deteksi_id_kunci', type_='foreignkey')
+                batch_op.drop_column('id_kunci')
+    # kunci_data tidak dihapus: DEK di dalamnya masih dibutuhkan untuk membaca baris terenkripsi
@@ -0,0 +1,151 @@
+"""align schema with models and add indexes
+
+Riwayat migrasi sebelumnya masih memakai skema lama (user/detection_result).
+Migrasi ini membuat tabel model saat ini bila belum ada, menambah kolom
+baru di deteksi, lalu menambah index untuk query dashboard & detect_api.
+Semua langkah dicek dulu lewat inspector, jadi aman dijalankan pada
+database yang tabelnya dulu dibuat manual / lewat db.create_all().
+
+Revision ID: c5a8e2f61d07
+Revises: 7d1e4a9c3b52
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5a8e2f61d07'
+down_revision = '7d1e4a9c3b52'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    # (tabel, nama index, kolom, unique)
+    ('deteksi', 'ix_deteksi_waktu_id_deteksi', ['waktu', 'id_deteksi'], False),
+    ('deteksi', 'ix_deteksi_id_cctv_waktu', ['id_cctv', 'waktu'], False),
+    ('karung', 'ix_karung_nama_karung', ['nama_karung'], True),
+    ('gudang', 'ix_gudang_id_user', ['id_user'], False),
+    ('cctv', 'ix_cctv_id_gudang', ['id_gudang'], False),
+]
+
+def _deteksi_columns():
+    return [
+        sa.Column('jumlah_sampel', sa.Integer(), nullable=True),
+        sa.Column('min_karung', sa.Integer(), nullable=True),
+        sa.Column('max_karung', sa.Integer(), nullable=True),
+        sa.Column('rata_karung', sa.Float(), nullable=True),
+        sa.Column('id_kunci', sa.Integer(), nullable=True),
+    ]
+
+
+def _create_missing_tables(tables):
+    if 'users' not in tables:
+        op.create_table('users',
+        sa.Column('id_user', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=80), nullable=False),
+        sa.Column('password_hash', sa.String(length=200), nullable=False),
+        sa.Column('role', sa.String(length=20), nullable=True),
+        sa.Column('last_login', sa.DateTime(), nullable=True),
+        sa.Column('status', sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint('id_user'),
+        sa.UniqueConstraint('username')
+        )
+    if 'gudang' not in tables:
+        op.create_table('gudang',
+        sa.Column('id_gudang', sa.Integer(), nullable=False),
+        sa.Column('nama_gudang', sa.String(length=120), nullable=False),
+        sa.Column('lokasi', sa.String(length=120), nullable=False),
+        sa.Column('kapasitas', sa.Integer(), nullable=False),
+        sa.Column('id_user', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['id_user'], ['users.id_user'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id_gudang')
+        )
+    if 'karung' not in tables:
+        op.create_table('karung',
+        sa.Column('id_karung', sa.Integer(), nullable=False),
+        sa.Column('nama_karung', sa.String(length=120), nullable=False),
+        sa.PrimaryKeyConstraint('id_karung')
+        )
+    if 'cctv' not in tables:
+        op.create_table('cctv',
+        sa.Column('id_cctv', sa.Integer(), nullable=False),
+        sa.Column('nama_cctv', sa.String(length=120), nullable=False),
+        sa.Column('ip_address', sa.String(length=100), nullable=True),
+        sa.Column('id_gudang', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['id_gudang'], ['gudang.id_gudang'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id_cctv')
+        )
+    if 'kunci_data' not in tables:
+        op.create_table('kunci_data',
+        sa.Column('id_kunci', sa.Integer(), nullable=False),
+        sa.Column('scope', sa.String(length=50), nullable=False),
+        sa.Column('encrypted_dek', sa.LargeBinary(), nullable=False),
+        sa.Column('dibuat', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id_kunci')
+        )
+    if 'deteksi' not in tables:
+        op.create_table('deteksi',
+        sa.Column('id_deteksi', sa.Integer(), nullable=False),
+        sa.Column('waktu', sa.DateTime(), nullable=True),
+        sa.Column('total_karung', sa.Integer(), nullable=False),
+        sa.Column('data_encrypted', sa.LargeBinary(), nullable=True),
+        sa.Column('encrypted_dek', sa.LargeBinary(), nullable=True),
+        sa.Column('id_cctv', sa.Integer(), nullable=False),
+        sa.Column('id_karung', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['id_cctv'], ['cctv.id_cctv'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['id_karung'], ['karung.id_karung'], ),
+        sa.PrimaryKeyConstraint('id_deteksi')
+        )
+
+
+def _dedupe_karung():
+    """nama_karung akan unik: arahkan deteksi ke id terkecil lalu hapus duplikat"""
+    op.execute(
+        "UPDATE deteksi SET id_karung = ("
+        " SELECT MIN(k2.id_karung) FROM karung k1"
+        " JOIN karung k2 ON k2.nama_karung = k1.nama_karung"
+        " WHERE k1.id_karung = deteksi.id_karung)"
+        " WHERE id_karung IS NOT NULL"
+    )
+    op.execute(
+        "DELETE FROM karung WHERE id_karung NOT IN ("
+        " SELECT id_min FROM (SELECT MIN(id_karung) AS id_min FROM karung GROUP BY nama_karung) AS k)"
+    )
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    _create_missing_tables(set(inspector.get_table_names()))
+
+    inspector = sa.inspect(op.get_bind())
+    existing_columns = {c['name'] for c in inspector.get_columns('deteksi')}
+    with op.batch_alter_table('deteksi', schema=None) as batch_op:
+        for column in _deteksi_columns():
+            if column.name not in existing_columns:
+                batch_op.add_column(column)
+        if 'id_kunci' not in existing_columns:
+            batch_op.create_foreign_key('fk_deteksi_id_kunci', 'kunci_data', ['id_kunci'], ['id_kunci'])
+
+    _dedupe_karung()
+
+    for table, name, columns, unique in INDEXES:
+        existing = {ix['name'] for ix in inspector.get_indexes(table)}
+        if name not in existing:
+            with op.batch_alter_table(table, schema=None) as batch_op:
+                batch_op.create_index(name, columns, unique=unique)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table, name, columns, unique in reversed(INDEXES):
+        existing = {ix['name'] for ix in inspector.get_indexes(table)}
+        if name in existing:
+            with op.batch_alter_table(table, schema=None) as batch_op:
+                batch_op.drop_index(name)
+
+    # kolom deteksi di atas milik a9d4c6e1f802 & b1f7e3a5c914 (di sini hanya
+    # ditambah bila tabel deteksi baru dibuat); dihapus oleh downgrade revisi itu
+    # tabel yang dibuat di upgrade tidak dihapus: bisa jadi sudah ada sebelumnya
@@ -0,0 +1,52 @@
+"""add scheduling weights to cctv and gudang
+
+Bobot pembagian kapasitas inferensi: gudang.bobot, cctv.bobot dan
+cctv.min_fps (laju minimum terjamin). Kolom dicek dulu lewat inspector,
+sama seperti c5a8e2f61d07.
+
+Revision ID: e3b7d9a4c218
+Revises: c5a8e2f61d07
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b7d9a4c218'
+down_revision = 'c5a8e2f61d07'
+branch_labels = None
+depends_on = None
+
+
+def _columns():
+    return {
+        'gudang': [
+            sa.Column('bobot', sa.Float(), nullable=False, server_default='1'),
+        ],
+        'cctv': [
+            sa.Column('bobot', sa.Float(), nullable=False, server_default='1'),
+            sa.Column('min_fps', sa.Float(), nullable=False, server_default='0'),
+        ],
+    }
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table, columns in _columns().items():
+        existing = {c['name'] for c in inspector.get_columns(table)}
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in columns:
+                if column.name not in existing:
+                    batch_op.add_column(column)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table, columns in _columns().items():
+        existing = {c['name'] for c in inspector.get_columns(table)}
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in reversed(columns):
+                if column.name in existing:
+                    batch_op.drop_column(column.name)
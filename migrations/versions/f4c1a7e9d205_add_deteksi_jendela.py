@@ -0,0 +1,46 @@
+"""add jendela (awal jendela agregasi) to deteksi
+
+deteksi.jendela = awal jendela agregasi (kelipatan AGGREGATION_WINDOW_SECONDS)
+untuk baris ringkasan; NULL untuk baris manual (/save_detection) dan baris
+lama. Unique index (id_cctv, jendela) membuat simpan ringkasan idempoten:
+ringkasan parsial jendela yang sama digabung ke satu baris, bukan ditambah.
+Kolom & index dicek dulu lewat inspector, sama seperti c5a8e2f61d07.
+
+Revision ID: f4c1a7e9d205
+Revises: e3b7d9a4c218
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c1a7e9d205'
+down_revision = 'e3b7d9a4c218'
+branch_labels = None
+depends_on = None
+
+INDEX = 'ux_deteksi_id_cctv_jendela'
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    existing_columns = {c['name'] for c in inspector.get_columns('deteksi')}
+    existing_indexes = {ix['name'] for ix in inspector.get_indexes('deteksi')}
+    with op.batch_alter_table('deteksi', schema=None) as batch_op:
+        if 'jendela' not in existing_columns:
+            batch_op.add_column(sa.Column('jendela', sa.DateTime(), nullable=True))
+        if INDEX not in existing_indexes:
+            batch_op.create_index(INDEX, ['id_cctv', 'jendela'], unique=True)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    existing_columns = {c['name'] for c in inspector.get_columns('deteksi')}
+    existing_indexes = {ix['name'] for ix in inspector.get_indexes('deteksi')}
+    with op.batch_alter_table('deteksi', schema=None) as batch_op:
+        if INDEX in existing_indexes:
+            batch_op.drop_index(INDEX)
+        if 'jendela' in existing_columns:
+            batch_op.drop_column('jendela')
@@ -0,0 +1,49 @@
+import argparse
+import os
+from datetime import datetime, timedelta
+
+from app import app, db, Config, Deteksi, RekapJam, RekapHarian, WIB, gudang_of_cctv
+from utils import rollup, retention
+
+
+def parse_tanggal(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def batas_arsip():
+    """Hari sebelum batas ini baris mentahnya mungkin sudah diarsipkan (retensi.py)"""
+    if not retention.list_archives(Config.ARCHIVE_DIR):
+        return None
+    return retention.day_start(datetime.now(WIB).replace(tzinfo=None)) - timedelta(days=Config.RETENTION_RAW_DAYS)
+
+
+def rebuild_rollup(dari=None, sampai=None, termasuk_arsip=False):
+    print("=== Rebuild Rekap Deteksi (per jam & per hari) ===")
+
+    # rebuild menghapus rekap lalu menghitung dari tabel deteksi; untuk hari
+    # yang sudah diarsipkan rekapnya akan hilang (muat ulang arsip dulu)
+    batas = batas_arsip()
+    if batas is not None and not termasuk_arsip and (dari is None or dari < batas):
+        print(f"⚠️  Data sebelum {batas:%Y-%m-%d} sudah diarsipkan di {os.path.abspath(Config.ARCHIVE_DIR)}; "
+              f"rentang dimulai dari {batas:%Y-%m-%d} (pakai --termasuk-arsip setelah muat ulang arsip).")
+        dari = batas
+    print(f"Rentang: {dari or 'awal'} s/d {sampai or 'sekarang'}")
+
+    hasil = rollup.rebuild(db.session, Deteksi, gudang_of_cctv, RekapJam, RekapHarian,
+                           dari=dari, sampai=sampai, tz=WIB)
+
+    print(f"✅ {hasil['deteksi']} baris deteksi diproses -> "
+          f"{hasil['rekap_jam']} rekap jam, {hasil['rekap_harian']} rekap harian.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hitung ulang tabel rekap dari tabel deteksi")
+    parser.add_argument("--dari", help="awal rentang (ISO 8601, mis. 2025-01-01)")
+    parser.add_argument("--sampai", help="akhir rentang, eksklusif (ISO 8601)")
+    parser.add_argument("--termasuk-arsip", action="store_true",
+                        help="izinkan rentang yang baris mentahnya sudah diarsipkan")
+    args = parser.parse_args()
+
+    # Pastikan dijalankan dalam konteks Flask
+    with app.app_context():
+        rebuild_rollup(parse_tanggal(args.dari), parse_tanggal(args.sampai), args.termasuk_arsip)
@@ -0,0 +1,90 @@
+"""
+Retensi tabel deteksi: arsipkan baris lama ke file .npz lalu hapus bertahap.
+
+    python retensi.py                       # sekali jalan
+    python retensi.py --dry-run             # hanya tampilkan yang akan diarsipkan
+    python retensi.py --loop                # ulangi setiap RETENTION_INTERVAL_HOURS
+    python retensi.py --muat --dari 2025-01-01 --sampai 2025-01-08
+
+Contoh cron (setiap hari jam 02:30):
+    30 2 * * * cd /path/ke/app && python retensi.py >> logs/retensi.log 2>&1
+"""
+import argparse
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app import app, db, Config, Deteksi, RekapJam, RekapHarian, WIB, gudang_of_cctv
+from utils import retention
+
+
+def parse_tanggal(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def analyze_deteksi():
+    """Perbarui statistik planner setelah banyak baris dihapus"""
+    if db.engine.dialect.name == "postgresql":
+        # VACUUM tidak boleh di dalam transaksi
+        with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM (ANALYZE) deteksi"))
+    else:
+        db.session.execute(text("ANALYZE deteksi"))
+        db.session.commit()
+
+
+def jalankan_retensi(dry_run=False):
+    print(f"=== Retensi Deteksi ({datetime.now(WIB):%Y-%m-%d %H:%M}) ===")
+    print(f"Simpan mentah {Config.RETENTION_RAW_DAYS} hari, rekap jam "
+          f"{Config.RETENTION_HOURLY_DAYS} hari, arsip di {Config.ARCHIVE_DIR}/")
+
+    t0 = time.perf_counter()
+    hasil = retention.archive_and_prune(
+        db.session, Deteksi, gudang_of_cctv, RekapJam, RekapHarian, Config.ARCHIVE_DIR,
+        raw_days=Config.RETENTION_RAW_DAYS,
+        hourly_days=Config.RETENTION_HOURLY_DAYS,
+        batch_size=Config.RETENTION_DELETE_BATCH,
+        tz=WIB,
+        dry_run=dry_run
+    )
+    if hasil["dihapus"] and not dry_run:
+        analyze_deteksi()
+
+    print(f"✅ {hasil['hari']} hari, {hasil['diarsipkan']} baris diarsipkan "
+          f"({hasil['bytes_arsip'] / 1e6:.1f} MB), {hasil['dihapus']} baris dihapus, "
+          f"{hasil['rekap_dihitung_ulang']} rekap harian dihitung ulang, "
+          f"{hasil['rekap_jam_dihapus']} rekap jam dihapus "
+          f"dalam {time.perf_counter() - t0:.1f} detik.")
+
+
+def muat_arsip(dari, sampai):
+    print(f"=== Muat Ulang Arsip: {dari or 'awal'} s/d {sampai or 'akhir'} ===")
+    total = retention.load_range(db.session, Deteksi, Config.ARCHIVE_DIR, dari=dari, sampai=sampai)
+    print(f"✅ {total} baris dimuat ke tabel deteksi "
+          f"(akan diarsipkan lagi pada retensi berikutnya).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retensi, arsip, dan muat ulang tabel deteksi")
+    parser.add_argument("--dry-run", action="store_true", help="jangan menulis arsip / menghapus baris")
+    parser.add_argument("--loop", action="store_true", help="jalan terus, ulangi setiap RETENTION_INTERVAL_HOURS")
+    parser.add_argument("--muat", action="store_true", help="muat ulang arsip ke tabel deteksi")
+    parser.add_argument("--dari", help="awal rentang muat ulang (ISO 8601)")
+    parser.add_argument("--sampai", help="akhir rentang muat ulang, eksklusif (ISO 8601)")
+    args = parser.parse_args()
+
+    # Pastikan dijalankan dalam konteks Flask
+    with app.app_context():
+        if args.muat:
+            muat_arsip(parse_tanggal(args.dari), parse_tanggal(args.sampai))
+        elif args.loop:
+            while True:
+                try:
+                    jalankan_retensi(args.dry_run)
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"❌ Retensi gagal: {e}")
+                time.sleep(Config.RETENTION_INTERVAL_HOURS * 3600)
+        else:
+            jalankan_retensi(args.dry_run)
@@ -0,0 +1,268 @@
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class Ticket:
+    __slots__ = ("key", "arrival", "status", "waited", "share")
+
+    def __init__(self, key, arrival, share):
+        self.key = key
+        self.arrival = arrival
+        self.status = "waiting"     # waiting | ok | superseded | expired | overloaded
+        self.waited = 0.0
+        self.share = share
+
+    @property
+    def admitted(self):
+        return self.status == "ok"
+
+
+class Share:
+    """Bagian kapasitas satu CCTV: grup (gudang), bobot grup, bobot CCTV, laju minimum (frame/detik)"""
+    __slots__ = ("group", "group_weight", "weight", "min_rate")
+
+    def __init__(self, group=None, group_weight=1.0, weight=1.0, min_rate=0.0):
+        self.group = group
+        self.group_weight = max(1e-3, float(group_weight or 1.0))
+        self.weight = max(1e-3, float(weight or 1.0))
+        self.min_rate = max(0.0, float(min_rate or 0.0))
+
+
+class _Usage:
+    __slots__ = ("vtime", "share", "admitted", "offered")
+
+    def __init__(self):
+        self.vtime = 0.0            # virtual finish time terakhir
+        self.share = None
+        self.admitted = deque()     # waktu frame diproses (jendela rate)
+        self.offered = deque()      # waktu frame datang
+
+
+class FrameMailbox:
+    """
+    Admission control per CCTV: kotak surat satu slot + batas inferensi global.
+
+    - Setiap CCTV paling banyak punya satu frame yang sedang diproses dan
+      satu frame yang menunggu. Frame baru menggantikan frame yang masih
+      menunggu (frame lama selesai dengan status "superseded").
+    - Paling banyak `max_inflight` frame diproses bersamaan. Slot kosong
+      dibagi adil dua tingkat (start-time fair queuing): dulu antar gudang
+      sesuai bobot gudang, lalu antar CCTV di gudang itu sesuai bobot CCTV.
+      Gudang dengan banyak tab detect.html hanya mendapat bagiannya sendiri.
+    - CCTV yang laju tercapainya di bawah `min_rate` didahulukan sebelum
+      pembagian berbobot (laju minimum terjamin selama kapasitas cukup).
+    - Frame yang menunggu lebih dari `deadline` detik dibuang tanpa
+      inferensi ("expired"); bila sudah ada `max_waiting` CCTV yang
+      menunggu, frame baru langsung ditolak ("overloaded").
+
+    Latensi per frame jadi terbatas (<= deadline + waktu proses) berapa pun
+    banyaknya frame yang datang.
+
+        ticket = mailbox.acquire(id_cctv, Share(id_gudang, 1.0, bobot, min_fps))
+        if not ticket.admitted:
+            return busy(mailbox.retry_after())
+        try:
+            ...
+        finally:
+            mailbox.release(ticket)
+    """
+
+    def __init__(self, max_inflight=4, deadline=1.5, max_waiting=64, min_retry=0.2, max_retry=10.0,
+                 rate_window=10.0, max_entries=1024):
+        self.max_inflight = max(1, int(max_inflight))
+        self.deadline = float(deadline)
+        self.max_waiting = max(1, int(max_waiting))
+        self.min_retry = float(min_retry)
+        self.max_retry = float(max_retry)
+        self.rate_window = float(rate_window)
+        self.max_entries = max(1, int(max_entries))
+
+        self._cond = threading.Condition()
+        self._waiting = {}          # key -> Ticket
+        self._running = set()
+        self._inflight = 0
+        self._service = 0.1         # EWMA waktu proses (detik) untuk Retry-After
+
+        # fair queuing: virtual time per gudang & per CCTV
+        self._groups = OrderedDict()    # group -> _Usage
+        self._keys = OrderedDict()      # key -> _Usage
+        self._vroot = 0.0               # virtual time sistem (antar gudang)
+        self._vgroup = {}               # group -> virtual time sistem di dalam gudang
+
+        # statistik
+        self.admitted = 0
+        self.superseded = 0
+        self.expired = 0
+        self.overloaded = 0
+
+    def acquire(self, key, share=None):
+        now = time.monotonic()
+        ticket = Ticket(key, now, share or Share())
+        with self._cond:
+            self._record(self._usage(self._keys, key, ticket.share).offered, now)
+            previous = self._waiting.get(key)
+            if previous is None and len(self._waiting) >= self.max_waiting:
+                ticket.status = "overloaded"
+                self.overloaded += 1
+                return ticket
+            if previous is not None:
+                previous.status = "superseded"
+                self.superseded += 1
+            self._waiting[key] = ticket
+            self._cond.notify_all()
+
+            while True:
+                if ticket.status == "superseded":
+                    break
+                # deadline dicek sebelum admisi: frame yang bangun setelah deadline
+                # (mis. slot baru kosong) tidak boleh masih diinferensi
+                remaining = ticket.arrival + self.deadline - time.monotonic()
+                if remaining <= 0:
+                    del self._waiting[key]
+                    ticket.status = "expired"
+                    self.expired += 1
+                    self._cond.notify_all()
+                    break
+                if self._inflight < self.max_inflight and self._pick() is ticket:
+                    del self._waiting[key]
+                    self._running.add(key)
+                    self._inflight += 1
+                    ticket.status = "ok"
+                    self.admitted += 1
+                    self._charge(ticket)
+                    # slot lain mungkin masih kosong: waiter berikutnya cek lagi
+                    self._cond.notify_all()
+                    break
+                self._cond.wait(remaining)
+        ticket.waited = time.monotonic() - ticket.arrival
+        return ticket
+
+    def release(self, ticket, service_time=None):
+        if not ticket.admitted:
+            return
+        with self._cond:
+            self._running.discard(ticket.key)
+            self._inflight -= 1
+            if service_time is not None:
+                self._service = 0.8 * self._service + 0.2 * service_time
+            self._cond.notify_all()
+
+    def retry_after(self):
+        """Perkiraan detik sampai antrian cukup lega untuk frame baru"""
+        with self._cond:
+            backlog = len(self._waiting) + self._inflight
+            estimate = self._service * math.ceil(backlog / self.max_inflight)
+        return min(self.max_retry, max(self.min_retry, estimate))
+
+    def rates(self):
+        """{key: (frame/detik diproses, frame/detik datang)} dalam jendela `rate_window`"""
+        now = time.monotonic()
+        with self._cond:
+            return {key: (self._rate(u.admitted, now), self._rate(u.offered, now))
+                    for key, u in self._keys.items()}
+
+    def stats(self):
+        now = time.monotonic()
+        with self._cond:
+            per_key = {}
+            for key, usage in self._keys.items():
+                share = usage.share
+                per_key[str(key)] = {
+                    "group": share.group,
+                    "weight": share.weight,
+                    "min_rate": share.min_rate,
+                    "achieved_fps": round(self._rate(usage.admitted, now), 3),
+                    "offered_fps": round(self._rate(usage.offered, now), 3),
+                }
+            per_group = {str(group): {"weight": usage.share.group_weight,
+                                      "achieved_fps": round(self._rate(usage.admitted, now), 3)}
+                         for group, usage in self._groups.items()}
+            return {
+                "max_inflight": self.max_inflight,
+                "deadline": self.deadline,
+                "inflight": self._inflight,
+                "waiting": len(self._waiting),
+                "service_ms": round(self._service * 1000, 2),
+                "admitted": self.admitted,
+                "superseded": self.superseded,
+                "expired": self.expired,
+                "overloaded": self.overloaded,
+                "rate_window": self.rate_window,
+                "per_cctv": per_key,
+                "per_gudang": per_group,
+            }
+
+    # ======================
+    # FAIR QUEUING
+    # ======================
+    def _pick(self):
+        """Ticket yang berhak atas slot berikutnya (None bila tidak ada yang bisa jalan)"""
+        now = time.monotonic()
+        # yang sudah lewat deadline tidak ikut bersaing; ia dibuang saat bangun
+        candidates = [t for t in self._waiting.values()
+                      if t.key not in self._running and now - t.arrival < self.deadline]
+        if not candidates:
+            return None
+
+        # 1) CCTV di bawah laju minimum, yang paling jauh tertinggal dulu
+        behind = []
+        for t in candidates:
+            if t.share.min_rate > 0:
+                usage = self._keys.get(t.key)
+                ratio = (self._rate(usage.admitted, now) if usage else 0.0) / t.share.min_rate
+                if ratio < 1.0:
+                    behind.append((ratio, t.arrival, t))
+        if behind:
+            return min(behind, key=lambda x: x[:2])[2]
+
+        # 2) gudang dengan start tag terkecil, lalu CCTV dengan start tag terkecil di gudang itu
+        def group_tag(t):
+            usage = self._groups.get(t.share.group)
+            return max(usage.vtime if usage else 0.0, self._vroot)
+
+        def key_tag(t):
+            usage = self._keys.get(t.key)
+            return max(usage.vtime if usage else 0.0, self._vgroup.get(t.share.group, 0.0))
+
+        best = min(candidates, key=lambda t: (group_tag(t), t.arrival))
+        same_group = [t for t in candidates if t.share.group == best.share.group]
+        return min(same_group, key=lambda t: (key_tag(t), t.arrival))
+
+    def _charge(self, ticket):
+        # satu frame = satu unit kerja; start tag lama dipakai sebagai virtual time sistem
+        share, now = ticket.share, time.monotonic()
+        group = self._usage(self._groups, share.group, share)
+        start = max(group.vtime, self._vroot)
+        group.vtime = start + 1.0 / share.group_weight
+        self._vroot = start
+
+        key = self._usage(self._keys, ticket.key, share)
+        start = max(key.vtime, self._vgroup.get(share.group, 0.0))
+        key.vtime = start + 1.0 / share.weight
+        self._vgroup[share.group] = start
+
+        self._record(group.admitted, now)
+        self._record(key.admitted, now)
+
+    def _usage(self, table, key, share):
+        usage = table.get(key)
+        if usage is None:
+            usage = table[key] = _Usage()
+            while len(table) > self.max_entries:
+                table.popitem(last=False)
+        table.move_to_end(key)
+        usage.share = share       # bobot terbaru (bisa berubah saat runtime)
+        return usage
+
+    def _record(self, times, now):
+        # buang yang sudah keluar jendela setiap kali menambah, supaya deque tetap
+        # sebesar jumlah frame dalam `rate_window` walau rates()/stats() tak pernah dipanggil
+        times.append(now)
+        self._rate(times, now)
+
+    def _rate(self, times, now):
+        while times and now - times[0] > self.rate_window:
+            times.popleft()
+        return len(times) / self.rate_window
@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+
+
+class WindowSummary:
+    """Ringkasan count satu CCTV dalam satu jendela waktu"""
+
+    def __init__(self, id_cctv, start):
+        self.id_cctv = id_cctv
+        self.start = start
+        self.end = start
+        self.samples = 0
+        self.total = 0
+        self.min_count = None
+        self.max_count = None
+        self.last_count = 0
+        self.last_counts = {}
+
+    def add(self, counts, now):
+        count = int(sum(counts.values()))
+        self.samples += 1
+        self.total += count
+        self.min_count = count if self.min_count is None else min(self.min_count, count)
+        self.max_count = count if self.max_count is None else max(self.max_count, count)
+        self.last_count = count
+        self.last_counts = dict(counts)
+        self.end = now
+
+    @property
+    def mean_count(self):
+        return self.total / self.samples if self.samples else 0.0
+
+
+class WindowAggregator:
+    """
+    Agregasi count per CCTV per jendela waktu.
+
+    Setiap frame cukup memanggil add(); satu ringkasan (min/max/mean/last +
+    jumlah sampel) dikirim ke `emit_fn` ketika jendela kamera itu selesai.
+    Jendela disejajarkan ke jam dinding (awal = kelipatan window_seconds),
+    jadi ringkasan parsial dari proses lain untuk jendela yang sama punya
+    `start` yang sama dan bisa digabung saat disimpan.
+    Thread latar belakang menutup jendela kamera yang berhenti mengirim frame.
+    """
+
+    def __init__(self, emit_fn, window_seconds=10, logger=None):
+        self.emit_fn = emit_fn
+        self.window = float(window_seconds)
+        self.logger = logger
+
+        self._windows = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+        # statistik
+        self.frames = 0
+        self.emitted = 0
+        self.errors = 0
+
+    def add(self, id_cctv, counts, now=None):
+        self._ensure_started()
+        now = time.time() if now is None else now
+        closed = None
+        with self._lock:
+            current = self._windows.get(id_cctv)
+            if current is not None and now - current.start >= self.window:
+                closed = current
+                current = None
+            if current is None:
+                current = WindowSummary(id_cctv, now - now % self.window)
+                self._windows[id_cctv] = current
+            current.add(counts, now)
+            self.frames += 1
+        if closed is not None:
+            self._emit(closed)
+
+    def flush_expired(self, now=None):
+        """Tutup jendela yang sudah lewat (kamera yang berhenti mengirim frame)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            expired = [w for w in self._windows.values() if now - w.start >= self.window]
+            for summary in expired:
+                del self._windows[summary.id_cctv]
+        for summary in expired:
+            self._emit(summary)
+
+    def flush_all(self):
+        with self._lock:
+            pending = list(self._windows.values())
+            self._windows.clear()
+        for summary in pending:
+            self._emit(summary)
+
+    def stats(self):
+        return {
+            "open_windows": len(self._windows),
+            "frames": self.frames,
+            "emitted": self.emitted,
+            "errors": self.errors,
+        }
+
+    def _emit(self, summary):
+        try:
+            self.emit_fn(summary)
+            self.emitted += 1
+        except Exception as e:
+            self.errors += 1
+            if self.logger is not None:
+                self.logger.error(f"[AGGREGATOR] gagal menyimpan ringkasan CCTV {summary.id_cctv}: {e}")
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._loop, name="window-aggregator", daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        interval = max(0.5, min(self.window / 4, 5.0))
+        while True:
+            time.sleep(interval)
+            self.flush_expired()
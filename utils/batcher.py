@@ -0,0 +1,136 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class BatchingDetector:
+    """
+    Bungkus ObjectDetector supaya frame dari banyak request (banyak kamera)
+    dikumpulkan di antrian lalu dijalankan dalam satu panggilan YOLO batch.
+
+    Thread batch hanya menjalankan inferensi (predict_batch); menggambar
+    kotak dilakukan oleh masing-masing request.
+
+    Batch dijalankan ketika sudah terkumpul `max_batch` frame atau ketika
+    frame pertama sudah menunggu `max_wait_ms` milidetik, mana yang lebih dulu.
+    """
+
+    def __init__(self, detector, max_batch=8, max_wait_ms=15):
+        self.detector = detector
+        self.labels = detector.labels
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+        # statistik sederhana
+        self.batches = 0
+        self.frames = 0
+
+    # ======================
+    # API (sama dengan ObjectDetector)
+    # ======================
+    def detect(self, frame, timeout=None):
+        """Kirim frame ke antrian batch dan tunggu hasilnya (frame, counts)"""
+        detections = self.predict(frame, timeout=timeout)
+        return self.annotate(frame, detections), detections.counts
+
+    def detect_batch(self, frames):
+        return [(self.annotate(frame, det), det.counts)
+                for frame, det in zip(frames, self.predict_batch(frames))]
+
+    def predict(self, frame, timeout=None):
+        """Inferensi lewat antrian batch, hasilnya Detections (tanpa gambar)"""
+        return self.submit(frame).result(timeout=timeout)
+
+    def predict_batch(self, frames):
+        futures = [self.submit(frame) for frame in frames]
+        return [f.result() for f in futures]
+
+    def annotate(self, frame, detections):
+        # menggambar dilakukan di thread request, bukan di thread batch
+        return self.detector.annotate(frame, detections)
+
+    def submit(self, frame):
+        self._ensure_started()
+        future = Future()
+        self._queue.put((frame, future))
+        return future
+
+    def stats(self):
+        avg = (self.frames / self.batches) if self.batches else 0.0
+        return {
+            "batches": self.batches,
+            "frames": self.frames,
+            "avg_batch_size": round(avg, 2),
+            "queue_depth": self._queue.qsize(),
+        }
+
+    def stop(self):
+        with self._lock:
+            if self._thread is None:
+                return
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    # ======================
+    # WORKER
+    # ======================
+    def _ensure_started(self):
+        # cek pid: setelah fork (gunicorn preload), thread milik master tidak ikut
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._loop, name="batching-detector", daemon=True)
+                self._thread.start()
+
+    def _collect(self, first):
+        """Ambil frame berikutnya sampai batch penuh atau batas waktu habis"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        stop = False
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                stop = True
+                break
+            batch.append(item)
+        return batch, stop
+
+    def _loop(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            batch, stop = self._collect(first)
+            frames = [frame for frame, _ in batch]
+            try:
+                results = self.detector.predict_batch(frames)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+
+            self.batches += 1
+            self.frames += len(batch)
+            if stop:
+                return
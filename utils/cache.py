@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Cache in-memory thread-safe dengan eviksi LRU (maxsize) dan TTL (detik).
+    Dipakai untuk tabel kecil yang jarang berubah (user, CCTV, karung).
+
+    Loader yang mengembalikan None (mis. id_cctv tidak terdaftar) juga
+    di-cache selama `negative_ttl` detik, di tempat terpisah supaya banjir
+    key tidak dikenal tidak mengusir entri yang valid.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300, negative_ttl=5):
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = float(ttl)
+        self.negative_ttl = float(negative_ttl)
+        self._data = OrderedDict()
+        self._absent = OrderedDict()    # key -> waktu kedaluwarsa
+        self._lock = threading.Lock()
+
+        # statistik
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.negative_hits = 0
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader):
+        """Ambil dari cache; bila tidak ada panggil loader(). Hasil None di-cache sebentar."""
+        value = self.get(key)
+        if value is not MISSING:
+            return value
+        if self._known_absent(key):
+            return None
+        value = loader()
+        if value is not None:
+            self.set(key, value)
+        elif self.negative_ttl > 0:
+            self._set_absent(key)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self._absent.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._absent.clear()
+
+    def _known_absent(self, key):
+        with self._lock:
+            expires = self._absent.get(key)
+            if expires is None:
+                return False
+            if expires < time.monotonic():
+                del self._absent[key]
+                return False
+            self.negative_hits += 1
+            return True
+
+    def _set_absent(self, key):
+        with self._lock:
+            self._absent[key] = time.monotonic() + self.negative_ttl
+            self._absent.move_to_end(key)
+            while len(self._absent) > self.maxsize:
+                self._absent.popitem(last=False)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "absent": len(self._absent),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "negative_hits": self.negative_hits,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -1,8 +1,11 @@
 import cv2
 
+from utils.stream import multipart_frame
+
 class Camera:
-    def __init__(self):
-        self.cap = cv2.VideoCapture(0)
+    def __init__(self, source=0):
+        # source: index webcam, URL RTSP/HTTP, atau path file video
+        self.cap = cv2.VideoCapture(source)
 
     def __del__(self):
         self.cap.release()
@@ -14,6 +17,4 @@ class Camera:
                 break
             else:
                 ret, buffer = cv2.imencode('.jpg', frame)
-                frame = buffer.tobytes()
-                yield (b'--frame\r\n'
-                       b'Conten-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
\ No newline at end of file
+                yield multipart_frame(buffer.tobytes())
\ No newline at end of file
@@ -0,0 +1,381 @@
+"""
+Capture pool: baca CCTV (RTSP/HTTP/file) langsung di server.
+
+Setiap kamera punya dua thread:
+  - CaptureReader : membaca frame terus-menerus dan hanya menyimpan frame
+                    terbaru (frame lama dibuang, tidak diantrikan), reconnect
+                    dengan backoff bila stream putus.
+  - CameraWorker  : mengambil frame terbaru lalu menjalankannya ke detector.
+                    Bila ada viewer /stream, frame dianotasi + di-encode JPEG
+                    sekali lalu dibagikan ke semua viewer (FrameBroadcaster).
+
+Dengan `mailbox` (FrameMailbox), setiap panggilan model menunggu giliran di
+penjadwal yang sama dengan /detect_api & /ws/detect, jadi kamera IP ikut
+pembagian kapasitas berbobot per gudang/CCTV; frame yang tidak mendapat
+slot sebelum deadline dibuang dan worker lanjut ke frame terbaru.
+
+Uji coba dengan file video lokal:
+    python -m utils.capture runs/detect/predict/0.avi --seconds 10
+"""
+import os
+import threading
+import time
+
+import cv2
+
+from utils.stream import FrameBroadcaster
+
+
+def resolve_source(ip_address, url_template="rtsp://{ip}/"):
+    """
+    Ubah kolom CCTV.ip_address menjadi sumber untuk cv2.VideoCapture.
+    - "0", "1"            => index webcam lokal
+    - URL (rtsp://, http://) atau path file => dipakai apa adanya
+    - IP/host saja        => diformat dengan url_template
+    """
+    if ip_address is None:
+        return None
+    source = str(ip_address).strip()
+    if not source:
+        return None
+    if source.isdigit():
+        return int(source)
+    if "://" in source or os.path.exists(source):
+        return source
+    return url_template.format(ip=source)
+
+
+class CaptureReader:
+    """Baca satu sumber video di thread sendiri, simpan hanya frame terbaru"""
+
+    def __init__(self, source, name=None, backoff_start=1.0, backoff_max=30.0, loop_file=True):
+        self.source = source
+        self.name = name or str(source)
+        self.backoff_start = backoff_start
+        self.backoff_max = backoff_max
+        self.is_file = isinstance(source, str) and os.path.isfile(source)
+        self.loop_file = loop_file
+
+        self._cond = threading.Condition()
+        self._frame = None
+        self._seq = 0
+        self._timestamp = 0.0
+        self._running = False
+        self._thread = None
+
+        # statistik
+        self.frames_read = 0
+        self.reconnects = 0
+        self.connected = False
+
+    def start(self):
+        if self._running:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"capture-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def latest(self):
+        """Frame terbaru (frame, seq, timestamp); frame None bila belum ada"""
+        with self._cond:
+            return self._frame, self._seq, self._timestamp
+
+    def wait_frame(self, after_seq, timeout=None):
+        """Tunggu sampai ada frame dengan seq > after_seq"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > after_seq or not self._running, timeout)
+            return self._frame, self._seq, self._timestamp
+
+    def _publish(self, frame):
+        with self._cond:
+            self._frame = frame
+            self._seq += 1
+            self._timestamp = time.time()
+            self._cond.notify_all()
+        self.frames_read += 1
+
+    def _open(self):
+        cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            cap.release()
+            return None
+        return cap
+
+    def _run(self):
+        backoff = self.backoff_start
+        while self._running:
+            cap = self._open()
+            if cap is None:
+                self.connected = False
+                self.reconnects += 1
+                time.sleep(backoff)
+                backoff = min(backoff * 2, self.backoff_max)
+                continue
+
+            self.connected = True
+            backoff = self.backoff_start
+            # file diputar sesuai FPS aslinya supaya perilakunya mirip kamera
+            fps = cap.get(cv2.CAP_PROP_FPS) if self.is_file else 0
+            frame_interval = 1.0 / fps if fps and fps > 0 else 0
+
+            while self._running:
+                start = time.monotonic()
+                ok, frame = cap.read()
+                if not ok:
+                    if self.is_file and self.loop_file and cap.set(cv2.CAP_PROP_POS_FRAMES, 0):
+                        continue
+                    break
+                self._publish(frame)
+                if frame_interval:
+                    time.sleep(max(0.0, frame_interval - (time.monotonic() - start)))
+
+            cap.release()
+            self.connected = False
+            if self._running:
+                self.reconnects += 1
+                time.sleep(backoff)
+                backoff = min(backoff * 2, self.backoff_max)
+
+
+class CameraWorker:
+    """Ambil frame terbaru dari CaptureReader lalu jalankan ke detector"""
+
+    def __init__(self, id_cctv, reader, detector, on_result=None, jpeg_quality=80, scene_gate=None,
+                 tracker=None, mailbox=None, share_of=None):
+        self.id_cctv = id_cctv
+        self.reader = reader
+        self.mailbox = mailbox
+        self.share_of = share_of
+        self.detector = detector
+        self.on_result = on_result
+        self.scene_gate = scene_gate
+        self.tracker = tracker
+        self.broadcaster = FrameBroadcaster()
+        self.jpeg_params = [int(cv2.IMWRITE_JPEG_QUALITY), int(jpeg_quality)]
+
+        self._running = False
+        self._thread = None
+        self._last = None
+
+        # statistik
+        self.frames_inferred = 0
+        self.frames_skipped = 0
+        self.frames_gated = 0
+        self.frames_tracked = 0
+        self.frames_dropped = 0
+        self.errors = 0
+
+    def start(self):
+        if self._running:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"camera-{self.id_cctv}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._running = False
+        self.broadcaster.close()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def latest_result(self):
+        """(frame, detections, timestamp) hasil inferensi terakhir"""
+        return self._last
+
+    def _run(self):
+        last_seq = 0
+        while self._running:
+            frame, seq, timestamp = self.reader.wait_frame(last_seq, timeout=1.0)
+            if frame is None or seq <= last_seq:
+                continue
+            # frame yang terlewat selama inferensi sebelumnya = dibuang
+            self.frames_skipped += seq - last_seq - 1
+            last_seq = seq
+
+            try:
+                detections = self._predict(frame)
+            except Exception:
+                self.errors += 1
+                continue
+            if detections is None:
+                # tidak mendapat slot inferensi (expired/overloaded/superseded)
+                self.frames_dropped += 1
+                continue
+
+            self._last = (frame, detections, timestamp)
+            if self.broadcaster.viewers:
+                self._broadcast(frame, detections)
+            if self.on_result is not None:
+                try:
+                    self.on_result(self.id_cctv, frame, detections)
+                except Exception:
+                    self.errors += 1
+
+    def _predict(self, frame):
+        # adegan tidak berubah => pakai ulang box terakhir tanpa memanggil model
+        gate = self.scene_gate if self.scene_gate is not None and self.scene_gate.enabled else None
+        if gate is not None:
+            detections, thumb = gate.check(self.id_cctv, frame)
+            if detections is not None:
+                self.frames_gated += 1
+                return detections
+
+        # di antara deteksi penuh, box digeser dengan optical flow
+        tracker = self.tracker if self.tracker is not None and self.tracker.enabled else None
+        if tracker is not None:
+            detections = tracker.propagate(self.id_cctv, frame)
+            if detections is not None:
+                self.frames_tracked += 1
+                return detections
+
+        detections = self._infer(frame)
+        if detections is None:
+            return None
+        self.frames_inferred += 1
+        if gate is not None:
+            gate.update(self.id_cctv, thumb, frame.shape, detections)
+        if tracker is not None:
+            tracker.reset(self.id_cctv, frame, detections)
+        return detections
+
+    def _infer(self, frame):
+        """Panggil model lewat mailbox (bila ada); None bila frame tidak diizinkan"""
+        if self.mailbox is None:
+            return self.detector.predict(frame)
+        share = self.share_of(self.id_cctv) if self.share_of is not None else None
+        ticket = self.mailbox.acquire(self.id_cctv, share)
+        if not ticket.admitted:
+            return None
+        start = time.perf_counter()
+        try:
+            return self.detector.predict(frame)
+        finally:
+            self.mailbox.release(ticket, time.perf_counter() - start)
+
+    def _broadcast(self, frame, detections):
+        # anotasi di salinan: frame asli tetap bersih untuk callback/latest_result
+        annotated = self.detector.annotate(frame.copy(), detections)
+        ok, buffer = cv2.imencode(".jpg", annotated, self.jpeg_params)
+        if ok:
+            self.broadcaster.publish(buffer.tobytes())
+
+
+class CapturePool:
+    """Kumpulan reader + worker, satu pasang per CCTV yang punya ip_address"""
+
+    def __init__(self, detector, on_result=None, url_template="rtsp://{ip}/",
+                 backoff_start=1.0, backoff_max=30.0, jpeg_quality=80, scene_gate=None, tracker=None,
+                 mailbox=None, share_of=None):
+        self.detector = detector
+        self.mailbox = mailbox
+        self.share_of = share_of
+        self.scene_gate = scene_gate
+        self.tracker = tracker
+        self.on_result = on_result
+        self.jpeg_quality = jpeg_quality
+        self.url_template = url_template
+        self.backoff_start = backoff_start
+        self.backoff_max = backoff_max
+        self._cameras = {}
+        self._lock = threading.Lock()
+
+    def add(self, id_cctv, ip_address):
+        source = resolve_source(ip_address, self.url_template)
+        if source is None:
+            return False
+        with self._lock:
+            current = self._cameras.get(id_cctv)
+            if current is not None and current[0].source == source:
+                return True
+            if current is not None:
+                self._stop_pair(current)
+            reader = CaptureReader(source, name=str(id_cctv),
+                                   backoff_start=self.backoff_start,
+                                   backoff_max=self.backoff_max).start()
+            worker = CameraWorker(id_cctv, reader, self.detector, self.on_result,
+                                  jpeg_quality=self.jpeg_quality,
+                                  scene_gate=self.scene_gate,
+                                  tracker=self.tracker,
+                                  mailbox=self.mailbox,
+                                  share_of=self.share_of).start()
+            self._cameras[id_cctv] = (reader, worker)
+        return True
+
+    def remove(self, id_cctv):
+        with self._lock:
+            pair = self._cameras.pop(id_cctv, None)
+        if pair is not None:
+            self._stop_pair(pair)
+
+    def sync(self, cctvs):
+        """Samakan isi pool dengan {id_cctv: ip_address} dari database"""
+        wanted = {i: ip for i, ip in cctvs.items() if resolve_source(ip, self.url_template) is not None}
+        for id_cctv in set(self._cameras) - set(wanted):
+            self.remove(id_cctv)
+        for id_cctv, ip_address in wanted.items():
+            self.add(id_cctv, ip_address)
+
+    def get(self, id_cctv):
+        """(reader, worker) untuk satu CCTV, atau None"""
+        return self._cameras.get(id_cctv)
+
+    def stop(self):
+        with self._lock:
+            pairs = list(self._cameras.values())
+            self._cameras.clear()
+        for pair in pairs:
+            self._stop_pair(pair)
+
+    def stats(self):
+        result = {}
+        for id_cctv, (reader, worker) in list(self._cameras.items()):
+            result[id_cctv] = {
+                "source": str(reader.source),
+                "connected": reader.connected,
+                "reconnects": reader.reconnects,
+                "frames_read": reader.frames_read,
+                "frames_inferred": worker.frames_inferred,
+                "frames_skipped": worker.frames_skipped,
+                "frames_gated": worker.frames_gated,
+                "frames_tracked": worker.frames_tracked,
+                "frames_dropped": worker.frames_dropped,
+                "errors": worker.errors,
+                "stream": worker.broadcaster.stats(),
+            }
+        return result
+
+    @staticmethod
+    def _stop_pair(pair):
+        reader, worker = pair
+        reader.stop()
+        worker.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from utils.detector import ObjectDetector
+
+    parser = argparse.ArgumentParser(description="Jalankan capture pool terhadap file/URL video")
+    parser.add_argument("sources", nargs="+", help="path video / URL RTSP / HTTP")
+    parser.add_argument("--model", default="models/best.pt")
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    pool = CapturePool(ObjectDetector(args.model))
+    pool.sync({i + 1: src for i, src in enumerate(args.sources)})
+    time.sleep(args.seconds)
+    print(json.dumps(pool.stats(), indent=2))
+    pool.stop()
@@ -0,0 +1,142 @@
+import os
+import queue
+import threading
+import time
+
+
+class WriteBehindQueue:
+    """
+    Antrian tulis di belakang (write-behind) untuk baris database.
+
+    Request hanya memasukkan record (dict) ke antrian in-memory yang dibatasi
+    ukurannya; thread latar belakang menulisnya secara bulk lewat `flush_fn`
+    ketika sudah terkumpul `batch_size` record atau setelah `flush_interval`
+    detik. Bila antrian penuh, record dibuang dan dihitung sebagai drop.
+
+    Bila satu batch gagal, record ditulis ulang satu per satu supaya hanya
+    record yang rusak yang dibuang; `on_drop(jumlah)` dipanggil untuk record
+    yang tetap gagal.
+    """
+
+    def __init__(self, flush_fn, max_queue=10000, batch_size=200, flush_interval=1.0, logger=None,
+                 on_drop=None):
+        self.flush_fn = flush_fn
+        self.on_drop = on_drop
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = float(flush_interval)
+        self.logger = logger
+
+        self._queue = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+
+        # statistik
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+
+    def put(self, record):
+        """Masukkan record; False bila antrian penuh (record dibuang)"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    def stats(self):
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_max": self._queue.maxsize,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "batches": self.batches,
+            "errors": self.errors,
+        }
+
+    def drain(self, timeout=10):
+        """Hentikan thread setelah semua record di antrian ditulis"""
+        with self._lock:
+            thread = self._thread
+            if thread is None or self._pid != os.getpid():
+                return
+            self._stopping = True
+        thread.join(timeout)
+
+    # ======================
+    # WORKER
+    # ======================
+    def _ensure_started(self):
+        # cek pid: setelah fork, thread milik proses induk tidak ikut
+        if self._alive():
+            return
+        with self._lock:
+            if self._alive():
+                return
+            self._stopping = False
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._loop, name="write-behind", daemon=True)
+            self._thread.start()
+
+    def _alive(self):
+        return self._thread is not None and self._thread.is_alive() and self._pid == os.getpid()
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+            elif self._stopping:
+                return
+
+    def _collect(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (self._stopping and self._queue.empty()):
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 0.2)))
+            except queue.Empty:
+                continue
+        return batch
+
+    def _flush(self, batch):
+        try:
+            self.flush_fn(batch)
+        except Exception as e:
+            self.errors += 1
+            if len(batch) == 1:
+                self._drop(batch, e)
+                return
+            if self.logger is not None:
+                self.logger.warning(f"[WRITE-BEHIND] batch {len(batch)} baris gagal ({e}), ditulis ulang satu per satu")
+            self._flush_each(batch)
+            return
+        self.written += len(batch)
+        self.batches += 1
+
+    def _flush_each(self, batch):
+        for record in batch:
+            try:
+                self.flush_fn([record])
+            except Exception as e:
+                self._drop([record], e)
+                continue
+            self.written += 1
+            self.batches += 1
+
+    def _drop(self, records, error):
+        self.dropped += len(records)
+        if self.on_drop is not None:
+            self.on_drop(len(records))
+        if self.logger is not None:
+            self.logger.error(f"[WRITE-BEHIND] gagal menulis {len(records)} baris: {error}")
@@ -1,15 +1,101 @@
 from ultralytics import YOLO
 import cv2
+import hashlib
+import os
 import numpy as np
 from collections import defaultdict
 from datetime import datetime
 import time   # ✅ untuk hitung FPS
 
-class ObjectDetector:
-    def __init__(self, model_path="models/best.pt", conf_thresh=0.5):
-        self.model = YOLO(model_path, task="detect")
-        self.labels = self.model.names
-        self.conf_thresh = conf_thresh
+# Backend inferensi: torch (best.pt apa adanya) atau hasil ekspor untuk CPU
+# onnx     -> butuh paket onnx + onnxruntime
+# openvino -> butuh paket openvino
+BACKENDS = ("torch", "onnx", "openvino")
+
+
+def file_hash(path, length=12):
+    """sha256 isi file (dipakai sebagai kunci cache hasil ekspor)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:length]
+
+
+def exported_model_path(model_path, backend):
+    """Lokasi cache hasil ekspor di samping weights, mis. models/best.<hash>.onnx"""
+    stem = os.path.splitext(model_path)[0]
+    digest = file_hash(model_path)
+    if backend == "onnx":
+        return f"{stem}.{digest}.onnx"
+    # ultralytics mengenali OpenVINO IR dari nama folder *_openvino_model
+    return f"{stem}.{digest}_openvino_model"
+
+
+def resolve_model(model_path="models/best.pt", backend="torch", imgsz=640):
+    """
+    Kembalikan path model untuk backend yang dipilih.
+    Ekspor dari .pt hanya dilakukan sekali; hasilnya dipakai ulang selama
+    isi best.pt tidak berubah (hash sama).
+    """
+    backend = (backend or "torch").lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend tidak dikenal: {backend} (pilih {', '.join(BACKENDS)})")
+    if backend == "torch" or not model_path.endswith(".pt"):
+        return model_path
+
+    target = exported_model_path(model_path, backend)
+    if os.path.exists(target):
+        return target
+
+    # dynamic=True supaya tetap bisa dipakai untuk micro-batching
+    exported = YOLO(model_path, task="detect").export(format=backend, imgsz=imgsz, dynamic=True, half=False)
+    os.replace(str(exported).rstrip("/\\"), target)
+    return target
+
+class Detections:
+    """Hasil deteksi satu frame dalam bentuk array (tanpa gambar)"""
+
+    def __init__(self, xyxy, confs, class_ids, counts, size, labels):
+        self.xyxy = xyxy              # (n, 4) int
+        self.confs = confs            # (n,) float
+        self.class_ids = class_ids    # (n,) int
+        self.counts = counts          # {nama_kelas: jumlah}
+        self.size = size              # (width, height) frame asli
+        self.labels = labels          # {class_id: nama_kelas} dari model
+
+    def __len__(self):
+        return len(self.class_ids)
+
+    def rescale(self, size):
+        """Detections dalam koordinat frame berukuran `size` (width, height), mis. upload asli"""
+        width, height = size
+        if (width, height) == tuple(self.size):
+            return self
+        scale = np.array([width / self.size[0], height / self.size[1]] * 2)
+        xyxy = np.rint(self.xyxy * scale).astype(int)
+        return Detections(xyxy, self.confs, self.class_ids, self.counts, (width, height), self.labels)
+
+    def to_dict(self):
+        """Payload ringkas untuk dikirim ke browser (digambar di canvas)"""
+        width, height = self.size
+        return {
+            "width": width,
+            "height": height,
+            "count": int(sum(self.counts.values())),
+            "counts": dict(self.counts),
+            "boxes": self.xyxy.tolist(),
+            "classes": self.class_ids.tolist(),
+            "confidences": np.round(self.confs, 3).tolist(),
+            "labels": {str(c): self.labels[c] for c in set(self.class_ids.tolist())},
+        }
+
+
+class Annotator:
+    """Gambar kotak + label di atas frame (tidak butuh model)"""
+
+    def __init__(self, labels):
+        self.labels = labels
 
         # Warna kotak (Tableau 10)
         self.bbox_colors = [
@@ -17,34 +103,93 @@ class ObjectDetector:
             (88,159,106), (96,202,231), (159,124,168), (169,162,241),
             (98,118,150), (172,176,184)
         ]
+        self._label_sizes = {}
+
+    def annotate(self, frame, detections):
+        return self.draw(frame, detections.xyxy, detections.confs, detections.class_ids)
+
+    def draw(self, frame, xyxy, confs, class_ids):
+        for (xmin, ymin, xmax, ymax), conf, class_id in zip(xyxy.tolist(), confs.tolist(), class_ids.tolist()):
+            class_name = self.labels[class_id]
+            color = self.bbox_colors[class_id % len(self.bbox_colors)]
+            cv2.rectangle(frame, (xmin, ymin), (xmax, ymax), color, 2)
+
+            label = f"{class_name}: {conf:.2f}"
+            (label_w, label_h), baseline = self._text_size(label)
+            cv2.rectangle(frame, (xmin, ymin - label_h - 10),
+                          (xmin + label_w, ymin), color, cv2.FILLED)
+            cv2.putText(frame, label, (xmin, ymin - 5),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0,0,0), 1)
+        return frame
+
+    def _text_size(self, label):
+        # label hanya bervariasi di nama kelas + 2 digit conf, jadi cukup di-cache
+        size = self._label_sizes.get(label)
+        if size is None:
+            size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+            self._label_sizes[label] = size
+        return size
+
+
+def count_classes(class_ids, labels):
+    """Hitung jumlah objek per kelas dengan np.bincount (urutan = kemunculan pertama)"""
+    stable_counts = defaultdict(int)
+    if class_ids.size == 0:
+        return stable_counts
+
+    totals = np.bincount(class_ids)
+    _, first_index = np.unique(class_ids, return_index=True)
+    for class_id in class_ids[np.sort(first_index)].tolist():
+        stable_counts[labels[class_id]] += int(totals[class_id])
+    return stable_counts
+
+
+class ObjectDetector:
+    def __init__(self, model_path="models/best.pt", conf_thresh=0.5):
+        self.model_path = model_path
+        self.model = YOLO(model_path, task="detect")
+        self.labels = self.model.names
+        self.conf_thresh = conf_thresh
+
+        self.annotator = Annotator(self.labels)
+        self.bbox_colors = self.annotator.bbox_colors
 
     def detect(self, frame):
         start_time = time.time()   # ✅ mulai hitung FPS
 
-        results = self.model(frame, conf=self.conf_thresh, verbose=False)
-        detections = results[0].boxes
+        detections = self.predict(frame)
+        return self.annotate(frame, detections), detections.counts
 
-        # Hitung jumlah objek
-        stable_counts = defaultdict(int)
+    def detect_batch(self, frames):
+        """Jalankan satu panggilan YOLO untuk banyak frame sekaligus"""
+        return [(self.annotate(frame, det), det.counts)
+                for frame, det in zip(frames, self.predict_batch(frames))]
 
-        for i, box in enumerate(detections):
-            xyxy = box.xyxy.cpu().numpy().squeeze().astype(int)
-            xmin, ymin, xmax, ymax = xyxy
-            conf = box.conf.item()
-            class_id = int(box.cls.item())
-            class_name = self.labels[class_id]
+    def predict(self, frame):
+        """Inferensi saja (tanpa menggambar), hasilnya berupa Detections"""
+        results = self.model(frame, conf=self.conf_thresh, verbose=False)
+        return self._to_detections(results[0])
+
+    def predict_batch(self, frames):
+        if not frames:
+            return []
+        results = self.model(list(frames), conf=self.conf_thresh, verbose=False)
+        return [self._to_detections(result) for result in results]
 
-            if conf >= self.conf_thresh:
-                color = self.bbox_colors[class_id % len(self.bbox_colors)]
-                cv2.rectangle(frame, (xmin, ymin), (xmax, ymax), color, 2)
+    def annotate(self, frame, detections):
+        """Gambar kotak + label dari Detections langsung di atas frame"""
+        return self.annotator.annotate(frame, detections)
 
-                label = f"{class_name}: {conf:.2f}"
-                (label_w, label_h), baseline = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
-                cv2.rectangle(frame, (xmin, ymin - label_h - 10),
-                              (xmin + label_w, ymin), color, cv2.FILLED)
-                cv2.putText(frame, label, (xmin, ymin - 5),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0,0,0), 1)
+    def _to_detections(self, result):
+        # Pindahkan semua box ke NumPy sekali saja (bukan per box)
+        # kolom: x1, y1, x2, y2, [track_id], conf, cls
+        data = result.boxes.data.cpu().numpy()
+        confs = data[:, -2].astype(np.float64)
+        keep = confs >= self.conf_thresh
 
-                stable_counts[class_name] += 1
+        xyxy = data[keep, :4].astype(int)
+        confs = confs[keep]
+        class_ids = data[keep, -1].astype(int)
 
-        return frame, stable_counts
+        height, width = result.orig_shape[:2]
+        return Detections(xyxy, confs, class_ids, count_classes(class_ids, self.labels), (width, height), self.labels)
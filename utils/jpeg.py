@@ -0,0 +1,85 @@
+import cv2
+import numpy as np
+
+# penyekalaan DCT libjpeg saat decode: 1/2, 1/4, 1/8 tanpa decode penuh dulu
+REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+# gambar terkecil yang masuk akal (header JPEG/PNG saja sudah lebih panjang)
+MIN_IMAGE_BYTES = 16
+
+# marker SOF (start of frame) yang memuat ukuran gambar; C4/C8/CC bukan SOF
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# marker tanpa panjang segmen
+_STANDALONE = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8}
+
+
+def jpeg_size(data):
+    """
+    (width, height) dari header SOF JPEG tanpa decode piksel.
+    None bila bukan JPEG atau header tidak lengkap.
+    """
+    data = memoryview(data)
+    n = len(data)
+    if n < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+    i = 2
+    while i + 4 <= n:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:          # byte pengisi
+            i += 1
+            continue
+        if marker in _STANDALONE:
+            i += 2
+            continue
+        if marker in (0xD9, 0xDA):  # EOI / SOS sebelum SOF
+            return None
+        length = (data[i + 2] << 8) | data[i + 3]
+        if marker in _SOF_MARKERS:
+            if i + 9 > n:
+                return None
+            height = (data[i + 5] << 8) | data[i + 6]
+            width = (data[i + 7] << 8) | data[i + 8]
+            return (width, height) if width and height else None
+        i += 2 + length
+    return None
+
+
+def reduction_factor(size, target_side):
+    """Faktor 1/2/4/8 terbesar yang sisi terpanjangnya masih >= target_side"""
+    if size is None or not target_side:
+        return 1
+    longest = max(size)
+    for factor, _ in REDUCED_FLAGS:
+        if longest // factor >= target_side:
+            return factor
+    return 1
+
+
+def decode_frame(data, target_side=None):
+    """
+    Decode upload ke BGR. JPEG yang jauh lebih besar dari input model
+    langsung di-decode di resolusi 1/2, 1/4 atau 1/8.
+    Return (frame, (width, height) asli); frame None bila gagal decode
+    (termasuk upload kosong / terlalu pendek untuk berisi gambar).
+    """
+    if not data or len(data) < MIN_IMAGE_BYTES:
+        return None, None
+    buf = np.frombuffer(data, np.uint8)
+    size = jpeg_size(data)
+    factor = reduction_factor(size, target_side)
+    flag = dict(REDUCED_FLAGS).get(factor, cv2.IMREAD_COLOR)
+    try:
+        frame = cv2.imdecode(buf, flag)
+    except cv2.error:
+        frame = None
+    if frame is None:
+        return None, size
+    if size is None:
+        size = (frame.shape[1], frame.shape[0])
+    return frame, size
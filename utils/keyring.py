@@ -0,0 +1,110 @@
+import threading
+import time
+
+from cryptography.fernet import Fernet
+
+from utils.cache import TTLCache, MISSING
+
+
+class KeyManager:
+    """
+    Hirarki kunci untuk envelope encryption.
+
+    master key (ENCRYPTION_KEY) -> membungkus data key (DEK) -> mengenkripsi baris.
+
+    Setiap scope (mis. "cctv:3" atau "gudang:1") punya satu DEK aktif yang
+    dipakai untuk banyak baris, lalu dirotasi setelah `rotate_seconds` detik
+    atau `rotate_rows` baris. DEK yang sudah dibuka disimpan di cache LRU
+    (berdasarkan id_kunci), jadi enkripsi per baris cukup satu operasi Fernet
+    dan dekripsi massal tidak perlu membuka DEK yang sama berulang kali.
+    Rotasi menyimpan DEK baru di luar lock: enkripsi scope lain (dan scope
+    yang sama, dengan DEK lama) tidak menunggu round-trip DB.
+
+    Penyimpanan DEK terbungkus diserahkan ke pemanggil:
+      save_key(scope, encrypted_dek) -> id_kunci
+      load_key(id_kunci)             -> encrypted_dek atau None
+    """
+
+    def __init__(self, master_key, save_key, load_key, rotate_seconds=86400,
+                 rotate_rows=100000, cache_size=1024):
+        self.master = Fernet(master_key)
+        self.save_key = save_key
+        self.load_key = load_key
+        self.rotate_seconds = float(rotate_seconds)
+        self.rotate_rows = int(rotate_rows)
+
+        self._active = {}     # scope -> [id_kunci, fernet, dibuat, jumlah_baris]
+        self._rotating = set()
+        self._lock = threading.Lock()
+        self._keys = TTLCache(maxsize=cache_size, ttl=float("inf"))
+
+        # statistik
+        self.rotations = 0
+        self.unwraps = 0
+
+    def encrypt(self, scope, plaintext):
+        """Enkripsi dengan DEK aktif milik scope; return (id_kunci, token)"""
+        with self._lock:
+            active = self._active.get(scope)
+            rotate = active is None or (self._expired(active) and scope not in self._rotating)
+            if rotate:
+                self._rotating.add(scope)
+            else:
+                # selama scope dirotasi thread lain, DEK lama tetap dipakai
+                active[3] += 1
+                id_kunci, f_dek = active[0], active[1]
+        if rotate:
+            id_kunci, f_dek = self._rotate(scope)
+        return id_kunci, f_dek.encrypt(plaintext)
+
+    def decrypt(self, id_kunci, token):
+        return self._fernet(id_kunci).decrypt(token)
+
+    def decrypt_wrapped(self, encrypted_dek, token):
+        """
+        Baris lama: DEK terbungkus disimpan langsung di baris. Satu DEK per
+        baris, jadi tidak di-cache (entrinya tidak akan pernah kena lagi).
+        """
+        self.unwraps += 1
+        return Fernet(self.master.decrypt(encrypted_dek)).decrypt(token)
+
+    def stats(self):
+        return {
+            "active_scopes": len(self._active),
+            "rotations": self.rotations,
+            "unwraps": self.unwraps,
+            "cache": self._keys.stats(),
+        }
+
+    def _expired(self, active):
+        return (time.time() - active[2] >= self.rotate_seconds
+                or active[3] >= self.rotate_rows)
+
+    def _rotate(self, scope):
+        """DEK baru disimpan (round-trip DB) di luar lock, lalu dipasang di bawah lock"""
+        try:
+            dek = Fernet.generate_key()
+            id_kunci = self.save_key(scope, self.master.encrypt(dek))
+            f_dek = Fernet(dek)
+            self._keys.set(id_kunci, f_dek)
+        except Exception:
+            with self._lock:
+                self._rotating.discard(scope)
+            raise
+        with self._lock:
+            self._rotating.discard(scope)
+            self._active[scope] = [id_kunci, f_dek, time.time(), 1]
+            self.rotations += 1
+        return id_kunci, f_dek
+
+    def _fernet(self, id_kunci):
+        f_dek = self._keys.get(id_kunci)
+        if f_dek is not MISSING:
+            return f_dek
+        encrypted_dek = self.load_key(id_kunci)
+        if encrypted_dek is None:
+            raise KeyError(f"Kunci {id_kunci} tidak ditemukan")
+        f_dek = Fernet(self.master.decrypt(encrypted_dek))
+        self._keys.set(id_kunci, f_dek)
+        self.unwraps += 1
+        return f_dek
@@ -0,0 +1,182 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# detik; rentang dari imdecode kecil (~1 ms) sampai inferensi CPU lambat (~2 s)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.075, 0.1,
+                   0.25, 0.5, 0.75, 1.0, 2.5)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        key = tuple(str(v) for v in labelvalues)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+        return lines
+
+
+class Histogram:
+    """
+    Histogram latensi gaya Prometheus (bucket kumulatif + _sum + _count).
+    observe() hanya bisect + beberapa penjumlahan di bawah lock, cukup murah
+    untuk dipanggil di setiap frame.
+    """
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}    # labelvalues -> [counts per bucket (+Inf terakhir), sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        key = tuple(str(v) for v in labelvalues)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def collect(self):
+        with self._lock:
+            items = sorted((k, (list(s[0]), s[1], s[2])) for k, s in self._series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total!r}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class CallbackMetric:
+    """Nilai yang dibaca saat scrape (mis. statistik antrian); fn() -> angka atau {labelvalues: angka}"""
+
+    def __init__(self, name, help_text, fn, metric_type="gauge", labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+        self.type = metric_type
+        self.labelnames = tuple(labelnames)
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        try:
+            values = self.fn()
+        except Exception:
+            return lines
+        if not isinstance(values, dict):
+            values = {(): values}
+        for key, value in sorted(values.items()):
+            key = key if isinstance(key, tuple) else (key,)
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Kumpulan metrik satu proses, dirender sebagai Prometheus text format 0.0.4"""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def callback(self, name, help_text, fn, metric_type="gauge", labelnames=()):
+        return self._register(CallbackMetric(name, help_text, fn, metric_type, labelnames))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+
+class StageTimer:
+    """
+    Pencatat durasi tahap untuk satu request.
+
+        timer = StageTimer(stage_hist, id_cctv)
+        with timer.stage("decode"):
+            ...
+        response.headers["Server-Timing"] = timer.server_timing()
+
+    Setiap tahap masuk ke histogram (label: stage, lalu label tambahan) dan
+    disimpan untuk header Server-Timing. `current` berisi tahap yang sedang
+    berjalan, dipakai untuk label error.
+    """
+
+    def __init__(self, histogram, *labelvalues):
+        self.histogram = histogram
+        self.labelvalues = labelvalues
+        self.start = time.perf_counter()
+        self.timings = []
+        self.current = None
+
+    @contextmanager
+    def stage(self, name):
+        self.current = name
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+        self.histogram.observe(elapsed, name, *self.labelvalues)
+        self.timings.append((name, elapsed))
+        self.current = None
+
+    def total_ms(self):
+        return (time.perf_counter() - self.start) * 1000
+
+    def stages_ms(self):
+        return {name: round(elapsed * 1000, 3) for name, elapsed in self.timings}
+
+    def server_timing(self):
+        parts = [f"{name};dur={elapsed * 1000:.2f}" for name, elapsed in self.timings]
+        parts.append(f"total;dur={self.total_ms():.2f}")
+        return ", ".join(parts)
@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+
+
+class SceneGate:
+    """
+    Gerbang perubahan adegan per CCTV: lewati inferensi bila frame hampir
+    sama dengan frame terakhir yang diinferensi.
+
+    Setiap frame diperkecil ke thumbnail grayscale (default 96x54) dan
+    di-blur, lalu dibandingkan dengan thumbnail frame terakhir yang benar-benar
+    masuk YOLO. Skor = fraksi piksel thumbnail yang berubah lebih dari
+    `pixel_delta` level abu-abu. Bila skor < `threshold` dan hasil cache belum
+    lebih tua dari `max_age` detik, hasil deteksi terakhir dipakai ulang.
+
+        detections, thumb = gate.check(id_cctv, frame)
+        if detections is None:
+            detections = detector.predict(frame)
+            gate.update(id_cctv, thumb, frame.shape, detections)
+    """
+
+    def __init__(self, threshold=0.01, pixel_delta=15, max_age=10.0, thumb_size=(96, 54),
+                 max_entries=1024):
+        self.threshold = float(threshold)
+        self.pixel_delta = int(pixel_delta)
+        self.max_age = float(max_age)
+        self.thumb_size = tuple(thumb_size)
+        self.max_entries = max(1, int(max_entries))
+
+        self._entries = OrderedDict()   # key -> (thumb, shape, detections, waktu)
+        self._stats = {}                # key -> [checks, skips]
+        self._lock = threading.Lock()
+
+        # statistik
+        self.checks = 0
+        self.skips = 0
+        self.refreshes = 0              # dipaksa inferensi karena max_age
+
+    @property
+    def enabled(self):
+        return self.threshold > 0
+
+    def thumbnail(self, frame):
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        thumb = cv2.resize(gray, self.thumb_size, interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(thumb, (3, 3), 0)
+
+    def score(self, a, b):
+        """Fraksi piksel yang berubah (0..1)"""
+        changed = cv2.absdiff(a, b) > self.pixel_delta
+        return float(changed.mean())
+
+    def check(self, key, frame, now=None):
+        """(detections cache atau None, thumbnail frame ini)"""
+        now = time.monotonic() if now is None else now
+        thumb = self.thumbnail(frame)
+        with self._lock:
+            entry = self._entries.get(key)
+            stats = self._stats.setdefault(key, [0, 0])
+            self.checks += 1
+            stats[0] += 1
+            if entry is None or entry[1] != frame.shape:
+                return None, thumb
+            last_thumb, _, detections, waktu = entry
+            if now - waktu >= self.max_age:
+                self.refreshes += 1
+                return None, thumb
+        if self.score(thumb, last_thumb) >= self.threshold:
+            return None, thumb
+        with self._lock:
+            self.skips += 1
+            stats[1] += 1
+        return detections, thumb
+
+    def update(self, key, thumb, shape, detections, now=None):
+        """Simpan hasil inferensi terbaru sebagai acuan perbandingan"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._entries[key] = (thumb, shape, detections, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                old, _ = self._entries.popitem(last=False)
+                self._stats.pop(old, None)
+
+    def forget(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._stats.pop(key, None)
+
+    def skips_per_key(self):
+        with self._lock:
+            return {(str(k),): s for k, (_, s) in self._stats.items()}
+
+    def stats(self):
+        with self._lock:
+            per_key = {str(k): {"checks": c, "skips": s, "skip_rate": round(s / c, 4) if c else 0.0}
+                       for k, (c, s) in self._stats.items()}
+        return {
+            "threshold": self.threshold,
+            "max_age": self.max_age,
+            "checks": self.checks,
+            "skips": self.skips,
+            "refreshes": self.refreshes,
+            "skip_rate": round(self.skips / self.checks, 4) if self.checks else 0.0,
+            "per_cctv": per_key,
+        }
@@ -0,0 +1,65 @@
+import os
+
+# kolom smaps_rollup (kB) yang dilaporkan
+_SMAPS_FIELDS = {
+    "Rss": "rss",
+    "Pss": "pss",
+    "Shared_Clean": "shared_clean",
+    "Shared_Dirty": "shared_dirty",
+    "Private_Clean": "private_clean",
+    "Private_Dirty": "private_dirty",
+}
+
+
+def memory_info(pid="self"):
+    """
+    Pemakaian memori satu proses (byte) dari /proc/<pid>/smaps_rollup.
+
+    rss     : semua halaman yang sedang di RAM, termasuk yang dibagi dengan
+              proses lain (weights model hasil fork dihitung penuh di tiap worker)
+    pss     : RSS dengan halaman bersama dibagi rata antar pemakainya; jumlah
+              PSS semua worker = memori yang benar-benar terpakai
+    private : halaman milik proses ini saja (USS)
+
+    Kernel tanpa smaps_rollup (< 4.14) hanya memberi rss dari /proc/<pid>/status;
+    selain Linux hasilnya {}.
+    """
+    info = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in _SMAPS_FIELDS:
+                    info[_SMAPS_FIELDS[name]] = int(rest.split()[0]) * 1024
+    except OSError:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        info["rss"] = int(line.split()[1]) * 1024
+        except OSError:
+            return {}
+    if "private_clean" in info:
+        info["private"] = info.pop("private_clean") + info.pop("private_dirty")
+        info["shared"] = info.pop("shared_clean") + info.pop("shared_dirty")
+    return info
+
+
+def children_of(pid):
+    """pid anak langsung (mis. worker gunicorn dari master)"""
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def format_mb(value):
+    return f"{value / (1 << 20):.1f}" if value is not None else "-"
+
+
+def cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
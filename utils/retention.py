@@ -0,0 +1,262 @@
+"""
+Retensi tabel deteksi: arsip kolumnar terkompresi + hapus bertahap.
+
+Alur per hari (waktu lokal, naive seperti yang tersimpan di DB):
+  1. pastikan rekap harian menutup hari itu (sum jumlah_sampel == jumlah baris);
+     bila tidak, rekap hari itu dihitung ulang dari deteksi
+  2. baris mentah diekspor ke satu file .npz (np.savez_compressed), satu array
+     per kolom; kolom biner (data_encrypted, encrypted_dek) disimpan sebagai
+     buffer gabungan + offset supaya tidak perlu pickle
+  3. file ditulis ke .tmp lalu di-rename, dibaca ulang dan jumlah barisnya dicek
+  4. baru setelah itu baris dihapus per batch kecil (commit per batch) supaya
+     lock di tabel deteksi selalu singkat
+
+Rekap per jam yang lebih tua dari batasnya ikut dihapus (rekap harian disimpan
+selamanya), jadi data lama tetap tersedia sebagai ringkasan.
+
+Arsip bisa dimuat kembali ke tabel deteksi dengan load_range(); baris yang
+dimuat ulang akan ikut terhapus lagi pada retensi berikutnya.
+Kunci data (kunci_data) tidak pernah dihapus, jadi data_encrypted di arsip
+tetap bisa didekripsi.
+"""
+import glob
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import func
+
+from utils import rollup
+
+ARCHIVE_PREFIX = "deteksi_"
+# versi 2: kolom jendela (awal jendela agregasi); arsip versi 1 dibaca dengan jendela=None
+ARCHIVE_VERSION = 2
+
+INT_COLUMNS = ("id_deteksi", "total_karung", "jumlah_sampel", "min_karung", "max_karung",
+               "id_cctv", "id_karung", "id_kunci")
+BLOB_COLUMNS = ("data_encrypted", "encrypted_dek")
+# kolom waktu boleh NULL, disimpan sebagai NaT
+NULLABLE_TIME_COLUMNS = ("jendela",)
+# nilai NULL untuk kolom integer di arsip
+NULL_INT = -1
+
+
+def day_start(waktu):
+    return waktu.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def archive_path(folder, hari):
+    return os.path.join(folder, f"{ARCHIVE_PREFIX}{hari:%Y-%m-%d}.npz")
+
+
+# ======================
+# ENCODE / DECODE ARSIP
+# ======================
+def _pack_blobs(values):
+    lengths = np.array([-1 if v is None else len(v) for v in values], dtype=np.int64)
+    data = b"".join(v for v in values if v is not None)
+    return np.frombuffer(data, dtype=np.uint8), lengths
+
+
+def _unpack_blobs(data, lengths):
+    data = data.tobytes()
+    values, offset = [], 0
+    for n in lengths.tolist():
+        if n < 0:
+            values.append(None)
+            continue
+        values.append(data[offset:offset + n])
+        offset += n
+    return values
+
+
+def encode_rows(rows):
+    """list of dict baris deteksi -> dict array kolumnar untuk np.savez_compressed"""
+    arrays = {"version": np.array(ARCHIVE_VERSION)}
+    arrays["waktu"] = np.array([r["waktu"] for r in rows], dtype="datetime64[us]")
+    for name in NULLABLE_TIME_COLUMNS:
+        # None -> NaT; jendela harus ikut supaya baris ringkasan yang dimuat ulang
+        # tetap kena unique index (id_cctv, jendela)
+        arrays[name] = np.array([r.get(name) for r in rows], dtype="datetime64[us]")
+    for name in INT_COLUMNS:
+        arrays[name] = np.array([NULL_INT if r.get(name) is None else r[name] for r in rows],
+                                dtype=np.int64)
+    arrays["rata_karung"] = np.array([np.nan if r.get("rata_karung") is None else r["rata_karung"]
+                                      for r in rows], dtype=np.float64)
+    for name in BLOB_COLUMNS:
+        arrays[name], arrays[name + "_len"] = _pack_blobs([r.get(name) for r in rows])
+    return arrays
+
+
+def decode_rows(arrays):
+    """kebalikan encode_rows: array kolumnar -> list of dict siap di-insert"""
+    columns = {"waktu": arrays["waktu"].tolist()}
+    n = len(columns["waktu"])
+    for name in NULLABLE_TIME_COLUMNS:
+        columns[name] = arrays[name].tolist() if name in arrays else [None] * n
+    for name in INT_COLUMNS:
+        columns[name] = [None if v == NULL_INT else v for v in arrays[name].tolist()]
+    columns["rata_karung"] = [None if v != v else v for v in arrays["rata_karung"].tolist()]
+    for name in BLOB_COLUMNS:
+        columns[name] = _unpack_blobs(arrays[name], arrays[name + "_len"])
+    return [{name: values[i] for name, values in columns.items()} for i in range(n)]
+
+
+def write_archive(path, rows):
+    """Tulis atomik (tmp + rename) lalu baca ulang untuk verifikasi jumlah baris"""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez_compressed(f, **encode_rows(rows))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    with np.load(path) as arsip:
+        if len(arsip["id_deteksi"]) != len(rows):
+            raise IOError(f"Verifikasi arsip {path} gagal")
+    return os.path.getsize(path)
+
+
+def read_archive(path):
+    with np.load(path) as arsip:
+        return decode_rows({name: arsip[name] for name in arsip.files})
+
+
+# ======================
+# RETENSI
+# ======================
+def _fetch_day(session, deteksi, hari):
+    columns = [getattr(deteksi, name) for name in
+               ("waktu", *NULLABLE_TIME_COLUMNS, *INT_COLUMNS, "rata_karung", *BLOB_COLUMNS)]
+    query = (session.query(*columns)
+             .filter(deteksi.waktu >= hari, deteksi.waktu < hari + timedelta(days=1))
+             .order_by(deteksi.id_deteksi))
+    return [row._asdict() for row in query]
+
+
+def _ensure_rollup(session, deteksi, gudang_of, rekap_jam, rekap_harian, hari, jumlah_baris, tz):
+    """
+    Rekap harian harus sudah mencakup semua baris sebelum baris mentah dihapus.
+    Hanya dipanggil untuk hari yang belum pernah diarsipkan: setelah itu
+    rebuild dari tabel deteksi akan kehilangan baris yang sudah di arsip.
+    """
+    tercatat = (session.query(func.coalesce(func.sum(rekap_harian.jumlah_sampel), 0))
+                .filter(rekap_harian.periode == hari)
+                .scalar())
+    if int(tercatat) >= jumlah_baris:
+        return False
+    rollup.rebuild(session, deteksi, gudang_of, rekap_jam, rekap_harian,
+                   dari=hari, sampai=hari + timedelta(days=1), tz=tz)
+    return True
+
+
+def _delete_ids(session, deteksi, ids, batch_size, pause):
+    for start in range(0, len(ids), batch_size):
+        chunk = ids[start:start + batch_size]
+        session.query(deteksi).filter(deteksi.id_deteksi.in_(chunk)).delete(synchronize_session=False)
+        session.commit()
+        if pause:
+            time.sleep(pause)
+
+
+def archive_and_prune(session, deteksi, gudang_of, rekap_jam, rekap_harian, folder,
+                      raw_days=30, hourly_days=365, batch_size=5000, pause=0.05,
+                      now=None, tz=None, dry_run=False, log=print):
+    """
+    Arsipkan & hapus baris deteksi yang lebih tua dari `raw_days` hari,
+    lalu hapus rekap per jam yang lebih tua dari `hourly_days` hari.
+    Return dict statistik.
+    """
+    now = now or datetime.now(tz)
+    if now.tzinfo is not None:
+        now = now.replace(tzinfo=None)
+    batas_mentah = day_start(now) - timedelta(days=raw_days)
+    batas_jam = day_start(now) - timedelta(days=hourly_days)
+    os.makedirs(folder, exist_ok=True)
+
+    hasil = {"batas_mentah": batas_mentah, "batas_rekap_jam": batas_jam, "hari": 0,
+             "diarsipkan": 0, "dihapus": 0, "rekap_dihitung_ulang": 0, "bytes_arsip": 0,
+             "rekap_jam_dihapus": 0}
+
+    paling_lama = session.query(func.min(deteksi.waktu)).filter(deteksi.waktu < batas_mentah).scalar()
+    hari = day_start(paling_lama) if paling_lama is not None else batas_mentah
+    while hari < batas_mentah:
+        rows = _fetch_day(session, deteksi, hari)
+        if rows:
+            path = archive_path(folder, hari)
+            sudah_ada = os.path.exists(path)
+            if sudah_ada:
+                # hari ini pernah diarsipkan (mis. lalu dimuat ulang): gabungkan
+                lama = {r["id_deteksi"]: r for r in read_archive(path)}
+                lama.update((r["id_deteksi"], r) for r in rows)
+                semua = sorted(lama.values(), key=lambda r: r["id_deteksi"])
+            else:
+                semua = rows
+
+            log(f"  {hari:%Y-%m-%d}: {len(rows)} baris -> {os.path.basename(path)}")
+            if not dry_run:
+                if not sudah_ada and _ensure_rollup(session, deteksi, gudang_of, rekap_jam, rekap_harian,
+                                  hari, len(rows), tz):
+                    hasil["rekap_dihitung_ulang"] += 1
+                hasil["bytes_arsip"] += write_archive(path, semua)
+                _delete_ids(session, deteksi, [r["id_deteksi"] for r in rows], batch_size, pause)
+                hasil["dihapus"] += len(rows)
+            hasil["hari"] += 1
+            hasil["diarsipkan"] += len(rows)
+        hari += timedelta(days=1)
+
+    if not dry_run:
+        while True:
+            ids = [i for (i,) in session.query(rekap_jam.id_rekap)
+                   .filter(rekap_jam.periode < batas_jam).limit(batch_size)]
+            if not ids:
+                break
+            session.query(rekap_jam).filter(rekap_jam.id_rekap.in_(ids)).delete(synchronize_session=False)
+            session.commit()
+            hasil["rekap_jam_dihapus"] += len(ids)
+    return hasil
+
+
+# ======================
+# MUAT ULANG ARSIP
+# ======================
+def list_archives(folder, dari=None, sampai=None):
+    """File arsip untuk hari dalam rentang [dari, sampai)"""
+    paths = []
+    for path in sorted(glob.glob(os.path.join(folder, ARCHIVE_PREFIX + "*.npz"))):
+        tanggal = os.path.basename(path)[len(ARCHIVE_PREFIX):-len(".npz")]
+        try:
+            hari = datetime.strptime(tanggal, "%Y-%m-%d")
+        except ValueError:
+            continue
+        if dari is not None and hari < day_start(dari):
+            continue
+        if sampai is not None and hari >= sampai:
+            continue
+        paths.append(path)
+    return paths
+
+
+def load_range(session, deteksi, folder, dari=None, sampai=None, batch_size=5000, log=print):
+    """
+    Muat kembali arsip ke tabel deteksi (id_deteksi asli dipertahankan).
+    Baris yang id-nya sudah ada di tabel dilewati. Rekap tidak diubah karena
+    rekap harian tidak pernah dihapus oleh retensi.
+    """
+    total = 0
+    for path in list_archives(folder, dari, sampai):
+        rows = read_archive(path)
+        if dari is not None or sampai is not None:
+            rows = [r for r in rows
+                    if (dari is None or r["waktu"] >= dari) and (sampai is None or r["waktu"] < sampai)]
+        for start in range(0, len(rows), batch_size):
+            chunk = rows[start:start + batch_size]
+            ada = {i for (i,) in session.query(deteksi.id_deteksi)
+                   .filter(deteksi.id_deteksi.in_([r["id_deteksi"] for r in chunk]))}
+            baru = [r for r in chunk if r["id_deteksi"] not in ada]
+            if baru:
+                session.execute(deteksi.__table__.insert(), baru)
+                session.commit()
+            total += len(baru)
+        log(f"  {os.path.basename(path)}: {len(rows)} baris")
+    return total
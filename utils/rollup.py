@@ -0,0 +1,160 @@
+"""
+Rekap (rollup) deteksi per jam dan per hari.
+
+Kunci satu baris rekap: (periode, id_cctv, id_karung); id_gudang ikut
+disimpan supaya dashboard bisa langsung menjumlah per gudang.
+Isi: jumlah_sampel (jumlah baris deteksi), jumlah_total (sum total_karung),
+min_karung, max_karung, total_terakhir + waktu_terakhir.
+
+Dipakai dua arah:
+  - inkremental: setiap batch write-behind di-upsert ke tabel rekap
+  - rebuild    : hitung ulang dari tabel deteksi (rebuild_rollup.py)
+"""
+from datetime import timezone
+
+from sqlalchemy import case
+
+# id_karung NULL disimpan sebagai 0 supaya unique constraint tetap berlaku
+TANPA_KARUNG = 0
+
+
+def bucket_jam(waktu):
+    return waktu.replace(minute=0, second=0, microsecond=0)
+
+
+def bucket_hari(waktu):
+    return waktu.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _naive(waktu, tz):
+    """Samakan waktu aware (baris baru) dan naive (hasil baca DB) ke jam lokal naive"""
+    if waktu.tzinfo is not None:
+        waktu = waktu.astimezone(tz or timezone.utc).replace(tzinfo=None)
+    return waktu
+
+
+def aggregate(rows, gudang_of, bucket_fn, tz=None, stats=None):
+    """
+    Gabungkan baris deteksi ke dict {(periode, id_cctv, id_karung): rekap}.
+    rows: iterable dict/objek dengan waktu, id_cctv, id_karung, total_karung,
+          min_karung, max_karung (dua terakhir boleh None); baris dict boleh
+          membawa rekap_sampel/rekap_total (default 1 dan total_karung) untuk
+          baris ringkasan yang digabung ke baris deteksi yang sudah direkap
+    gudang_of: fungsi id_cctv -> id_gudang
+    """
+    stats = {} if stats is None else stats
+    for row in rows:
+        get = row.get if isinstance(row, dict) else (lambda k, r=row: getattr(r, k))
+        waktu = _naive(get("waktu"), tz)
+        total = int(get("total_karung") or 0)
+        low = get("min_karung")
+        high = get("max_karung")
+        low = total if low is None else int(low)
+        high = total if high is None else int(high)
+        extra = row if isinstance(row, dict) else {}
+        samples = int(extra.get("rekap_sampel", 1))
+        added = int(extra.get("rekap_total", total))
+        id_cctv = get("id_cctv")
+        key = (bucket_fn(waktu), id_cctv, get("id_karung") or TANPA_KARUNG)
+
+        rekap = stats.get(key)
+        if rekap is None:
+            stats[key] = {
+                "periode": key[0],
+                "id_cctv": id_cctv,
+                "id_gudang": gudang_of(id_cctv),
+                "id_karung": key[2],
+                "jumlah_sampel": samples,
+                "jumlah_total": added,
+                "min_karung": low,
+                "max_karung": high,
+                "total_terakhir": total,
+                "waktu_terakhir": waktu,
+            }
+            continue
+
+        rekap["jumlah_sampel"] += samples
+        rekap["jumlah_total"] += added
+        rekap["min_karung"] = min(rekap["min_karung"], low)
+        rekap["max_karung"] = max(rekap["max_karung"], high)
+        if waktu >= rekap["waktu_terakhir"]:
+            rekap["total_terakhir"] = total
+            rekap["waktu_terakhir"] = waktu
+    return stats
+
+
+def upsert(session, model, rekap_rows, chunk_size=500):
+    """INSERT ... ON CONFLICT DO UPDATE (PostgreSQL & SQLite) untuk baris rekap"""
+    if not rekap_rows:
+        return
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"Upsert rekap belum didukung untuk database {dialect}")
+
+    rekap_rows = list(rekap_rows)
+    for start in range(0, len(rekap_rows), chunk_size):
+        stmt = insert(model).values(rekap_rows[start:start + chunk_size])
+        new = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["periode", "id_cctv", "id_karung"],
+            set_={
+                "id_gudang": new.id_gudang,
+                "jumlah_sampel": model.jumlah_sampel + new.jumlah_sampel,
+                "jumlah_total": model.jumlah_total + new.jumlah_total,
+                "min_karung": case((new.min_karung < model.min_karung, new.min_karung),
+                                   else_=model.min_karung),
+                "max_karung": case((new.max_karung > model.max_karung, new.max_karung),
+                                   else_=model.max_karung),
+                "total_terakhir": case((new.waktu_terakhir >= model.waktu_terakhir, new.total_terakhir),
+                                       else_=model.total_terakhir),
+                "waktu_terakhir": case((new.waktu_terakhir >= model.waktu_terakhir, new.waktu_terakhir),
+                                       else_=model.waktu_terakhir),
+            }
+        )
+        session.execute(stmt)
+
+
+def apply_rows(session, rows, gudang_of, rekap_jam, rekap_harian, tz=None):
+    """Update rekap jam + hari untuk sekumpulan baris deteksi yang baru ditulis"""
+    upsert(session, rekap_jam, aggregate(rows, gudang_of, bucket_jam, tz).values())
+    upsert(session, rekap_harian, aggregate(rows, gudang_of, bucket_hari, tz).values())
+
+
+def rebuild(session, deteksi, gudang_of, rekap_jam, rekap_harian, dari=None, sampai=None,
+            tz=None, chunk_size=10000):
+    """
+    Hitung ulang rekap dari tabel deteksi untuk rentang [dari, sampai).
+    dari/sampai sebaiknya di awal hari supaya rekap harian tidak terpotong.
+    """
+    for model in (rekap_jam, rekap_harian):
+        query = session.query(model)
+        if dari is not None:
+            query = query.filter(model.periode >= dari)
+        if sampai is not None:
+            query = query.filter(model.periode < sampai)
+        query.delete(synchronize_session=False)
+
+    query = session.query(
+        deteksi.waktu, deteksi.id_cctv, deteksi.id_karung, deteksi.total_karung,
+        deteksi.min_karung, deteksi.max_karung
+    ).filter(deteksi.waktu.isnot(None))
+    if dari is not None:
+        query = query.filter(deteksi.waktu >= dari)
+    if sampai is not None:
+        query = query.filter(deteksi.waktu < sampai)
+
+    per_jam, per_hari, total = {}, {}, 0
+    for row in query.yield_per(chunk_size):
+        row = row._asdict()
+        aggregate([row], gudang_of, bucket_jam, tz, per_jam)
+        aggregate([row], gudang_of, bucket_hari, tz, per_hari)
+        total += 1
+
+    upsert(session, rekap_jam, per_jam.values())
+    upsert(session, rekap_harian, per_hari.values())
+    session.commit()
+    return {"deteksi": total, "rekap_jam": len(per_jam), "rekap_harian": len(per_hari)}
@@ -0,0 +1,77 @@
+import threading
+
+BOUNDARY = "frame"
+
+
+def multipart_frame(jpeg_bytes):
+    """Satu bagian multipart/x-mixed-replace (MJPEG)"""
+    return (b"--" + BOUNDARY.encode() + b"\r\n"
+            b"Content-Type: image/jpeg\r\n"
+            b"Content-Length: " + str(len(jpeg_bytes)).encode() + b"\r\n\r\n" +
+            jpeg_bytes + b"\r\n")
+
+
+class FrameBroadcaster:
+    """
+    Satu produser (kamera) -> banyak viewer MJPEG.
+
+    Produser hanya menyimpan JPEG terbaru dan tidak pernah menunggu viewer.
+    Setiap viewer selalu mengambil frame paling baru; frame yang terlewat
+    karena koneksi viewer lambat langsung dibuang (per-viewer frame dropping).
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._data = None
+        self._seq = 0
+        self._closed = False
+
+        # statistik
+        self.viewers = 0
+        self.frames_published = 0
+        self.frames_sent = 0
+        self.frames_dropped = 0
+
+    def publish(self, jpeg_bytes):
+        with self._cond:
+            self._data = jpeg_bytes
+            self._seq += 1
+            self.frames_published += 1
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stream(self, wait_timeout=5.0):
+        """Generator multipart untuk satu viewer (dipakai di Response Flask)"""
+        with self._cond:
+            self.viewers += 1
+        try:
+            last_seq = 0
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._seq > last_seq or self._closed, wait_timeout)
+                    if self._closed:
+                        return
+                    if self._seq <= last_seq:
+                        # produser belum mengirim frame baru, tetap tunggu
+                        continue
+                    if last_seq:
+                        self.frames_dropped += self._seq - last_seq - 1
+                    data, last_seq = self._data, self._seq
+                # kirim di luar lock supaya viewer lambat tidak menahan produser
+                yield multipart_frame(data)
+                self.frames_sent += 1
+        finally:
+            with self._cond:
+                self.viewers -= 1
+
+    def stats(self):
+        return {
+            "viewers": self.viewers,
+            "frames_published": self.frames_published,
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.frames_dropped,
+        }
@@ -0,0 +1,286 @@
+"""
+Trace per frame (JSONL) + analyzer offline.
+
+Penulis: TraceWriter.record() dipanggil di setiap request /detect_api;
+sebagian frame diambil sesuai `sample_rate`, frame yang lebih lambat dari
+`slow_ms` selalu diambil. Record masuk antrian in-memory dan ditulis oleh
+thread latar belakang, jadi request tidak pernah menunggu disk. Bila antrian
+penuh, record dibuang dan dihitung.
+
+File: <folder>/trace-YYYYMMDD-<pid>.jsonl (satu file per proses per hari).
+
+Analyzer:
+    python -m utils.trace logs/trace
+    python -m utils.trace logs/trace/trace-20250101-*.jsonl --top 20 --cctv 3
+"""
+import argparse
+import glob
+import heapq
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+BOX_BUCKETS = (0, 10, 50, 100, 300)
+
+
+class TraceWriter:
+    def __init__(self, folder, sample_rate=0.01, slow_ms=1000, max_queue=10000,
+                 flush_interval=1.0, logger=None):
+        self.folder = folder
+        self.sample_rate = float(sample_rate)
+        self.slow_ms = float(slow_ms) if slow_ms else float("inf")
+        self.flush_interval = float(flush_interval)
+        self.logger = logger
+
+        self._queue = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+        self._file = None
+        self._file_path = None
+
+        # statistik
+        self.sampled = 0
+        self.dropped = 0
+        self.written = 0
+        self.errors = 0
+
+    @property
+    def enabled(self):
+        return self.sample_rate > 0 or self.slow_ms != float("inf")
+
+    def should_sample(self, total_ms):
+        return total_ms >= self.slow_ms or random.random() < self.sample_rate
+
+    def record(self, record):
+        """Masukkan record (dict) bila terpilih; tidak pernah blocking"""
+        if not self.should_sample(record.get("total_ms", 0.0)):
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.sampled += 1
+        return True
+
+    def stats(self):
+        return {
+            "sample_rate": self.sample_rate,
+            "slow_ms": self.slow_ms,
+            "queue_depth": self._queue.qsize(),
+            "sampled": self.sampled,
+            "dropped": self.dropped,
+            "written": self.written,
+            "errors": self.errors,
+            "file": self._file_path,
+        }
+
+    def close(self, timeout=5):
+        with self._lock:
+            thread = self._thread
+            if thread is None or self._pid != os.getpid():
+                return
+            self._stopping = True
+        thread.join(timeout)
+
+    # ======================
+    # WORKER
+    # ======================
+    def _ensure_started(self):
+        # cek pid: setelah fork, thread milik proses induk tidak ikut
+        if self._alive():
+            return
+        with self._lock:
+            if self._alive():
+                return
+            self._stopping = False
+            self._pid = os.getpid()
+            self._file = None
+            self._file_path = None
+            self._thread = threading.Thread(target=self._loop, name="trace-writer", daemon=True)
+            self._thread.start()
+
+    def _alive(self):
+        return self._thread is not None and self._thread.is_alive() and self._pid == os.getpid()
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            if batch:
+                self._write(batch)
+            elif self._stopping:
+                if self._file is not None:
+                    self._file.close()
+                return
+
+    def _collect(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (self._stopping and self._queue.empty()):
+                return batch
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 0.2)))
+            except queue.Empty:
+                continue
+
+    def _write(self, batch):
+        try:
+            path = os.path.join(self.folder, f"trace-{time.strftime('%Y%m%d')}-{os.getpid()}.jsonl")
+            if path != self._file_path:
+                if self._file is not None:
+                    self._file.close()
+                os.makedirs(self.folder, exist_ok=True)
+                self._file = open(path, "a", encoding="utf-8")
+                self._file_path = path
+            self._file.write("".join(json.dumps(r, separators=(",", ":")) + "\n" for r in batch))
+            self._file.flush()
+        except Exception as e:
+            self.errors += 1
+            self.dropped += len(batch)
+            if self.logger is not None:
+                self.logger.error(f"[TRACE] gagal menulis {len(batch)} record: {e}")
+            return
+        self.written += len(batch)
+
+
+# ======================
+# ANALYZER
+# ======================
+def read_traces(paths):
+    """Baca semua record dari file/folder JSONL; baris rusak dilewati"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.jsonl"))))
+        else:
+            files.extend(sorted(glob.glob(path)))
+    for path in files:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def box_bucket(boxes):
+    low = 0
+    for high in BOX_BUCKETS:
+        if boxes <= high:
+            return f"{low}-{high}" if high else "0"
+        low = high + 1
+    return f">{BOX_BUCKETS[-1]}"
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = (len(sorted_values) - 1) * q / 100.0
+    lower = int(index)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (index - lower)
+
+
+def summarize(groups):
+    rows = {}
+    for key, values in groups.items():
+        values = sorted(values)
+        rows[key] = {
+            "n": len(values),
+            "p50_ms": round(percentile(values, 50), 2),
+            "p95_ms": round(percentile(values, 95), 2),
+            "p99_ms": round(percentile(values, 99), 2),
+            "max_ms": round(values[-1], 2),
+        }
+    return rows
+
+
+def analyze(records, tz, top=10):
+    per_cctv, per_boxes, per_hour = defaultdict(list), defaultdict(list), defaultdict(list)
+    per_stage = defaultdict(list)
+    # heap berukuran `top`: record lain tidak disimpan, memori tidak ikut besar file
+    slowest = []
+    for seq, r in enumerate(records):
+        total = r.get("total_ms", 0.0)
+        per_cctv[str(r.get("id_cctv"))].append(total)
+        per_boxes[box_bucket(r.get("boxes", 0))].append(total)
+        per_hour[datetime.fromtimestamp(r.get("ts", 0), tz).strftime("%Y-%m-%d %H:00")].append(total)
+        for stage, ms in (r.get("stages") or {}).items():
+            per_stage[stage].append(ms)
+        if top <= 0:
+            continue
+        if len(slowest) < top:
+            heapq.heappush(slowest, (total, -seq, r))
+        elif total > slowest[0][0]:
+            heapq.heapreplace(slowest, (total, -seq, r))
+    slowest = [r for _, _, r in sorted(slowest, key=lambda item: item[:2], reverse=True)]
+
+    bucket_order = {box_bucket(b): i for i, b in enumerate(BOX_BUCKETS + (BOX_BUCKETS[-1] + 1,))}
+    return {
+        "frames": sum(len(v) for v in per_cctv.values()),
+        "per_cctv": summarize(per_cctv),
+        "per_boxes": dict(sorted(summarize(per_boxes).items(), key=lambda kv: bucket_order.get(kv[0], 99))),
+        "per_hour": dict(sorted(summarize(per_hour).items())),
+        "per_stage": summarize(per_stage),
+        "slowest": slowest,
+    }
+
+
+def print_table(title, rows):
+    width = max([10] + [len(key) for key in rows])
+    print(f"\n{title}")
+    print(f"  {'':<{width}} {'n':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}  (ms)")
+    for key, row in rows.items():
+        print(f"  {key:<{width}} {row['n']:>7} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} "
+              f"{row['p99_ms']:>9.1f} {row['max_ms']:>9.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m utils.trace",
+                                     description="Analisis trace JSONL /detect_api")
+    parser.add_argument("paths", nargs="+", help="folder trace atau file/glob .jsonl")
+    parser.add_argument("--cctv", type=int, help="hanya satu CCTV")
+    parser.add_argument("--top", type=int, default=10, help="jumlah frame paling lambat")
+    parser.add_argument("--utc-offset", type=float, default=7, help="zona waktu jam (default WIB)")
+    parser.add_argument("--json", dest="as_json", action="store_true", help="cetak hasil sebagai JSON")
+    args = parser.parse_args(argv)
+
+    tz = timezone(timedelta(hours=args.utc_offset))
+    records = read_traces(args.paths)
+    if args.cctv is not None:
+        records = (r for r in records if r.get("id_cctv") == args.cctv)
+    result = analyze(records, tz, args.top)
+
+    if args.as_json:
+        print(json.dumps(result, indent=2))
+        return
+    if not result["frames"]:
+        sys.exit("Tidak ada record trace")
+
+    print(f"{result['frames']} frame")
+    print_table("Per CCTV", result["per_cctv"])
+    print_table("Per jumlah box", result["per_boxes"])
+    print_table("Per jam", result["per_hour"])
+    print_table("Per tahap", result["per_stage"])
+
+    print(f"\n{len(result['slowest'])} frame paling lambat")
+    for r in result["slowest"]:
+        waktu = datetime.fromtimestamp(r.get("ts", 0), tz).strftime("%Y-%m-%d %H:%M:%S")
+        stages = " ".join(f"{k}={v:.1f}" for k, v in (r.get("stages") or {}).items())
+        print(f"  {waktu} cctv={r.get('id_cctv')} {r.get('width')}x{r.get('height')} "
+              f"boxes={r.get('boxes')} total={r.get('total_ms', 0):.1f}ms  {stages}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from utils.detector import Detections, count_classes
+
+
+class _TrackState:
+    __slots__ = ("gray", "scale", "points", "owners", "detections", "since_detect", "lock")
+
+    def __init__(self, gray, scale, points, owners, detections):
+        self.gray = gray
+        self.scale = scale
+        self.points = points          # (m, 1, 2) float32, koordinat di gray (sudah diperkecil)
+        self.owners = owners          # (m,) indeks box pemilik tiap titik
+        self.detections = detections
+        self.since_detect = 0
+        self.lock = threading.Lock()
+
+
+class BoxTracker:
+    """
+    Deteksi penuh setiap N frame, di antaranya box digeser dengan optical flow.
+
+    Setelah deteksi, beberapa titik fitur (goodFeaturesToTrack) diambil di
+    dalam tiap box. Frame berikutnya titik itu dilacak dengan Lucas-Kanade
+    piramida + cek maju-mundur; tiap box digeser sebesar median pergeseran
+    titik miliknya (box tanpa titik valid tetap di tempat, cocok untuk
+    tumpukan karung yang diam). Kelas & conf tidak berubah, jadi count stabil.
+
+    Deteksi penuh dipaksa bila sudah `every_n` frame sejak deteksi terakhir,
+    ukuran frame berubah, atau fraksi titik yang masih terlacak turun di bawah
+    `min_tracked` (kepercayaan tracking rendah).
+
+        detections = tracker.propagate(id_cctv, frame)
+        if detections is None:
+            detections = detector.predict(frame)
+            tracker.reset(id_cctv, frame, detections)
+    """
+
+    def __init__(self, every_n=5, min_tracked=0.5, points_per_box=8, max_side=480,
+                 fb_error=1.5, max_entries=1024):
+        self.every_n = max(1, int(every_n))
+        self.min_tracked = float(min_tracked)
+        self.points_per_box = int(points_per_box)
+        self.max_side = int(max_side)
+        self.fb_error = float(fb_error)
+        self.max_entries = max(1, int(max_entries))
+        self.lk_params = dict(winSize=(15, 15), maxLevel=3,
+                              criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+        # statistik
+        self.propagated = 0
+        self.detect_scheduled = 0     # karena every_n
+        self.detect_lost = 0          # karena titik hilang
+
+    @property
+    def enabled(self):
+        return self.every_n > 1
+
+    def reset(self, key, frame, detections):
+        """Simpan hasil deteksi penuh sebagai titik awal tracking"""
+        gray, scale = self._gray(frame)
+        points, owners = self._features(gray, detections.xyxy * scale)
+        with self._lock:
+            self._states[key] = _TrackState(gray, scale, points, owners, detections)
+            self._states.move_to_end(key)
+            while len(self._states) > self.max_entries:
+                self._states.popitem(last=False)
+
+    def forget(self, key):
+        with self._lock:
+            self._states.pop(key, None)
+
+    def propagate(self, key, frame):
+        """Detections hasil tracking untuk frame ini, atau None bila harus deteksi penuh"""
+        with self._lock:
+            state = self._states.get(key)
+        if state is None or tuple(state.detections.size) != (frame.shape[1], frame.shape[0]):
+            return None
+        with state.lock:
+            return self._propagate(state, frame)
+
+    def _propagate(self, state, frame):
+        if state.since_detect + 1 >= self.every_n:
+            self.detect_scheduled += 1
+            return None
+
+        gray, scale = self._gray(frame)
+        detections = state.detections
+        if len(detections) == 0:
+            # tidak ada box untuk dilacak: cukup tunggu jadwal deteksi berikutnya
+            state.gray, state.since_detect = gray, state.since_detect + 1
+            self.propagated += 1
+            return detections
+        if len(state.points) == 0:
+            state.since_detect += 1
+            self.propagated += 1
+            return detections
+
+        forward, status, _ = cv2.calcOpticalFlowPyrLK(state.gray, gray, state.points, None, **self.lk_params)
+        backward, status_back, _ = cv2.calcOpticalFlowPyrLK(gray, state.gray, forward, None, **self.lk_params)
+        fb = np.linalg.norm((state.points - backward).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (status_back.ravel() == 1) & (fb < self.fb_error)
+        if good.mean() < self.min_tracked:
+            self.detect_lost += 1
+            return None
+
+        shift = (forward - state.points).reshape(-1, 2)
+        xyxy = detections.xyxy.astype(np.float64)
+        for i in range(len(xyxy)):
+            mine = good & (state.owners == i)
+            if mine.any():
+                dx, dy = np.median(shift[mine], axis=0) / scale
+                xyxy[i] += (dx, dy, dx, dy)
+
+        width, height = detections.size
+        xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, width - 1)
+        xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, height - 1)
+        # box yang sudah keluar frame (lebar/tinggi habis) dibuang
+        keep = ((xyxy[:, 2] - xyxy[:, 0]) >= 2) & ((xyxy[:, 3] - xyxy[:, 1]) >= 2)
+        class_ids = detections.class_ids[keep]
+        counts = detections.counts if keep.all() else count_classes(class_ids, detections.labels)
+        result = Detections(np.rint(xyxy[keep]).astype(int), detections.confs[keep], class_ids,
+                            counts, detections.size, detections.labels)
+
+        # titik yang hilang tidak diganti sampai deteksi berikutnya
+        remap = np.cumsum(keep) - 1
+        alive = good & keep[state.owners]
+        state.points = forward[alive].reshape(-1, 1, 2)
+        state.owners = remap[state.owners[alive]]
+        state.gray = gray
+        state.detections = result
+        state.since_detect += 1
+        self.propagated += 1
+        return result
+
+    def stats(self):
+        total = self.propagated + self.detect_scheduled + self.detect_lost
+        return {
+            "every_n": self.every_n,
+            "min_tracked": self.min_tracked,
+            "tracked_cctv": len(self._states),
+            "propagated": self.propagated,
+            "detect_scheduled": self.detect_scheduled,
+            "detect_lost": self.detect_lost,
+            "propagate_rate": round(self.propagated / total, 4) if total else 0.0,
+        }
+
+    def _gray(self, frame):
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        scale = min(1.0, self.max_side / max(gray.shape[:2]))
+        if scale < 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return gray, scale
+
+    def _features(self, gray, boxes):
+        points, owners = [], []
+        height, width = gray.shape[:2]
+        for i, (x1, y1, x2, y2) in enumerate(boxes.astype(int)):
+            x1, y1 = max(0, x1), max(0, y1)
+            x2, y2 = min(width, x2), min(height, y2)
+            if x2 - x1 < 4 or y2 - y1 < 4:
+                continue
+            found = cv2.goodFeaturesToTrack(gray[y1:y2, x1:x2], self.points_per_box, 0.01, 3)
+            if found is None:
+                continue
+            found = found.reshape(-1, 2) + (x1, y1)
+            points.append(found)
+            owners.extend([i] * len(found))
+        if not points:
+            return np.empty((0, 1, 2), np.float32), np.empty(0, int)
+        return np.concatenate(points).astype(np.float32).reshape(-1, 1, 2), np.array(owners, dtype=int)
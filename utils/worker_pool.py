@@ -0,0 +1,380 @@
+"""
+Pool proses worker inferensi.
+
+Setiap worker adalah proses terpisah dengan ObjectDetector sendiri, jadi
+inferensi tidak lagi berebut GIL dengan thread werkzeug. Frame dikirim lewat
+ring buffer multiprocessing.shared_memory (satu per worker, beberapa slot),
+yang lewat antrian hanya metadata kecil (id, slot, shape, dtype). Hasil yang
+kembali juga kecil: array box/conf/kelas + counts.
+
+Proses web hanya decode -> dispatch -> respons.
+"""
+import atexit
+import itertools
+import multiprocessing as mp
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from utils.detector import Annotator, Detections
+
+
+class InferenceUnavailable(RuntimeError):
+    """Worker tidak siap / mati / tidak menjawab dalam batas waktu (dijawab 503 oleh web)"""
+
+
+def _worker_main(index, shm_name, slot_bytes, task_queue, result_queue,
+                 model_path, conf_thresh, torch_threads, batch_size):
+    """Loop utama proses worker (dijalankan lewat spawn)"""
+    import torch
+    torch.set_num_threads(torch_threads)
+
+    from utils.detector import ObjectDetector
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        # shm dimiliki proses web; jangan sampai resource_tracker worker meng-unlink-nya
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+    detector = ObjectDetector(model_path, conf_thresh)
+    result_queue.put(("ready", index, dict(detector.labels)))
+
+    frames = payload = None
+    running = True
+    while running:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        # ambil task lain yang sudah menunggu => satu panggilan YOLO batch
+        tasks = [task]
+        while len(tasks) < batch_size:
+            try:
+                task = task_queue.get_nowait()
+            except queue.Empty:
+                break
+            if task is None:
+                running = False
+                break
+            tasks.append(task)
+
+        frames = []
+        for task_id, slot, shape, dtype, payload in tasks:
+            if payload is None:
+                payload = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=slot * slot_bytes)
+            frames.append(payload)
+
+        try:
+            results = detector.predict_batch(frames)
+        except Exception as e:
+            for task in tasks:
+                result_queue.put(("error", task[0], repr(e)))
+            continue
+
+        for task, det in zip(tasks, results):
+            result_queue.put(("ok", task[0], (det.xyxy, det.confs, det.class_ids, dict(det.counts), det.size)))
+
+    frames = payload = None
+    try:
+        shm.close()
+    except BufferError:
+        pass
+
+
+class ProcessPoolDetector:
+    """
+    Pengganti ObjectDetector yang menjalankan inferensi di N proses worker.
+    API sama: predict / predict_batch / annotate / detect.
+    Proses worker baru dijalankan saat frame pertama datang.
+
+    Worker yang mati dijalankan ulang (task-nya digagalkan). Menunggu model
+    dimuat dibatasi `start_timeout` detik dan menunggu hasil/slot dibatasi
+    `timeout` detik; keduanya berakhir dengan InferenceUnavailable. Worker
+    yang masih hidup tetapi tidak menjawab task berumur >= `timeout` dianggap
+    macet: dihentikan lalu dijalankan ulang, supaya slot shared memory-nya
+    kembali dan pool tidak kehabisan slot.
+    """
+
+    def __init__(self, model_path="models/best.pt", conf_thresh=0.5, workers=2,
+                 torch_threads=1, slots_per_worker=4, slot_bytes=1920 * 1080 * 3,
+                 batch_size=4, timeout=30.0, start_timeout=180.0):
+        self.model_path = model_path
+        self.conf_thresh = conf_thresh
+        self.workers = max(1, int(workers))
+        self.torch_threads = max(1, int(torch_threads))
+        self.slots_per_worker = max(1, int(slots_per_worker))
+        self.slot_bytes = int(slot_bytes)
+        self.batch_size = max(1, int(batch_size))
+        self.timeout = float(timeout) if timeout else None
+        self.start_timeout = float(start_timeout)
+
+        self.labels = None
+        self.annotator = None
+
+        self._ctx = mp.get_context("spawn")
+        self._lock = threading.Lock()
+        self._slots_cond = threading.Condition()
+        self._started = False
+        self._ids = itertools.count(1)
+        self._pending = {}
+
+        self._shms = []
+        self._procs = []
+        self._task_queues = []
+        self._free_slots = []
+        self._ready = set()   # worker yang modelnya sudah dimuat (boleh diberi frame)
+        self._result_queue = None
+        self._collector = None
+
+        # statistik
+        self.frames = 0
+        self.frames_pickled = 0
+        self.restarts = 0
+        self.timeouts = 0
+        self.stuck = 0
+
+    # ======================
+    # API (sama dengan ObjectDetector)
+    # ======================
+    def detect(self, frame):
+        detections = self.predict(frame)
+        return self.annotate(frame, detections), detections.counts
+
+    def detect_batch(self, frames):
+        return [(self.annotate(frame, det), det.counts)
+                for frame, det in zip(frames, self.predict_batch(frames))]
+
+    def predict(self, frame, timeout=None):
+        return self._result(self.submit(frame), timeout)
+
+    def predict_batch(self, frames):
+        futures = [self.submit(frame) for frame in frames]
+        return [self._result(f) for f in futures]
+
+    def annotate(self, frame, detections):
+        self._ensure_started()
+        return self.annotator.annotate(frame, detections)
+
+    def submit(self, frame):
+        self._ensure_started()
+        frame = np.ascontiguousarray(frame)
+        worker, slot = self._acquire_slot()
+
+        task_id = next(self._ids)
+        future = Future()
+        self._pending[task_id] = (future, worker, slot, time.monotonic())
+
+        payload = None
+        if frame.nbytes <= self.slot_bytes:
+            view = np.ndarray(frame.shape, dtype=frame.dtype,
+                              buffer=self._shms[worker].buf, offset=slot * self.slot_bytes)
+            view[...] = frame
+        else:
+            # frame lebih besar dari slot: kirim lewat pickle (jarang terjadi)
+            payload = frame
+            self.frames_pickled += 1
+
+        self._task_queues[worker].put((task_id, slot, frame.shape, frame.dtype.str, payload))
+        self.frames += 1
+        return future
+
+    def stats(self):
+        with self._slots_cond:
+            in_flight = sum(self.slots_per_worker - len(free) for free in self._free_slots)
+        return {
+            "workers": self.workers,
+            "alive": sum(1 for p in self._procs if p.is_alive()),
+            "in_flight": in_flight,
+            "frames": self.frames,
+            "frames_pickled": self.frames_pickled,
+            "restarts": self.restarts,
+            "timeouts": self.timeouts,
+            "stuck": self.stuck,
+        }
+
+    def stop(self):
+        with self._lock:
+            if not self._started:
+                return
+            self._started = False
+            for q in self._task_queues:
+                q.put(None)
+            for proc in self._procs:
+                proc.join(timeout=10)
+                if proc.is_alive():
+                    proc.terminate()
+            self._result_queue.put(("stop", None, None))
+            if self._collector is not None:
+                self._collector.join(timeout=5)
+            for shm in self._shms:
+                shm.close()
+                shm.unlink()
+            self._shms, self._procs, self._task_queues, self._free_slots = [], [], [], []
+            self._ready.clear()
+
+    # ======================
+    # INTERNAL
+    # ======================
+    def _ensure_started(self):
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            self._result_queue = self._ctx.Queue()
+            for index in range(self.workers):
+                shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * self.slots_per_worker)
+                self._shms.append(shm)
+                self._task_queues.append(self._ctx.Queue())
+                self._free_slots.append(list(range(self.slots_per_worker)))
+                self._procs.append(self._spawn(index))
+
+            try:
+                self._wait_ready()
+            except InferenceUnavailable:
+                self._teardown()
+                raise
+            self.annotator = Annotator(self.labels)
+
+            self._collector = threading.Thread(target=self._collect_results, name="worker-pool-results", daemon=True)
+            self._collector.start()
+            self._started = True
+            atexit.register(self.stop)
+
+    def _wait_ready(self):
+        """Tunggu semua worker selesai memuat model, paling lama start_timeout"""
+        deadline = time.monotonic() + self.start_timeout
+        ready = 0
+        while ready < self.workers:
+            dead = [p.name for p in self._procs if p.exitcode is not None]
+            if dead:
+                raise InferenceUnavailable(f"detector worker mati saat memuat model: {', '.join(dead)}")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise InferenceUnavailable(f"detector worker belum siap setelah {self.start_timeout:.0f}s")
+            try:
+                kind, index, labels = self._result_queue.get(timeout=min(remaining, 0.5))
+            except queue.Empty:
+                continue
+            if kind == "ready":
+                ready += 1
+                self._ready.add(index)
+                self.labels = labels
+
+    def _teardown(self):
+        for proc in self._procs:
+            if proc.is_alive():
+                proc.terminate()
+            proc.join(timeout=5)
+        for shm in self._shms:
+            shm.close()
+            shm.unlink()
+        self._shms, self._procs, self._task_queues, self._free_slots = [], [], [], []
+        self._ready.clear()
+
+    def _result(self, future, timeout=None):
+        timeout = timeout if timeout is not None else self.timeout
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            self.timeouts += 1
+            self._reclaim(future)
+            raise InferenceUnavailable(f"detector tidak menjawab dalam {timeout:.0f}s") from None
+
+    def _reclaim(self, future):
+        """
+        Task yang menunggu >= timeout: worker-nya macet (hidup tapi tidak
+        menjawab) dan masih memegang slot. Worker dihentikan; _check_workers
+        menggagalkan task-nya, membebaskan semua slotnya dan menjalankan ulang.
+        Timeout lebih pendek dari pemanggil tidak menghentikan worker.
+        """
+        for future_, worker, slot, submitted in list(self._pending.values()):
+            if future_ is not future:
+                continue
+            if self.timeout is not None and time.monotonic() - submitted >= self.timeout:
+                proc = self._procs[worker]
+                if proc.is_alive():
+                    proc.kill()
+                    self.stuck += 1
+            return
+
+    def _spawn(self, index):
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(index, self._shms[index].name, self.slot_bytes, self._task_queues[index],
+                  self._result_queue, self.model_path, self.conf_thresh,
+                  self.torch_threads, self.batch_size),
+            name=f"detector-worker-{index}",
+            daemon=True
+        )
+        proc.start()
+        return proc
+
+    def _acquire_slot(self):
+        """Pilih worker siap dengan slot kosong terbanyak; tunggu bila semua penuh"""
+        with self._slots_cond:
+            if not self._slots_cond.wait_for(lambda: any(self._free_slots[i] for i in self._ready),
+                                             timeout=self.timeout):
+                self.timeouts += 1
+                raise InferenceUnavailable("semua slot detector worker penuh")
+            worker = max(self._ready, key=lambda i: len(self._free_slots[i]))
+            return worker, self._free_slots[worker].pop()
+
+    def _release_slot(self, worker, slot):
+        with self._slots_cond:
+            self._free_slots[worker].append(slot)
+            self._slots_cond.notify()
+
+    def _collect_results(self):
+        while True:
+            # cek di setiap putaran: di bawah beban antrian hasil tidak pernah kosong
+            self._check_workers()
+            try:
+                kind, task_id, value = self._result_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            if kind == "stop":
+                return
+            if kind == "ready":
+                # worker pengganti selesai memuat model
+                with self._slots_cond:
+                    self._ready.add(task_id)
+                    self._slots_cond.notify_all()
+                continue
+
+            entry = self._pending.pop(task_id, None)
+            if entry is None:
+                continue
+            future, worker, slot, _ = entry
+            self._release_slot(worker, slot)
+
+            if kind == "ok":
+                xyxy, confs, class_ids, counts, size = value
+                future.set_result(Detections(xyxy, confs, class_ids, counts, size, self.labels))
+            else:
+                future.set_exception(RuntimeError(value))
+
+    def _check_workers(self):
+        """Worker mati (mis. OOM): gagalkan task-nya lalu jalankan ulang"""
+        if not self._started:
+            return
+        for index, proc in enumerate(self._procs):
+            if proc.is_alive():
+                continue
+            for task_id, (future, worker, slot, _) in list(self._pending.items()):
+                if worker == index and self._pending.pop(task_id, None) is not None:
+                    future.set_exception(InferenceUnavailable(f"detector worker {index} mati"))
+            with self._slots_cond:
+                self._ready.discard(index)
+                self._free_slots[index] = list(range(self.slots_per_worker))
+            self._task_queues[index] = self._ctx.Queue()
+            self._procs[index] = self._spawn(index)
+            self.restarts += 1